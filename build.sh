@@ -8,5 +8,8 @@ pip install -r requirements.txt
 # Convert static asset files
 python plan_prevencion/manage.py collectstatic --no-input
 
+# Pre-generate the OpenAPI schema as a hashed static file
+python plan_prevencion/manage.py generar_esquema
+
 # Apply any outstanding database migrations
 python plan_prevencion/manage.py migrate
@@ -27,9 +27,28 @@ SECRET_KEY = config('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG_PROD', cast=bool, default=False)
 
-MEDIA_URL = 'proyecto_prevencion/uploads/'
+MEDIA_URL = '/proyecto_prevencion/uploads/'
 MEDIA_ROOT = BASE_DIR / 'proyecto_prevencion/uploads'
 
+# Los documentos se sirven desde la vista servir_documento, que valida permisos y delega la
+# transferencia al proxy: 'nginx' (X-Accel-Redirect), 'sendfile' (X-Sendfile) o 'django' (sin proxy).
+MEDIA_SERVIDOR = config('MEDIA_SERVIDOR', default='django')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protegido/')
+
+# Los documentos subidos se guardan deduplicados por contenido (sha256).
+STORAGES = {
+    'default': {
+        'BACKEND': 'proyecto_prevencion.storage.ContenidoDireccionableStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Cargas reanudables: las partes recibidas se acumulan aquí hasta finalizar la carga.
+CARGAS_PARCIALES_DIR = BASE_DIR / 'proyecto_prevencion/uploads_tmp'
+CARGAS_TAMANO_MAXIMO = config('CARGAS_TAMANO_MAXIMO', cast=int, default=200 * 1024 * 1024)
+
 ALLOWED_HOSTS = [
     config('PRODUCTION_HOST'),
     "localhost",
@@ -46,6 +65,7 @@ EMAIL_HOST = 'sandbox.smtp.mailtrap.io'
 EMAIL_HOST_USER = config('MAILTRAP_USER')
 EMAIL_HOST_PASSWORD = config('MAILTRAP_PASS')
 EMAIL_PORT = '2525'
+DEFAULT_FROM_EMAIL = 'grupo1@backend-python.com'
 
 # Application definition
 
@@ -61,22 +81,24 @@ INSTALLED_APPS = [
     'rest_framework',
     'drf_spectacular',
     'social_django',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'proyecto_prevencion.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'proyecto_prevencion.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'social_django.middleware.SocialAuthExceptionMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'proyecto_prevencion.middleware.SocialAuthExceptionMiddleware',
 ]
 
+# Envía los tiempos de cada petición (vista, base de datos, render) en el encabezado Server-Timing.
+SERVER_TIMING = config('SERVER_TIMING', cast=bool, default=False)
+
 ROOT_URLCONF = 'plan_prevencion.urls'
 
 TEMPLATES = [
@@ -101,6 +123,10 @@ WSGI_APPLICATION = 'plan_prevencion.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Las conexiones se mantienen abiertas entre peticiones (DB_CONN_MAX_AGE segundos) y se verifican
+# antes de reutilizarlas. Con DB_POOL se usa el pool de psycopg 3 (pip install "psycopg[binary,pool]"),
+# recomendado al servir con ASGI, donde las conexiones persistentes no se reutilizan.
+
 DATABASES = {
      'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -109,9 +135,37 @@ DATABASES = {
         'PASSWORD': config('PGPASSWORD'),
         'HOST': config('PGHOST'),
         'PORT': config('PGPORT'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', cast=int, default=60),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', cast=bool, default=True),
     }
 }
 
+if config('DB_POOL', cast=bool, default=False):
+    # El pool administra la vida de las conexiones; Django exige CONN_MAX_AGE = 0 al usarlo.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', cast=int, default=2),
+            'max_size': config('DB_POOL_MAX_SIZE', cast=int, default=10),
+            'timeout': config('DB_POOL_TIMEOUT', cast=int, default=10),
+        }
+    }
+
+# Cache
+# Los catálogos cacheados se versionan en la base de datos, por lo que una cache local por worker es suficiente.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ppda'),
+    }
+}
+
+CATALOGOS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Segundos que cada worker reutiliza la versión de tokens de un usuario antes de volver a leerla.
+VERSION_TOKEN_CACHE_TIMEOUT = config('VERSION_TOKEN_CACHE_TIMEOUT', cast=int, default=5)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -150,6 +204,9 @@ STATIC_URL = '/static/'
 if (not DEBUG):
     STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Servir el esquema OpenAPI generado por 'manage.py generar_esquema' (build.sh) en vez de generarlo en cada petición.
+ESQUEMA_API_PREGENERADO = config('ESQUEMA_API_PREGENERADO', cast=bool, default=not DEBUG)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -158,11 +215,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'proyecto_prevencion.apis.authentication.JWTAuthenticationClaims',
         'rest_framework.authentication.SessionAuthentication',
     ],
 }
 
+# Los tokens incluyen los datos del usuario que usan los permisos; ver proyecto_prevencion/apis/authentication.py.
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'proyecto_prevencion.apis.serializers.TokenUsuarioSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'proyecto_prevencion.apis.serializers.TokenUsuarioRefreshSerializer',
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'API de Plan Prevencion',
     'DESCRIPTION': 'API para registrar y reportar medidas de avance de los PPDA por parte de los organismos sectoriales, con enfoque en el plan de Concón, Quintero y Puchuncaví.',
@@ -25,6 +25,17 @@ INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
+# La barra de depuración solo se carga en desarrollo; producción usa el stack mínimo de settings.py.
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+SERVER_TIMING = config('SERVER_TIMING', cast=bool, default=True)
+
+# En desarrollo el esquema OpenAPI se genera en cada petición.
+ESQUEMA_API_PREGENERADO = config('ESQUEMA_API_PREGENERADO', cast=bool, default=False)
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
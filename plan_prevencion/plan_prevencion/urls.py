@@ -16,13 +16,10 @@ Including another URLconf
 """
 
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from rest_framework import routers
 from proyecto_prevencion import views
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from debug_toolbar.toolbar import debug_toolbar_urls
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -43,8 +40,8 @@ urlpatterns = [
     path('admins/', include('proyecto_prevencion.frontend.admins.urls')),
     path('api/', include('proyecto_prevencion.apis.urls')),
     
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('api/schema/', views.esquema_api, name='schema'),
+    path('api/docs/', views.DocumentacionApiView.as_view(url_name='schema'), name='swagger-ui'),
 ]
 
 urlpatterns += [
@@ -52,5 +49,9 @@ urlpatterns += [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += debug_toolbar_urls()
\ No newline at end of file
+urlpatterns += [
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:ruta>", views.servir_documento, name='servir_documento'),
+]
+if 'debug_toolbar' in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+    urlpatterns += debug_toolbar_urls()
@@ -0,0 +1,128 @@
+from functools import wraps
+from django.http import JsonResponse
+from django.utils.translation import gettext as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from proyecto_prevencion.models import Usuario
+from proyecto_prevencion.utils.tokens import aversion_token, version_token
+
+# Campos del usuario que viajan en el token: los que usan los permisos y las vistas para filtrar por organismo.
+CLAIMS_USUARIO = ('organismo_id', 'aprobado', 'is_superuser', 'version_token')
+
+
+def claims_usuario(usuario):
+    return {claim: getattr(usuario, claim) for claim in CLAIMS_USUARIO}
+
+
+def usuario_desde_claims(validated_token):
+    """
+    Construye el usuario con los datos del token, sin consultar la base de datos. Es una instancia de Usuario
+    con el resto de los campos diferidos: si una vista los usa, se cargan en ese momento.
+    """
+    valores = {claim: validated_token[claim] for claim in CLAIMS_USUARIO}
+    valores['id'] = validated_token[api_settings.USER_ID_CLAIM]
+    valores['is_active'] = True
+    campos = [campo.attname for campo in Usuario._meta.concrete_fields if campo.attname in valores]
+    return Usuario.from_db('default', campos, [valores[campo] for campo in campos])
+
+
+class JWTAuthenticationClaims(JWTAuthentication):
+    """
+    Autenticación JWT que toma el usuario de los claims del token en vez de leerlo de la base de datos.
+    Para revocar los tokens de un usuario se incrementa su 'version_token' (ver utils/tokens.py); la versión
+    se compara contra la cacheada, por lo que en la mayoría de las peticiones no hay consultas.
+    Los tokens emitidos sin estos claims se validan como antes, leyendo el usuario.
+    """
+    def get_user(self, validated_token):
+        if 'version_token' not in validated_token:
+            return super().get_user(validated_token)
+        return self.usuario_vigente(validated_token, version_token(self.usuario_id(validated_token)))
+
+    def usuario_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def usuario_vigente(self, validated_token, version):
+        if version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if version != validated_token['version_token']:
+            raise AuthenticationFailed("El token fue revocado.", code="token_revocado")
+        return usuario_desde_claims(validated_token)
+
+
+class JWTAuthenticationClaimsScheme(SimpleJWTScheme):
+    # Documenta JWTAuthenticationClaims en el esquema OpenAPI igual que JWTAuthentication.
+    target_class = 'proyecto_prevencion.apis.authentication.JWTAuthenticationClaims'
+
+
+class JWTAuthenticationAsync(JWTAuthenticationClaims):
+    """
+    Autenticación JWT para vistas asíncronas. La validación del token no toca la base de datos;
+    la versión del token (o el usuario, en tokens sin claims) se obtiene con el ORM asíncrono,
+    sin bloquear el event loop.
+    """
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.usuario_id(validated_token)
+        if 'version_token' in validated_token:
+            return self.usuario_vigente(validated_token, await aversion_token(user_id))
+
+        # Mismas validaciones que JWTAuthentication.get_user.
+        user = await Usuario.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+def jwt_async(*permission_classes):
+    """
+    Decorador para vistas asíncronas: autentica con JWT y evalúa las clases de permiso de DRF
+    indicadas. Los errores se responden con el mismo formato y códigos que las vistas de DRF.
+    """
+    autenticacion = JWTAuthenticationAsync()
+
+    def decorator(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            try:
+                resultado = await autenticacion.aauthenticate(request)
+            except AuthenticationFailed as e:
+                return _error(e, autenticacion.authenticate_header(request))
+            if resultado is None:
+                return _error(NotAuthenticated(), autenticacion.authenticate_header(request))
+
+            request.user, request.auth = resultado
+            for permission_class in permission_classes:
+                if not permission_class().has_permission(request, None):
+                    return _error(PermissionDenied())
+            return await view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
+
+
+def _error(exc, www_authenticate=None):
+    detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+    response = JsonResponse(detail, status=exc.status_code)
+    if www_authenticate:
+        response['WWW-Authenticate'] = www_authenticate
+    return response
@@ -1,5 +1,12 @@
+from django.conf import settings
+from drf_spectacular.contrib.rest_framework_simplejwt import TokenObtainPairSerializerExtension, TokenRefreshSerializerExtension
 from rest_framework import serializers
-from proyecto_prevencion.models import OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido, Indicador, DocumentoSubido, Usuario
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from proyecto_prevencion.apis.authentication import claims_usuario
+from proyecto_prevencion.models import OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido, Indicador, DocumentoSubido, Usuario, CargaDocumento
+from proyecto_prevencion.utils.cursor import decodificar_cursor
 
 class OrganismoPublicoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,25 +40,84 @@ class MedidaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Medida
-        fields = '__all__'
+        exclude = ['version_documentos']
 
 class IndicadorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Indicador
         fields = '__all__'
 
+class IndicadorFiltroSerializer(serializers.Serializer):
+    estado = serializers.ChoiceField(choices=Indicador.ESTADO_CHOICES, required=False)
+    medida = serializers.IntegerField(required=False)
+    organismo = serializers.IntegerField(required=False)
+    usuario = serializers.IntegerField(required=False)
+    periodo = serializers.IntegerField(required=False, min_value=1, help_text="Año calendario del reporte")
+    desde = serializers.DateField(required=False, help_text="Fecha de reporte mínima (AAAA-MM-DD)")
+    hasta = serializers.DateField(required=False, help_text="Fecha de reporte máxima (AAAA-MM-DD)")
+
+class IndicadorPaginaSerializer(IndicadorFiltroSerializer):
+    cursor = serializers.CharField(required=False, help_text="Valor de `next` de la página anterior")
+    limite = serializers.IntegerField(required=False, min_value=1, max_value=500, default=50)
+
+    def validate_cursor(self, value):
+        try:
+            return decodificar_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError("Cursor inválido.")
+
 class DocumentoSubidoSerializer(serializers.ModelSerializer):
     class Meta:
         model = DocumentoSubido
         fields = '__all__'
 
+class CargaDocumentoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CargaDocumento
+        fields = ['id', 'documento_requerido', 'nombre_archivo', 'tamano_total', 'offset']
+        read_only_fields = ['id', 'offset']
+
+    def validate_tamano_total(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("El tamaño debe ser mayor a cero.")
+        if value > settings.CARGAS_TAMANO_MAXIMO:
+            raise serializers.ValidationError("El archivo excede el tamaño máximo permitido.")
+        return value
+
+    def validate_documento_requerido(self, value):
+        medida = self.context['medida']
+        if value.medida_id != medida.id:
+            raise serializers.ValidationError("El documento no corresponde a esta medida.")
+        return value
+
 class RechazoIndicadorSerializer(serializers.Serializer):
     motivo = serializers.CharField(help_text="Motivo del rechazo", required=True)
 
+class RevisionIndicadoresSerializer(serializers.Serializer):
+    ACCIONES = [('aprobar', 'Aprobar'), ('rechazar', 'Rechazar')]
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500,
+        help_text="IDs de los indicadores a revisar"
+    )
+    accion = serializers.ChoiceField(choices=ACCIONES, help_text="Acción a aplicar a todos los indicadores")
+    motivo = serializers.CharField(required=False, allow_blank=True, default="", help_text="Motivo del rechazo")
+
+    def validate(self, data):
+        data['motivo'] = data['motivo'].strip()
+        if data['accion'] == 'rechazar' and not data['motivo']:
+            raise serializers.ValidationError({"motivo": "Debe indicar un motivo de rechazo."})
+        return data
+
 class UsuarioSerializer(serializers.ModelSerializer):
+    # Solo campos que se guardan junto con 'fecha_modificacion': el ETag del listado de usuarios depende de ella.
+    # Quedan fuera la contraseña, la versión de los tokens, 'last_login' y los grupos y permisos.
     class Meta:
         model = Usuario
-        fields = '__all__'
+        fields = [
+            'id', 'username', 'email', 'first_name', 'last_name', 'rut_usuario', 'organismo',
+            'aprobado', 'is_active', 'is_staff', 'date_joined', 'fecha_modificacion',
+        ]
 
 class UsuarioRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -73,9 +139,11 @@ class UsuarioRegistrationSerializer(serializers.ModelSerializer):
         )
         return user
     
-def generar_documentos_serializer(medida):
+def generar_documentos_serializer(medida, documentos=None):
+    if documentos is None:
+        documentos = medida.documentos_requeridos.all()
     campos = {}
-    for doc in medida.documentos_requeridos.all():
+    for doc in documentos:
         field_name = f'doc_{doc.id}'
         campos[field_name] = serializers.FileField(
             required=True,
@@ -93,6 +161,7 @@ class IndicadorEstadoSerializer(serializers.Serializer):
     medida = MedidaSerializer()
     indicador_id = serializers.IntegerField(required=False)
     cumple_requisitos = serializers.BooleanField(required=False)
+    estado = serializers.ChoiceField(choices=Indicador.ESTADO_CHOICES, required=False)
     fecha_reporte = serializers.DateTimeField(required=False)
 
 class DashboardDataSerializer(serializers.Serializer):
@@ -103,4 +172,46 @@ class DashboardDataSerializer(serializers.Serializer):
 
 class DashboardResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField()
-    data = DashboardDataSerializer()
\ No newline at end of file
+    data = DashboardDataSerializer()
+
+class TokenUsuarioSerializer(TokenObtainPairSerializer):
+    """
+    Agrega al token los datos del usuario que necesita JWTAuthenticationClaims.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, valor in claims_usuario(user).items():
+            token[claim] = valor
+        return token
+
+class TokenUsuarioRefreshSerializer(TokenRefreshSerializer):
+    """
+    Al renovar el token de acceso se vuelven a leer los datos del usuario, de modo que los cambios
+    (por ejemplo, la aprobación) se reflejan en el nuevo token. Los tokens revocados no se renuevan.
+    La renovación en sí (rotación y blacklist según SIMPLE_JWT) la hace simplejwt.
+    """
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        usuario = Usuario.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if usuario is None:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        if refresh.payload.get('version_token', usuario.version_token) != usuario.version_token:
+            raise AuthenticationFailed("El token fue revocado.", 'token_revocado')
+
+        data = super().validate(attrs)
+        tokens = {'access': refresh.access_token_class(data['access'])}
+        if 'refresh' in data:
+            tokens['refresh'] = self.token_class(data['refresh'])
+        for nombre, token in tokens.items():
+            for claim, valor in claims_usuario(usuario).items():
+                token[claim] = valor
+            data[nombre] = str(token)
+        return data
+
+# El esquema OpenAPI documenta los endpoints de token igual que con los serializers de simplejwt.
+class TokenUsuarioSerializerExtension(TokenObtainPairSerializerExtension):
+    target_class = 'proyecto_prevencion.apis.serializers.TokenUsuarioSerializer'
+
+class TokenUsuarioRefreshSerializerExtension(TokenRefreshSerializerExtension):
+    target_class = 'proyecto_prevencion.apis.serializers.TokenUsuarioRefreshSerializer'
@@ -1,6 +1,6 @@
 # admin/urls.py
 from django.urls import path
-from .views import organismos, comuna_plan, tipos_medida, medida, indicador, usuario, admins_usuarios
+from .views import organismos, comuna_plan, tipos_medida, medida, indicador, usuario, admins_usuarios, cargas, asincronas, metricas
 
 urlpatterns = [
     # Rutas para Admin - Usuarios
@@ -34,6 +34,8 @@ urlpatterns = [
 
     # Rutas para Indicadores
     path('admin/indicadores/', indicador.api_indicadores_list, name='api_indicadores_list'),
+    path('admin/indicadores/exportar/', indicador.api_indicadores_exportar, name='api_indicadores_exportar'),
+    path('admin/indicadores/revisar/', indicador.api_revisar_indicadores, name='api_revisar_indicadores'),
     path('admin/indicadores/aprobar/<int:pk>/', indicador.api_aprobar_indicador, name='api_aprobar_indicador'),
     path('admin/indicadores/rechazar/<int:pk>/', indicador.api_rechazar_indicador, name='api_rechazar_indicador'),
 
@@ -42,4 +44,20 @@ urlpatterns = [
     path('usuario/dashboard/', usuario.api_dashboard, name='api_usuario_dashboard'),
     path('usuario/medidas/subir/<int:medida_id>/', usuario.api_subir_documentos, name='api_subir_documentos'),
     path('usuario/medidas/<int:medida_id>/documentos-requeridos/', usuario.listar_documentos_requeridos, name='api_documentos_requeridos'),
+
+    # Cargas reanudables
+    path('usuario/medidas/<int:medida_id>/cargas/', cargas.api_crear_carga, name='api_crear_carga'),
+    path('usuario/medidas/<int:medida_id>/cargas/finalizar/', cargas.api_finalizar_cargas, name='api_finalizar_cargas'),
+    path('usuario/cargas/<uuid:carga_id>/', cargas.api_carga, name='api_carga'),
+
+    # Métricas de latencia por vista
+    path('admin/metricas/', metricas.api_metricas, name='api_metricas'),
+
+    # Lectura asíncrona (ASGI): mismas respuestas que los endpoints síncronos equivalentes
+    path('async/usuario/dashboard/', asincronas.api_dashboard, name='api_async_usuario_dashboard'),
+    path('async/usuario/medidas/<int:medida_id>/documentos-requeridos/', asincronas.listar_documentos_requeridos, name='api_async_documentos_requeridos'),
+    path('async/admin/organismos/', asincronas.api_organismo_list, name='api_async_organismo_list'),
+    path('async/admin/comunas/', asincronas.api_comuna_list, name='api_async_comuna_list'),
+    path('async/admin/tiposmedidas/', asincronas.api_tipomedida_list, name='api_async_tipomedida_list'),
+    path('async/admin/medida/', asincronas.api_medida_list, name='api_async_medida_list'),
 ]
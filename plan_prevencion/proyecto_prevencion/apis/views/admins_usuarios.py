@@ -1,13 +1,25 @@
 from drf_spectacular.utils import extend_schema, OpenApiTypes, OpenApiExample
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Count, Max
 from django.shortcuts import get_object_or_404
 from proyecto_prevencion.models import Usuario
 from proyecto_prevencion.apis.serializers import UsuarioSerializer
 from proyecto_prevencion.apis.permissions import IsSuperUser
+from proyecto_prevencion.utils.correos import encolar_aprobacion_usuario
+from proyecto_prevencion.utils.decorators import condicional, generar_etag
+
+
+def estado_usuarios(request):
+    """
+    UsuarioSerializer solo expone campos que se guardan junto con 'fecha_modificacion', así que basta su máximo
+    y la cantidad de usuarios (que cambia al crear o eliminar uno).
+    """
+    estado = Usuario.objects.filter(is_superuser=False).aggregate(ultima=Max('fecha_modificacion'), total=Count('id'))
+    return generar_etag('usuarios', estado['ultima'], estado['total']), estado['ultima']
 
 
 @extend_schema(
@@ -54,12 +66,14 @@ from proyecto_prevencion.apis.permissions import IsSuperUser
     ]
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
+@condicional(estado_usuarios)
 def api_usuarios_list(request):
     try:
-        aprobados = Usuario.objects.filter(is_superuser=False, aprobado=True)
-        pendientes = Usuario.objects.filter(is_superuser=False, aprobado=False)
+        usuarios = Usuario.objects.filter(is_superuser=False)
+        aprobados = usuarios.filter(aprobado=True)
+        pendientes = usuarios.filter(aprobado=False)
 
         return Response({
             "success": True,
@@ -81,7 +95,7 @@ def api_usuarios_list(request):
         "- Acceder a su panel de carga\n"
         "- Visualizar las medidas asociadas a su organismo\n"
         "- Subir los documentos requeridos\n\n"
-        "También se envía automáticamente un correo notificando al usuario que su cuenta ha sido habilitada."
+        "También se encola un correo notificando al usuario que su cuenta ha sido habilitada; lo envía el comando `enviar_correos`."
     ),
     responses={
         200: OpenApiTypes.OBJECT,
@@ -97,15 +111,6 @@ def api_usuarios_list(request):
             response_only=True,
             status_codes=["200"]
         ),
-        OpenApiExample(
-            name="Aprobado pero falló el correo",
-            value={
-                "success": False,
-                "message": "Usuario aprobado, pero falló el envío de correo."
-            },
-            response_only=True,
-            status_codes=["200"]
-        ),
         OpenApiExample(
             name="Error del servidor",
             value={
@@ -118,24 +123,16 @@ def api_usuarios_list(request):
     ]
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_aprobar_usuario(request, user_id):
     try:
         usuario = get_object_or_404(Usuario, pk=user_id)
-        usuario.aprobado = True
-        usuario.save()
-
-        try:
-            send_mail(
-                'Cuenta Aprobada',
-                'Su cuenta ha sido aprobada y ya puede ingresar a la plataforma.',
-                'grupo1@backend-python.com',
-                [usuario.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            return Response({"success": False, "message": "Usuario aprobado, pero falló el envío de correo."}, status=200)
+        with transaction.atomic():
+            usuario.aprobado = True
+            usuario.save()
+            # El correo de notificación lo envía el comando 'enviar_correos'.
+            encolar_aprobacion_usuario(usuario.email)
 
         return Response({"success": True, "message": "Usuario aprobado correctamente."}, status=200)
     except Exception as e:
@@ -149,7 +146,7 @@ def api_aprobar_usuario(request, user_id):
         "Desactiva un usuario previamente aprobado, impidiéndole el acceso al sistema.\n\n"
         "Esto puede utilizarse si el usuario cambia de función, si su organismo ya no participa en el programa, "
         "o si comete alguna infracción. Una vez desactivado:\n"
-        "- El usuario no podrá acceder a su cuenta\n"
+        "- El usuario no podrá acceder a su cuenta; los tokens ya emitidos dejan de ser válidos en pocos segundos\n"
         "- No podrá cargar documentos ni reportar nuevas medidas\n"
         "- Su información permanece registrada, pero en estado inactivo"
     ),
@@ -179,12 +176,13 @@ def api_aprobar_usuario(request, user_id):
     ]
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_desactivar_usuario(request, user_id):
     try:
         usuario = get_object_or_404(Usuario, pk=user_id)
         usuario.aprobado = False
+        # Al guardar se revocan los tokens ya emitidos, que dicen que está aprobado (ver signals.py).
         usuario.save()
         return Response({"success": True, "message": "Usuario desactivado correctamente."}, status=200)
     except Exception as e:
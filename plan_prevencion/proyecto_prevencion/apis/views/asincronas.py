@@ -0,0 +1,106 @@
+"""
+Versiones asíncronas de los endpoints de lectura más consultados, para servir con ASGI (uvicorn).
+Responden lo mismo que sus equivalentes síncronos, pero no ocupan un hilo mientras esperan
+a la base de datos o a clientes lentos.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.encoders import JSONEncoder
+from proyecto_prevencion.apis.authentication import jwt_async
+from proyecto_prevencion.apis.permissions import IsRegularApprovedUser, IsSuperUser
+from proyecto_prevencion.apis.serializers import OrganismoPublicoSerializer, ComunaPlanSerializer, TiposMedidasSerializer, MedidaSerializer
+from proyecto_prevencion.apis.views.usuario import datos_dashboard
+from proyecto_prevencion.models import OrganismoPublico, ComunaPlan, TiposMedidas, Medida, ResumenCumplimiento
+from proyecto_prevencion.utils.catalogos import aobtener_catalogo, aestado_catalogo, aversion_catalogo
+from proyecto_prevencion.utils.decorators import condicional_async, generar_etag
+from proyecto_prevencion.utils.formularios import formularios_documentos
+
+
+def respuesta(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+# ------ Usuarios ------
+
+async def estado_dashboard(request):
+    user = request.user
+    resumen = await ResumenCumplimiento.objects.filter(organismo_id=user.organismo_id, usuario=user)\
+        .aaggregate(ultima=Max('fecha_actualizacion'), total=Count('id'))
+    etag = generar_etag('dashboard', user.id, user.organismo_id, await aversion_catalogo('medida'), resumen['ultima'], resumen['total'])
+    return etag, None
+
+
+@require_safe
+@jwt_async(IsRegularApprovedUser)
+@condicional_async(estado_dashboard)
+async def api_dashboard(request):
+    user = request.user
+    measures = Medida.objects.filter(organismo_id=user.organismo_id, activo=True).prefetch_related("documentos_requeridos")
+    estados = await ResumenCumplimiento.objects.aestado_por_medida(measures, user)
+    return respuesta({"success": True, "data": datos_dashboard(estados)})
+
+
+async def estado_documentos_requeridos(request, medida_id):
+    version = await Medida.objects.filter(pk=medida_id, organismo_id=request.user.organismo_id)\
+        .values_list('version_documentos', flat=True).afirst()
+    if version is None:
+        return None, None
+    return generar_etag('documentos_requeridos', medida_id, version), None
+
+
+@require_safe
+@jwt_async(IsRegularApprovedUser)
+@condicional_async(estado_documentos_requeridos)
+async def listar_documentos_requeridos(request, medida_id):
+    medida = await Medida.objects.filter(pk=medida_id).afirst()
+    if medida is None:
+        return respuesta({"detail": NotFound.default_detail}, status=404)
+
+    if medida.organismo_id != request.user.organismo_id:
+        return respuesta({"success": False, "error": "No tienes permiso para esta medida."}, status=403)
+
+    # Solo consulta la base de datos si los documentos de la medida cambiaron desde la última vez.
+    documentos, _, _ = await sync_to_async(formularios_documentos)(medida)
+    data = [
+        {"id": doc.id, "descripcion": doc.descripcion}
+        for doc in documentos
+    ]
+    return respuesta(data)
+
+
+# ------ Catálogos ------
+
+def vista_catalogo(nombre, serializer_class, queryset):
+    """
+    Construye la vista asíncrona de un catálogo. Usa la misma cache que la vista síncrona.
+    """
+    async def construir():
+        return list(serializer_class([objeto async for objeto in queryset()], many=True).data)
+
+    @require_safe
+    @jwt_async(IsSuperUser)
+    @condicional_async(aestado_catalogo(nombre))
+    async def vista(request):
+        try:
+            data = await aobtener_catalogo(nombre, 'api', construir)
+            return respuesta({"success": True, "data": data})
+        except Exception as e:
+            return respuesta({"success": False, "error": str(e)}, status=500)
+    return vista
+
+
+api_organismo_list = vista_catalogo(
+    'organismo', OrganismoPublicoSerializer, lambda: OrganismoPublico.objects.filter(activo=True)
+)
+api_comuna_list = vista_catalogo(
+    'comuna', ComunaPlanSerializer, lambda: ComunaPlan.objects.filter(activo=True)
+)
+api_tipomedida_list = vista_catalogo(
+    'tipomedida', TiposMedidasSerializer, lambda: TiposMedidas.objects.filter(activo=True)
+)
+api_medida_list = vista_catalogo(
+    'medida', MedidaSerializer, lambda: Medida.objects.filter(activo=True).prefetch_related('documentos_requeridos')
+)
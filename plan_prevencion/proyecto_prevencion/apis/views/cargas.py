@@ -0,0 +1,172 @@
+import io
+from contextlib import ExitStack
+from drf_spectacular.utils import extend_schema, OpenApiTypes, OpenApiExample, OpenApiParameter
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
+from rest_framework.response import Response
+from django.core.files import File
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.shortcuts import get_object_or_404
+from proyecto_prevencion.apis.permissions import IsRegularApprovedUser
+from proyecto_prevencion.models import Medida, CargaDocumento
+from proyecto_prevencion.apis.serializers import CargaDocumentoSerializer
+from proyecto_prevencion.utils.cargas import crear_indicador, guardar_archivos, liberar_archivos
+from proyecto_prevencion.utils.formularios import formularios_documentos
+
+
+def _respuesta_offset(carga, status=200):
+    response = Response({"success": True, "id": str(carga.id), "offset": carga.offset, "tamano_total": carga.tamano_total}, status=status)
+    response['Upload-Offset'] = str(carga.offset)
+    response['Upload-Length'] = str(carga.tamano_total)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@extend_schema(
+    tags=["Usuarios"],
+    summary="Iniciar carga reanudable",
+    description=(
+        "Crea una carga reanudable para uno de los documentos requeridos de la medida. "
+        "Pensado para conexiones lentas o inestables: el archivo se envía luego por partes con "
+        "`PATCH /api/usuario/cargas/<id>/`, y si la conexión se corta basta con consultar el `offset` y continuar desde ahí.\n\n"
+        "Una vez completos todos los documentos, se deben finalizar con `/api/usuario/medidas/<medida_id>/cargas/finalizar/`."
+    ),
+    request=CargaDocumentoSerializer,
+    responses={201: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT, 403: OpenApiTypes.OBJECT},
+    examples=[
+        OpenApiExample(
+            name="Carga creada",
+            value={"success": True, "id": "3f0c4b1e9a8d4c7e8f2b1a0d9c8e7f6a", "offset": 0, "tamano_total": 1048576},
+            response_only=True,
+            status_codes=["201"]
+        )
+    ]
+)
+@api_view(['POST'])
+@authentication_classes([JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated, IsRegularApprovedUser])
+def api_crear_carga(request, medida_id):
+    user = request.user
+    medida = get_object_or_404(Medida, pk=medida_id)
+
+    if medida.organismo_id != user.organismo_id:
+        return Response({"success": False, "error": "No tienes permiso para esta medida."}, status=403)
+
+    serializer = CargaDocumentoSerializer(data=request.data, context={'medida': medida})
+    if not serializer.is_valid():
+        return Response({"success": False, "errors": serializer.errors}, status=400)
+
+    carga = serializer.save(usuario=user, medida=medida)
+    return _respuesta_offset(carga, status=201)
+
+
+@extend_schema(
+    tags=["Usuarios"],
+    summary="Consultar, enviar o descartar una carga reanudable",
+    description=(
+        "- `GET`/`HEAD`: devuelve el `offset` (bytes ya recibidos), también en el header `Upload-Offset`.\n"
+        "- `PATCH`: agrega bytes al archivo. El cuerpo es binario (`application/offset+octet-stream`) y el header "
+        "`Upload-Offset` debe coincidir con el `offset` actual; si no coincide se responde 409 con el offset correcto.\n"
+        "- `DELETE`: descarta la carga y los bytes recibidos."
+    ),
+    parameters=[
+        OpenApiParameter('Upload-Offset', int, OpenApiParameter.HEADER, description="Offset de la parte enviada (solo PATCH)"),
+    ],
+    request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+    responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT, 409: OpenApiTypes.OBJECT}
+)
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@authentication_classes([JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated, IsRegularApprovedUser])
+def api_carga(request, carga_id):
+    carga = get_object_or_404(CargaDocumento, pk=carga_id, usuario=request.user)
+
+    if request.method == 'DELETE':
+        carga.descartar()
+        return Response({"success": True, "message": "Carga descartada."}, status=200)
+
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return Response({"success": False, "error": "Debe indicar el header Upload-Offset."}, status=400)
+
+        try:
+            carga.escribir(request.stream or io.BytesIO(), offset)
+        except UnreadablePostError:
+            return Response({"success": False, "error": "La conexión se interrumpió; reanude desde el offset indicado."}, status=400)
+        except ValueError as e:
+            response = _respuesta_offset(carga, status=409)
+            response.data.update({"success": False, "error": str(e)})
+            return response
+
+    return _respuesta_offset(carga)
+
+
+@extend_schema(
+    tags=["Usuarios"],
+    summary="Finalizar cargas reanudables",
+    description=(
+        "Registra un nuevo indicador para la medida con las cargas reanudables ya completas del usuario. "
+        "Debe existir una carga completa para cada documento requerido; si falta alguna se responde 400 con los IDs pendientes. "
+        "Si otra finalización simultánea ya registró las mismas cargas, se responde 409."
+    ),
+    request=None,
+    responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT, 403: OpenApiTypes.OBJECT, 409: OpenApiTypes.OBJECT, 500: OpenApiTypes.OBJECT},
+    examples=[
+        OpenApiExample(
+            name="Faltan documentos",
+            value={"success": False, "error": "Faltan documentos por completar.", "pendientes": [2]},
+            response_only=True,
+            status_codes=["400"]
+        )
+    ]
+)
+@api_view(['POST'])
+@authentication_classes([JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated, IsRegularApprovedUser])
+def api_finalizar_cargas(request, medida_id):
+    user = request.user
+    medida = get_object_or_404(Medida, pk=medida_id)
+
+    if medida.organismo_id != user.organismo_id:
+        return Response({"success": False, "error": "No tienes permiso para esta medida."}, status=403)
+
+    try:
+        cargas = {}
+        for carga in CargaDocumento.objects.filter(usuario=user, medida=medida).order_by('fecha_creacion'):
+            if carga.completa:
+                cargas[carga.documento_requerido_id] = carga
+
+        documentos, _, _ = formularios_documentos(medida)
+        pendientes = [doc.id for doc in documentos if doc.id not in cargas]
+        if pendientes:
+            return Response({"success": False, "error": "Faltan documentos por completar.", "pendientes": pendientes}, status=400)
+
+        # Como en registrar_indicador, los archivos se guardan antes de abrir la transacción: si esta se
+        # revierte, se liberan en vez de quedar en el disco hasta el barrido de huérfanos.
+        with ExitStack() as stack:
+            guardados = guardar_archivos([
+                (doc, File(stack.enter_context(open(cargas[doc.id].ruta_temporal, 'rb')), name=cargas[doc.id].nombre_archivo))
+                for doc in documentos
+            ])
+        try:
+            with transaction.atomic():
+                # Las cargas quedan bloqueadas hasta eliminarlas: una segunda finalización concurrente espera
+                # y luego ya no las encuentra, en lugar de registrar un indicador duplicado.
+                bloqueadas = list(CargaDocumento.objects.select_for_update().filter(pk__in=[carga.pk for carga in cargas.values()]))
+                if len(bloqueadas) == len(cargas):
+                    crear_indicador(medida, user, guardados)
+                    for carga in bloqueadas:
+                        carga.descartar()
+        except Exception:
+            liberar_archivos(guardados)
+            raise
+        if len(bloqueadas) < len(cargas):
+            liberar_archivos(guardados)
+            return Response({"success": False, "error": "Las cargas ya fueron finalizadas."}, status=409)
+        return Response({"success": True, "message": "Documentos subidos correctamente."}, status=200)
+    except Exception as e:
+        return Response({"success": False, "error": str(e)}, status=500)
@@ -1,13 +1,15 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from proyecto_prevencion.apis.permissions import IsSuperUser
 from proyecto_prevencion.models import ComunaPlan
 from proyecto_prevencion.apis.serializers import ComunaPlanSerializer
+from proyecto_prevencion.utils.catalogos import obtener_catalogo, estado_catalogo
+from proyecto_prevencion.utils.decorators import condicional
 
 @extend_schema(
     tags=["Comunas"],
@@ -23,13 +25,15 @@ from proyecto_prevencion.apis.serializers import ComunaPlanSerializer
     responses=ComunaPlanSerializer(many=True)
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
+@condicional(estado_catalogo('comuna'))
 def api_comuna_list(request):
     try:
-        comunas = ComunaPlan.objects.filter(activo=True)
-        serializer = ComunaPlanSerializer(comunas, many=True)
-        return Response({"success": True, "data": serializer.data}, status=200)
+        data = obtener_catalogo('comuna', 'api', lambda: list(
+            ComunaPlanSerializer(ComunaPlan.objects.filter(activo=True), many=True).data
+        ))
+        return Response({"success": True, "data": data}, status=200)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
 
@@ -46,7 +50,7 @@ def api_comuna_list(request):
     responses=ComunaPlanSerializer
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_comuna_create(request):
     try:
@@ -71,7 +75,7 @@ def api_comuna_create(request):
     responses=ComunaPlanSerializer
 )
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_comuna_update(request, pk):
     try:
@@ -95,7 +99,7 @@ def api_comuna_update(request, pk):
     responses={"success": bool, "message": str}
 )
 @api_view(['DELETE'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_comuna_delete(request, pk):
     try:
@@ -1,41 +1,161 @@
-from drf_spectacular.utils import extend_schema
+import csv
+import json
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from dateutil.relativedelta import relativedelta
+from django.http import StreamingHttpResponse
 from proyecto_prevencion.models import Indicador, Medida
-from proyecto_prevencion.apis.serializers import IndicadorSerializer, RechazoIndicadorSerializer
+from proyecto_prevencion.apis.serializers import IndicadorSerializer, IndicadorFiltroSerializer, IndicadorPaginaSerializer, RechazoIndicadorSerializer, RevisionIndicadoresSerializer
 from proyecto_prevencion.apis.permissions import IsSuperUser
+from proyecto_prevencion.utils.cursor import codificar_cursor
+from proyecto_prevencion.utils.decorators import generar_etag, respuesta_condicional
+from proyecto_prevencion.utils.revision import revisar_indicadores
+
+def estado_indicadores(request, indicadores, siguiente):
+    """
+    El ETag depende solo de la página ya consultada (sus ids, su última modificación y el cursor siguiente),
+    sin recorrer todo el resultado filtrado ni volver a consultar la página.
+    """
+    ultima = max((indicador.fecha_modificacion for indicador in indicadores), default=None)
+    etag = generar_etag('indicadores', request.query_params.urlencode(), [indicador.id for indicador in indicadores], ultima, siguiente)
+    return etag, ultima
+
 
 @extend_schema(
     tags=["Indicadores"],
     summary="Listar indicadores",
         description=(
-        "Devuelve todos los indicadores registrados en el sistema por el usuario autenticado, ordenados por fecha de reporte (más reciente primero).\n\n"
+        "Devuelve los indicadores registrados en el sistema, ordenados por fecha de reporte (más reciente primero).\n\n"
         "Un indicador representa una carga realizada por un usuario respecto al cumplimiento de una medida específica. "
         "Incluye el cálculo del indicador, el estado de validación (`cumple_requisitos`), y los documentos subidos como respaldo.\n\n"
+        "Los resultados se entregan paginados: la respuesta incluye `next`, que debe enviarse como `cursor` para obtener la página siguiente "
+        "(es `null` cuando no quedan más resultados). Se puede filtrar por `estado`, `medida`, `organismo`, `usuario`, "
+        "`periodo` (año calendario del reporte) y rango de fechas (`desde`, `hasta`).\n\n"
         "Esta vista permite al administrador revisar el historial completo de indicadores para todas las medidas reportadas."
     ),
+    parameters=[IndicadorPaginaSerializer],
     responses=IndicadorSerializer(many=True)
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_indicadores_list(request):
+    filtros = IndicadorPaginaSerializer(data=request.query_params)
+    if not filtros.is_valid():
+        return Response({"success": False, "errors": filtros.errors}, status=400)
+
     try:
-        indicadores = Indicador.objects.select_related('medida', 'usuario')\
-            .prefetch_related('documentos_subidos')\
-            .order_by('-fecha_reporte')
+        params = dict(filtros.validated_data)
+        cursor = params.pop('cursor', None)
+        limite = params.pop('limite')
+        indicadores, siguiente = Indicador.objects.filtrar(**params).pagina(cursor, limite)
 
-        serializer = IndicadorSerializer(indicadores, many=True)
-        return Response({"success": True, "data": serializer.data}, status=200)
+        etag, ultima = estado_indicadores(request, indicadores, siguiente)
+        return respuesta_condicional(request, etag, ultima, lambda: Response({
+            "success": True,
+            "data": IndicadorSerializer(indicadores, many=True).data,
+            "next": codificar_cursor(siguiente) if siguiente else None
+        }, status=200))
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
 
 
+COLUMNAS_EXPORTACION = [
+    'id', 'medida_id', 'medida', 'organismo_id', 'usuario_id', 'usuario', 'calculo_indicador',
+    'cumple_requisitos', 'estado', 'periodo', 'fecha_reporte', 'fecha_aprobacion', 'fecha_rechazo', 'motivo_rechazo', 'documentos',
+]
+
+
+class Echo:
+    """
+    Pseudo-buffer para csv.writer: devuelve cada línea en lugar de acumularla.
+    """
+    def write(self, value):
+        return value
+
+
+def _fila_exportacion(indicador):
+    return {
+        'id': indicador.id,
+        'medida_id': indicador.medida_id,
+        'medida': indicador.medida.nombre_corto,
+        'organismo_id': indicador.medida.organismo_id,
+        'usuario_id': indicador.usuario_id,
+        'usuario': indicador.usuario.username,
+        'calculo_indicador': indicador.calculo_indicador,
+        'cumple_requisitos': indicador.cumple_requisitos,
+        'estado': indicador.estado,
+        'periodo': indicador.periodo,
+        'fecha_reporte': indicador.fecha_reporte.isoformat(),
+        'fecha_aprobacion': indicador.fecha_aprobacion.isoformat() if indicador.fecha_aprobacion else None,
+        'fecha_rechazo': indicador.fecha_rechazo.isoformat() if indicador.fecha_rechazo else None,
+        'motivo_rechazo': indicador.motivo_rechazo,
+        'documentos': [
+            {'documento_requerido_id': doc.documento_requerido_id, 'archivo': doc.archivo.name}
+            for doc in indicador.documentos_subidos.all()
+        ],
+    }
+
+
+def _exportar_csv(indicadores):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNAS_EXPORTACION)
+    for indicador in indicadores:
+        fila = _fila_exportacion(indicador)
+        fila['documentos'] = '|'.join(
+            f"{doc['documento_requerido_id']}:{doc['archivo']}" for doc in fila['documentos']
+        )
+        yield writer.writerow([fila[columna] for columna in COLUMNAS_EXPORTACION])
+
+
+def _exportar_ndjson(indicadores):
+    for indicador in indicadores:
+        yield json.dumps(_fila_exportacion(indicador), ensure_ascii=False) + "\n"
+
+
+@extend_schema(
+    tags=["Indicadores"],
+    summary="Exportar indicadores",
+    description=(
+        "Descarga todos los indicadores con su medida, usuario y documentos subidos, en formato `csv` (por defecto) o `ndjson`.\n\n"
+        "La respuesta se genera de forma incremental, por lo que puede usarse para respaldos completos sin importar el volumen de datos. "
+        "Acepta los mismos filtros que el listado de indicadores (`estado`, `medida`, `organismo`, `usuario`, `periodo`, `desde`, `hasta`).\n\n"
+        "En CSV, la columna `documentos` contiene pares `documento_requerido_id:archivo` separados por `|`."
+    ),
+    parameters=[
+        IndicadorFiltroSerializer,
+        OpenApiParameter('formato', str, enum=['csv', 'ndjson'], description="Formato de salida"),
+    ],
+    responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR}
+)
+@api_view(['GET'])
+@authentication_classes([JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def api_indicadores_exportar(request):
+    formato = request.query_params.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return Response({"success": False, "error": "Formato no soportado. Use 'csv' o 'ndjson'."}, status=400)
+
+    filtros = IndicadorFiltroSerializer(data=request.query_params)
+    if not filtros.is_valid():
+        return Response({"success": False, "errors": filtros.errors}, status=400)
+
+    indicadores = Indicador.objects.filtrar(**filtros.validated_data)\
+        .select_related('medida', 'usuario')\
+        .prefetch_related('documentos_subidos')\
+        .order_by('id')\
+        .iterator(chunk_size=2000)
+
+    if formato == 'csv':
+        response = StreamingHttpResponse(_exportar_csv(indicadores), content_type='text/csv; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(_exportar_ndjson(indicadores), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="indicadores.{formato}"'
+    return response
+
+
 @extend_schema(
     tags=["Indicadores"],
     summary="Aprobar indicador",
@@ -44,28 +164,21 @@ def api_indicadores_list(request):
         "Además, actualiza automáticamente el campo `proxima_fecha_carga` de la medida según su frecuencia:\n"
         "- Si es anual: se calcula el siguiente año\n"
         "- Si es única: se deja sin nueva fecha\n\n"
+        "Cada medida y usuario admite un solo indicador aprobado por período (`periodo`, el año calendario del reporte, "
+        "independiente de la frecuencia y de `proxima_fecha_carga`): si ya había otro aprobado en el mismo período, "
+        "sigue aprobado pero queda reemplazado (`reemplazado_por`).\n\n"
         "Esto permite mantener actualizado el calendario de cumplimiento y seguimiento del PPDA."
     ),
     responses={"success": bool, "message": str}
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_aprobar_indicador(request, pk):
     try:
-        indicador = get_object_or_404(Indicador, pk=pk)
-        indicador.cumple_requisitos = True
-        indicador.fecha_aprobacion = timezone.now()
-        indicador.fecha_rechazo = None
-        indicador.motivo_rechazo = ""
-        indicador.save()
-
-        medida = indicador.medida
-        if medida.frecuencia == 'anual':
-            medida.proxima_fecha_carga = timezone.now().date() + relativedelta(years=+1)
-        elif medida.frecuencia == 'unica':
-            medida.proxima_fecha_carga = None
-        medida.save()
+        no_encontrados, _ = revisar_indicadores([pk], aprobar=True)
+        if no_encontrados:
+            return Response({"success": False, "error": "Indicador no encontrado."}, status=404)
 
         return Response({"success": True, "message": "Indicador aprobado correctamente."}, status=200)
     except Exception as e:
@@ -78,13 +191,14 @@ def api_aprobar_indicador(request, pk):
     description=(
         "Rechaza un indicador por su ID. Se debe enviar en el body:\n\n"
         "{ \"motivo\": \"Falta documento firmado por la autoridad\" }\n\n"
-        "Esto marcará el indicador como no válido, guardará la fecha de rechazo y registrará el motivo."
+        "Esto marcará el indicador como no válido, guardará la fecha de rechazo y registrará el motivo. "
+        "Si era el aprobado vigente de su período, vuelve a quedar vigente el último aprobado que había reemplazado."
     ),
     request=RechazoIndicadorSerializer,
     responses={"success": bool, "message": str}
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_rechazar_indicador(request, pk):
     try:
@@ -92,13 +206,53 @@ def api_rechazar_indicador(request, pk):
         if not motivo:
             return Response({"success": False, "error": "Debe indicar un motivo de rechazo."}, status=400)
 
-        indicador = get_object_or_404(Indicador, pk=pk)
-        indicador.cumple_requisitos = False
-        indicador.fecha_aprobacion = None
-        indicador.fecha_rechazo = timezone.now()
-        indicador.motivo_rechazo = motivo
-        indicador.save()
+        no_encontrados, _ = revisar_indicadores([pk], aprobar=False, motivo=motivo)
+        if no_encontrados:
+            return Response({"success": False, "error": "Indicador no encontrado."}, status=404)
 
         return Response({"success": True, "message": "Indicador rechazado correctamente."}, status=200)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
+
+
+@extend_schema(
+    tags=["Indicadores"],
+    summary="Aprobar o rechazar indicadores en bloque",
+    description=(
+        "Aplica la misma acción a una lista de indicadores en una sola transacción. Se debe enviar en el body:\n\n"
+        "{ \"ids\": [1, 2, 3], \"accion\": \"rechazar\", \"motivo\": \"Falta documento firmado por la autoridad\" }\n\n"
+        "- `accion`: `aprobar` o `rechazar`.\n"
+        "- `motivo`: obligatorio al rechazar.\n\n"
+        "Al aprobar se actualiza `proxima_fecha_carga` de las medidas involucradas según su frecuencia. "
+        "Si se aprueban varios indicadores del mismo período (medida, usuario y año), queda vigente el más reciente; "
+        "los demás, y el que estuviera aprobado antes, siguen aprobados pero reemplazados y se informan en `reemplazados`. "
+        "Al rechazar el aprobado vigente de un período, vuelve a quedar vigente el último aprobado que había reemplazado. "
+        "Los IDs inexistentes se informan en `no_encontrados`."
+    ),
+    request=RevisionIndicadoresSerializer,
+    responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT, 404: OpenApiTypes.OBJECT}
+)
+@api_view(['POST'])
+@authentication_classes([JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def api_revisar_indicadores(request):
+    serializer = RevisionIndicadoresSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"success": False, "errors": serializer.errors}, status=400)
+
+    try:
+        ids = serializer.validated_data['ids']
+        aprobar = serializer.validated_data['accion'] == 'aprobar'
+        no_encontrados, reemplazados = revisar_indicadores(ids, aprobar, serializer.validated_data['motivo'])
+        actualizados = len(set(ids)) - len(no_encontrados)
+        if not actualizados:
+            return Response({"success": False, "error": "No se encontraron los indicadores indicados."}, status=404)
+
+        mensaje = "Indicadores aprobados correctamente." if aprobar else "Indicadores rechazados correctamente."
+        return Response({
+            "success": True,
+            "message": mensaje,
+            "data": {"actualizados": actualizados, "no_encontrados": no_encontrados, "reemplazados": reemplazados}
+        }, status=200)
+    except Exception as e:
+        return Response({"success": False, "error": str(e)}, status=500)
@@ -1,13 +1,15 @@
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from proyecto_prevencion.apis.permissions import IsSuperUser
 from proyecto_prevencion.models import Medida
 from proyecto_prevencion.apis.serializers import MedidaSerializer
+from proyecto_prevencion.utils.catalogos import obtener_catalogo, estado_catalogo
+from proyecto_prevencion.utils.decorators import condicional
 
 @extend_schema(
     tags=["Medidas"],
@@ -22,13 +24,15 @@ from proyecto_prevencion.apis.serializers import MedidaSerializer
     responses=MedidaSerializer(many=True)
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
+@condicional(estado_catalogo('medida'))
 def api_medida_list(request):
     try:
-        medidas = Medida.objects.filter(activo=True)
-        serializer = MedidaSerializer(medidas, many=True)
-        return Response({"success": True, "data": serializer.data}, status=200)
+        data = obtener_catalogo('medida', 'api', lambda: list(
+            MedidaSerializer(Medida.objects.filter(activo=True).prefetch_related('documentos_requeridos'), many=True).data
+        ))
+        return Response({"success": True, "data": data}, status=200)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
 
@@ -51,7 +55,7 @@ def api_medida_list(request):
     responses=MedidaSerializer
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_medida_create(request):
     try:
@@ -76,7 +80,7 @@ def api_medida_create(request):
     responses=MedidaSerializer
 )
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_medida_update(request, pk):
     try:
@@ -101,7 +105,7 @@ def api_medida_update(request, pk):
     responses={"success": bool, "message": str}
 )
 @api_view(['DELETE'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_medida_delete(request, pk):
     try:
@@ -0,0 +1,29 @@
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
+from rest_framework.response import Response
+from proyecto_prevencion.apis.permissions import IsSuperUser
+from proyecto_prevencion.utils.metricas import metricas_vistas
+
+
+@extend_schema(
+    tags=["Métricas"],
+    summary="Latencia por vista",
+    description=(
+        "Devuelve, por cada vista, histogramas del tiempo total, de la vista, de base de datos y de render "
+        "(en milisegundos) y de la cantidad de consultas, medidos por `ServerTimingMiddleware`.\n\n"
+        "Los datos son del proceso que atiende la petición; con varios workers cada uno tiene los suyos. "
+        "`p50` y `p99` son el límite superior del tramo que los contiene.\n\n"
+        "Con `DELETE` se reinician los histogramas."
+    ),
+    responses={200: OpenApiTypes.OBJECT}
+)
+@api_view(['GET', 'DELETE'])
+@authentication_classes([JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated, IsSuperUser])
+def api_metricas(request):
+    if request.method == 'DELETE':
+        metricas_vistas.reiniciar()
+        return Response({"success": True, "message": "Métricas reiniciadas."}, status=200)
+    return Response({"success": True, "data": metricas_vistas.como_dict()}, status=200)
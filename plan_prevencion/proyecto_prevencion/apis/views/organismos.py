@@ -1,13 +1,15 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from proyecto_prevencion.apis.permissions import IsSuperUser
 from proyecto_prevencion.models import OrganismoPublico
 from proyecto_prevencion.apis.serializers import OrganismoPublicoSerializer
+from proyecto_prevencion.utils.catalogos import obtener_catalogo, estado_catalogo
+from proyecto_prevencion.utils.decorators import condicional
 
 @extend_schema(
     tags=["Organismos"],
@@ -23,13 +25,15 @@ from proyecto_prevencion.apis.serializers import OrganismoPublicoSerializer
     responses=OrganismoPublicoSerializer(many=True)
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
+@condicional(estado_catalogo('organismo'))
 def api_organismo_list(request):
     try:
-        organismos = OrganismoPublico.objects.filter(activo=True)
-        serializer = OrganismoPublicoSerializer(organismos, many=True)
-        return Response({"success": True, "data": serializer.data}, status=200)
+        data = obtener_catalogo('organismo', 'api', lambda: list(
+            OrganismoPublicoSerializer(OrganismoPublico.objects.filter(activo=True), many=True).data
+        ))
+        return Response({"success": True, "data": data}, status=200)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
 
@@ -45,7 +49,7 @@ def api_organismo_list(request):
     responses=OrganismoPublicoSerializer
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_organismo_create(request):
     try:
@@ -68,7 +72,7 @@ def api_organismo_create(request):
     responses=OrganismoPublicoSerializer
 )
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_organismo_update(request, pk):
     try:
@@ -93,7 +97,7 @@ def api_organismo_update(request, pk):
     responses={"success": bool, "message": str}
 )
 @api_view(['DELETE'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_organismo_delete(request, pk):
     try:
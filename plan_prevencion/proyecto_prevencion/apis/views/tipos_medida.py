@@ -1,13 +1,15 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from proyecto_prevencion.apis.permissions import IsSuperUser
 from proyecto_prevencion.models import TiposMedidas
 from proyecto_prevencion.apis.serializers import TiposMedidasSerializer
+from proyecto_prevencion.utils.catalogos import obtener_catalogo, estado_catalogo
+from proyecto_prevencion.utils.decorators import condicional
 
 @extend_schema(
     tags=["Tipos de Medidas"],
@@ -25,13 +27,15 @@ from proyecto_prevencion.apis.serializers import TiposMedidasSerializer
     responses=TiposMedidasSerializer(many=True)
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
+@condicional(estado_catalogo('tipomedida'))
 def api_tipomedida_list(request):
     try:
-        medidas = TiposMedidas.objects.filter(activo=True)
-        serializer = TiposMedidasSerializer(medidas, many=True)
-        return Response({"success": True, "data": serializer.data}, status=200)
+        data = obtener_catalogo('tipomedida', 'api', lambda: list(
+            TiposMedidasSerializer(TiposMedidas.objects.filter(activo=True), many=True).data
+        ))
+        return Response({"success": True, "data": data}, status=200)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
 
@@ -48,7 +52,7 @@ def api_tipomedida_list(request):
     responses=TiposMedidasSerializer
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_tipomedida_create(request):
     try:
@@ -72,7 +76,7 @@ def api_tipomedida_create(request):
     responses=TiposMedidasSerializer
 )
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_tipomedida_update(request, pk):
     try:
@@ -96,7 +100,7 @@ def api_tipomedida_update(request, pk):
     responses={"success": bool, "message": str}
 )
 @api_view(['DELETE'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsSuperUser])
 def api_tipomedida_delete(request, pk):
     try:
@@ -1,16 +1,18 @@
-import os
-import uuid
 from drf_spectacular.utils import extend_schema, OpenApiTypes, OpenApiExample
 from rest_framework.decorators import api_view, permission_classes, authentication_classes, parser_classes
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
 from rest_framework.response import Response
-from django.core.files.storage import default_storage
+from django.db.models import Count, Max
 from django.shortcuts import get_object_or_404
 from proyecto_prevencion.apis.permissions import IsRegularApprovedUser
-from proyecto_prevencion.models import Medida, Indicador, DocumentoSubido
-from proyecto_prevencion.apis.serializers import UsuarioRegistrationSerializer, MedidaSerializer, DashboardResponseSerializer, generar_documentos_serializer
+from proyecto_prevencion.models import Medida, ResumenCumplimiento
+from proyecto_prevencion.apis.serializers import UsuarioRegistrationSerializer, MedidaSerializer, DashboardResponseSerializer
+from proyecto_prevencion.utils.cargas import registrar_indicador
+from proyecto_prevencion.utils.catalogos import version_catalogo
+from proyecto_prevencion.utils.decorators import condicional, generar_etag
+from proyecto_prevencion.utils.formularios import formularios_documentos
 
 @extend_schema(
     tags=["Usuarios"],
@@ -60,6 +62,43 @@ def api_register(request):
     }, status=400)
 
 
+def datos_dashboard(estados):
+    """
+    Serializa el resultado de ResumenCumplimiento.objects.estado_por_medida para el dashboard.
+    """
+    def serializar(medida, indicador):
+        return {
+            "medida": MedidaSerializer(medida).data,
+            "indicador_id": indicador.id,
+            "cumple_requisitos": indicador.cumple_requisitos,
+            "estado": indicador.estado,
+            "fecha_reporte": indicador.fecha_reporte
+        }
+
+    return {
+        "approved": [serializar(medida, indicador) for medida, indicador in estados['approved']],
+        "pending_review": [serializar(medida, indicador) for medida, indicador in estados['pending_review']],
+        "rejected": [serializar(medida, indicador) for medida, indicador in estados['rejected']],
+        "pending_completion": [{"medida": MedidaSerializer(medida).data} for medida in estados['pending_completion']],
+    }
+
+
+def estado_dashboard(request):
+    user = request.user
+    resumen = ResumenCumplimiento.objects.filter(organismo_id=user.organismo_id, usuario=user)\
+        .aggregate(ultima=Max('fecha_actualizacion'), total=Count('id'))
+    etag = generar_etag('dashboard', user.id, user.organismo_id, version_catalogo('medida'), resumen['ultima'], resumen['total'])
+    return etag, None
+
+
+def estado_documentos_requeridos(request, medida_id):
+    version = Medida.objects.filter(pk=medida_id, organismo_id=request.user.organismo_id)\
+        .values_list('version_documentos', flat=True).first()
+    if version is None:
+        return None, None
+    return generar_etag('documentos_requeridos', medida_id, version), None
+
+
 @extend_schema(
     tags=["Usuarios"],
     summary="Dashboard del usuario",
@@ -90,49 +129,14 @@ def api_register(request):
     ]
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsRegularApprovedUser])
+@condicional(estado_dashboard)
 def api_dashboard(request):
     user = request.user
-    measures = Medida.objects.filter(organismo=user.organismo, activo=True).prefetch_related("documentos_requeridos")
-
-    approved = []
-    pending_review = []
-    rejected = []
-    pending_completion = []
-
-    for measure in measures:
-        indicador = Indicador.objects.filter(
-            medida=measure, usuario=user).order_by('-fecha_reporte').first()
-
-        medida_serializada = MedidaSerializer(measure).data
-
-        if indicador:
-            item = {
-                "medida": medida_serializada,
-                "indicador_id": indicador.id,
-                "cumple_requisitos": indicador.cumple_requisitos,
-                "fecha_reporte": indicador.fecha_reporte
-            }
-
-            if indicador.cumple_requisitos:
-                approved.append(item)
-            elif indicador.fecha_rechazo:
-                rejected.append(item)
-            else:
-                pending_review.append(item)
-        else:
-            pending_completion.append({"medida": medida_serializada})
-
-    return Response({
-        "success": True,
-        "data": {
-            "approved": approved,
-            "pending_review": pending_review,
-            "rejected": rejected,
-            "pending_completion": pending_completion
-        }
-    })
+    measures = Medida.objects.filter(organismo_id=user.organismo_id, activo=True).prefetch_related("documentos_requeridos")
+    estados = ResumenCumplimiento.objects.estado_por_medida(measures, user)
+    return Response({"success": True, "data": datos_dashboard(estados)})
 
 
 @extend_schema(
@@ -211,41 +215,29 @@ def api_dashboard(request):
     ]
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsRegularApprovedUser])
 @parser_classes([MultiPartParser])
 def api_subir_documentos(request, medida_id):
     user = request.user
     medida = get_object_or_404(Medida, pk=medida_id)
 
-    if medida.organismo != user.organismo:
+    if medida.organismo_id != user.organismo_id:
         return Response({"success": False, "error": "No tienes permiso para esta medida."}, status=403)
 
-    SerializerClass = generar_documentos_serializer(medida)
+    documentos, SerializerClass, _ = formularios_documentos(medida)
 
     try:
-        serializer = SerializerClass(data=request.data, files=request.FILES)
+        serializer = SerializerClass(data=request.data)
         if not serializer.is_valid():
             return Response({"success": False, "errors": serializer.errors}, status=400)
 
-        indicador = Indicador.objects.create(
-            medida=medida,
-            usuario=user,
-            calculo_indicador=0,
-            cumple_requisitos=False
-        )
-        for doc in medida.documentos_requeridos.all():
-            field_name = f'doc_{doc.id}'
-            file = serializer.validated_data.get(field_name)
+        archivos = []
+        for doc in documentos:
+            file = serializer.validated_data.get(f'doc_{doc.id}')
             if file:
-                original_extension = os.path.splitext(file.name)[1]
-                unique_filename = f"{uuid.uuid4().hex}_doc_{doc.id}{original_extension}"
-                filename = default_storage.save(unique_filename, file)
-                DocumentoSubido.objects.create(
-                    indicador=indicador,
-                    documento_requerido=doc,
-                    archivo=filename
-                )
+                archivos.append((doc, file))
+        registrar_indicador(medida, user, archivos)
         return Response({"success": True, "message": "Documentos subidos correctamente."}, status=200)
     except Exception as e:
         return Response({"success": False, "error": str(e)}, status=500)
@@ -290,16 +282,17 @@ def api_subir_documentos(request, medida_id):
     ]
 )
 @api_view(["GET"])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([JWTAuthenticationClaims])
 @permission_classes([IsAuthenticated, IsRegularApprovedUser])
+@condicional(estado_documentos_requeridos)
 def listar_documentos_requeridos(request, medida_id):
     user = request.user
     medida = get_object_or_404(Medida, pk=medida_id)
 
-    if medida.organismo != user.organismo:
+    if medida.organismo_id != user.organismo_id:
         return Response({"success": False, "error": "No tienes permiso para esta medida."}, status=403)
 
-    documentos = medida.documentos_requeridos.all()
+    documentos, _, _ = formularios_documentos(medida)
     data = [
         {"id": doc.id, "descripcion": doc.descripcion}
         for doc in documentos
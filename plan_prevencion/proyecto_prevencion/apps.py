@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProyectoprevencionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'proyecto_prevencion'
+
+    def ready(self):
+        from proyecto_prevencion import signals
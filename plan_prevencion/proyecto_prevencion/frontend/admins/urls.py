@@ -37,4 +37,5 @@ urlpatterns = [
     path('indicadores/', views.indicadores_list, name='indicadores_list'),
     path('indicadores/aprobar/<int:pk>/', views.aprobar_indicador, name='aprobar_indicador'),
     path('indicadores/rechazar/<int:pk>/', views.rechazar_indicador, name='rechazar_indicador'),
+    path('indicadores/revisar/', views.revisar_indicadores_seleccionados, name='revisar_indicadores_seleccionados'),
 ]
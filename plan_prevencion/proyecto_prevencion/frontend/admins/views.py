@@ -1,11 +1,10 @@
 # views.py
-from django.core.mail import send_mail
 from django.utils import timezone
-from dateutil.relativedelta import relativedelta
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.views import LoginView
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.urls import reverse_lazy
 from django.utils import timezone
 
@@ -16,7 +15,12 @@ from rest_framework.response import Response
 
 from proyecto_prevencion.models import Usuario, OrganismoPublico, ComunaPlan, TiposMedidas, Medida, Indicador
 from .forms import OrganismoForm, ComunaForm, TiposMedidasForm, MedidaForm
+from proyecto_prevencion.apis.serializers import IndicadorPaginaSerializer, RevisionIndicadoresSerializer
+from proyecto_prevencion.utils.cursor import codificar_cursor
+from proyecto_prevencion.utils.catalogos import obtener_catalogo
+from proyecto_prevencion.utils.correos import encolar_aprobacion_usuario
 from proyecto_prevencion.utils.decorators import require_permission
+from proyecto_prevencion.utils.revision import revisar_indicadores
 
 # --- Vistas de autenticación ---
 
@@ -33,8 +37,9 @@ class AdminLoginView(LoginView):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 @renderer_classes([TemplateHTMLRenderer])
 def usuarios_list(request):
-    aprobados = Usuario.objects.filter(is_superuser=False, aprobado=True)
-    pendientes = Usuario.objects.filter(is_superuser=False, aprobado=False)
+    usuarios = Usuario.objects.filter(is_superuser=False).select_related('organismo')
+    aprobados = usuarios.filter(aprobado=True)
+    pendientes = usuarios.filter(aprobado=False)
     context = {
         'approved_users': aprobados,
         'pending_users': pendientes,
@@ -46,21 +51,11 @@ def usuarios_list(request):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 def aprobar_usuario(request, user_id):
     usuario = get_object_or_404(Usuario, pk=user_id)
-    usuario.aprobado = True
-    usuario.save()
-
-    # Enviar correo de notificación
-    try:
-        send_mail(
-            'Cuenta Aprobada',
-            'Su cuenta ha sido aprobada y ya puede ingresar a la plataforma.',
-            'grupo1@backend-python.com',
-            [usuario.username],
-            fail_silently=False,
-        )
-        print("Correo enviado")
-    except Exception as e:
-        print("Error al enviar el correo")
+    with transaction.atomic():
+        usuario.aprobado = True
+        usuario.save()
+        # El correo de notificación lo envía el comando 'enviar_correos'.
+        encolar_aprobacion_usuario(usuario.username)
 
     messages.success(request, "Usuario aprobado correctamente.")
     return redirect(reverse_lazy('admin_usuarios'))
@@ -82,7 +77,7 @@ def desactivar_usuario(request, user_id):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 @renderer_classes([TemplateHTMLRenderer])
 def organismo_list(request):
-    organismos = OrganismoPublico.objects.filter(activo=True)
+    organismos = obtener_catalogo('organismo', 'modelos', lambda: list(OrganismoPublico.objects.filter(activo=True)))
     return Response({'organismos': organismos}, template_name='admins/organismo_list.html')
 
 @api_view(['GET', 'POST'])
@@ -145,7 +140,7 @@ def organismo_delete(request, pk):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 @renderer_classes([TemplateHTMLRenderer])
 def comuna_list(request):
-    comunas = ComunaPlan.objects.filter(activo=True)
+    comunas = obtener_catalogo('comuna', 'modelos', lambda: list(ComunaPlan.objects.filter(activo=True)))
     return Response({'comunas': comunas}, template_name='admins/comuna_list.html')
 
 @api_view(['GET', 'POST'])
@@ -208,7 +203,7 @@ def comuna_delete(request, pk):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 @renderer_classes([TemplateHTMLRenderer])
 def tipomedida_list(request):
-    medidas = TiposMedidas.objects.filter(activo=True)
+    medidas = obtener_catalogo('tipomedida', 'modelos', lambda: list(TiposMedidas.objects.filter(activo=True)))
     return Response({'medidas': medidas}, template_name='admins/tipomedida_list.html')
 
 @api_view(['GET', 'POST'])
@@ -272,7 +267,7 @@ def tipomedida_delete(request, pk):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 @renderer_classes([TemplateHTMLRenderer])
 def medida_list(request):
-    medidas = Medida.objects.filter(activo=True)
+    medidas = obtener_catalogo('medida', 'modelos', lambda: list(Medida.objects.filter(activo=True).select_related('organismo')))
     return Response({'medidas': medidas}, template_name='admins/medida_list.html')
 
 @api_view(['GET', 'POST'])
@@ -335,29 +330,48 @@ def medida_delete(request, pk):
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 @renderer_classes([TemplateHTMLRenderer])
 def indicadores_list(request):
-    indicadores = Indicador.objects.select_related('medida', 'usuario')\
+    filtros = IndicadorPaginaSerializer(data=request.GET)
+    if not filtros.is_valid():
+        messages.error(request, "Los filtros ingresados no son válidos.")
+        filtros = IndicadorPaginaSerializer(data={})
+        filtros.is_valid()
+    params = dict(filtros.validated_data)
+    cursor = params.pop('cursor', None)
+    limite = params.pop('limite')
+
+    indicadores, siguiente = Indicador.objects.select_related('medida', 'usuario')\
         .prefetch_related('documentos_subidos')\
-        .order_by('-fecha_reporte')
-    
-    return Response({'indicadores': indicadores}, template_name='admins/indicadores_list.html')
+        .filtrar(**params)\
+        .pagina(cursor, limite)
+
+    siguiente_url = None
+    if siguiente:
+        query = request.GET.copy()
+        query['cursor'] = codificar_cursor(siguiente)
+        siguiente_url = f"?{query.urlencode()}"
+
+    # La paginación por clave solo avanza; desde otra página se puede volver a la primera con los mismos filtros.
+    primera_url = None
+    if cursor is not None:
+        query = request.GET.copy()
+        query.pop('cursor')
+        primera_url = f"?{query.urlencode()}"
+
+    context = {
+        'indicadores': indicadores,
+        'filtros': request.GET,
+        'siguiente_url': siguiente_url,
+        'primera_url': primera_url,
+    }
+    return Response(context, template_name='admins/indicadores_list.html')
 
 @api_view(['POST'])
 @authentication_classes([SessionAuthentication])
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 def aprobar_indicador(request, pk):
-    indicador = get_object_or_404(Indicador, pk=pk)
-    indicador.cumple_requisitos = True
-    indicador.fecha_aprobacion = timezone.now()
-    indicador.fecha_rechazo = None
-    indicador.motivo_rechazo = ""
-    indicador.save()
-
-    medida = indicador.medida
-    if medida.frecuencia == 'anual':
-        medida.proxima_fecha_carga = timezone.now().date() + relativedelta(years=+1)
-    elif medida.frecuencia == 'unica':
-        medida.proxima_fecha_carga = None
-    medida.save()
+    no_encontrados, _ = revisar_indicadores([pk], aprobar=True)
+    if no_encontrados:
+        raise Http404
 
     messages.success(request, "Indicador aprobado correctamente.")
     return redirect('indicadores_list')
@@ -366,17 +380,37 @@ def aprobar_indicador(request, pk):
 @authentication_classes([SessionAuthentication])
 @require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
 def rechazar_indicador(request, pk):
-    indicador = get_object_or_404(Indicador, pk=pk)
-    
     motivo = request.POST.get('motivo', '').strip()
     if not motivo:
         messages.error(request, "Debe indicar un motivo de rechazo.")
         return redirect('indicadores_list')
-    
-    indicador.cumple_requisitos = False
-    indicador.fecha_aprobacion = None
-    indicador.fecha_rechazo = timezone.now()
-    indicador.motivo_rechazo = motivo
-    indicador.save()
+
+    no_encontrados, _ = revisar_indicadores([pk], aprobar=False, motivo=motivo)
+    if no_encontrados:
+        raise Http404
     messages.warning(request, "Indicador rechazado correctamente.")
+    return redirect('indicadores_list')
+
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication])
+@require_permission(lambda user: user.is_superuser, redirect_url='home', error_message="No cuenta con permisos para acceder a esta sección.")
+def revisar_indicadores_seleccionados(request):
+    serializer = RevisionIndicadoresSerializer(data=request.POST)
+    if not serializer.is_valid():
+        if 'motivo' in serializer.errors:
+            messages.error(request, "Debe indicar un motivo de rechazo.")
+        else:
+            messages.error(request, "Debe seleccionar al menos un indicador.")
+        return redirect('indicadores_list')
+
+    ids = serializer.validated_data['ids']
+    aprobar = serializer.validated_data['accion'] == 'aprobar'
+    no_encontrados, reemplazados = revisar_indicadores(ids, aprobar, serializer.validated_data['motivo'])
+    actualizados = len(set(ids)) - len(no_encontrados)
+    if aprobar:
+        messages.success(request, f"{actualizados} indicador(es) aprobado(s) correctamente.")
+        if reemplazados:
+            messages.info(request, f"{len(reemplazados)} indicador(es) aprobado(s) quedaron reemplazados por otro del mismo período.")
+    else:
+        messages.warning(request, f"{actualizados} indicador(es) rechazado(s) correctamente.")
     return redirect('indicadores_list')
\ No newline at end of file
@@ -1,7 +1,4 @@
 # usuarios/views.py
-import os
-import uuid
-from django.core.files.storage import default_storage
 from django.contrib.auth.views import LoginView
 from django.shortcuts import render, redirect
 from django.shortcuts import redirect, get_object_or_404
@@ -16,9 +13,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import TemplateHTMLRenderer
 from rest_framework.response import Response
 
-from proyecto_prevencion.models import Medida, Indicador, DocumentoSubido
-from .forms import generar_subir_documentos_form
+from proyecto_prevencion.models import Medida, ResumenCumplimiento
 from proyecto_prevencion.utils.decorators import require_permission
+from proyecto_prevencion.utils.cargas import registrar_indicador
+from proyecto_prevencion.utils.formularios import formularios_documentos
 
 
 class UserLoginView(LoginView):
@@ -48,33 +46,8 @@ def register(request):
 @renderer_classes([TemplateHTMLRenderer])
 def dashboard(request):
     user = request.user
-    measures = Medida.objects.filter(organismo=user.organismo, activo=True)
-
-    approved = []
-    pending_review = []
-    rejected = []
-    pending_completion = []
-
-    for measure in measures:
-        indicator = Indicador.objects.filter(
-            medida=measure, usuario=user).order_by('-fecha_reporte').first()
-        if indicator:
-            if indicator.cumple_requisitos:
-                approved.append((measure, indicator))
-            else:
-                if indicator.fecha_rechazo:
-                    rejected.append((measure, indicator))
-                else:
-                    pending_review.append((measure, indicator))
-        else:
-            pending_completion.append(measure)
-
-    context = {
-        'approved': approved,
-        'pending_review': pending_review,
-        'rejected': rejected,
-        'pending_completion': pending_completion,
-    }
+    measures = Medida.objects.filter(organismo_id=user.organismo_id, activo=True)
+    context = ResumenCumplimiento.objects.estado_por_medida(measures, user)
     return Response(context, template_name='usuarios/dashboard.html')
 
 
@@ -92,31 +65,18 @@ def subir_documentos(request, medida_id):
             request, "No tienes permiso para subir documentos para esta medida.")
         return redirect(reverse_lazy('usuario_dashboard'))
 
-    documentos = medida.documentos_requeridos.all()
-    SubirDocumentosForm = generar_subir_documentos_form(documentos)
+    documentos, _, SubirDocumentosForm = formularios_documentos(medida)
 
     if request.method == 'POST':
         form = SubirDocumentosForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                indicador = Indicador.objects.create(
-                    medida=medida,
-                    usuario=user,
-                    calculo_indicador=0,
-                    cumple_requisitos=False
-                )
+                archivos = []
                 for doc in documentos:
-                    field_name = f'doc_{doc.id}'
-                    file = form.cleaned_data.get(field_name)
+                    file = form.cleaned_data.get(f'doc_{doc.id}')
                     if file:
-                        original_extension = os.path.splitext(file.name)[1]
-                        unique_filename = f"{uuid.uuid4().hex}_doc_{doc.id}{original_extension}"
-                        filename = default_storage.save(unique_filename, file)
-                        DocumentoSubido.objects.create(
-                            indicador=indicador,
-                            documento_requerido=doc,
-                            archivo=filename,
-                        )
+                        archivos.append((doc, file))
+                registrar_indicador(medida, user, archivos)
                 messages.success(
                     request, "Documentos subidos correctamente. Espera validación del admin.")
                 return redirect('usuario_dashboard')
@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from proyecto_prevencion.models import CorreoPendiente
+
+
+class Command(BaseCommand):
+    help = "Envía los correos pendientes de la bandeja de salida, en lotes y con una sola conexión por lote."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-intentos', type=int, default=5,
+                            help="Intentos antes de marcar un correo como fallido.")
+        parser.add_argument('--continuo', action='store_true',
+                            help="No terminar al vaciar la bandeja; volver a revisarla cada --intervalo segundos.")
+        parser.add_argument('--intervalo', type=int, default=10)
+        parser.add_argument('--reserva', type=int, default=300,
+                            help="Segundos que un lote queda reservado para este worker; si no termina, otro lo retoma.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            enviados = self.enviar_lote(options['batch_size'], options['max_intentos'], options['reserva'])
+            total += enviados
+            if enviados:
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+        self.stdout.write(self.style.SUCCESS(f"Correos enviados: {total}."))
+
+    def enviar_lote(self, batch_size, max_intentos, reserva):
+        """
+        Envía un lote de correos pendientes. El lote se reserva en una transacción corta y los envíos
+        ocurren fuera de ella, de modo que una conexión SMTP lenta no mantiene filas bloqueadas.
+        Retorna la cantidad de correos procesados (enviados o reprogramados).
+        """
+        correos = self.reservar_lote(batch_size, reserva)
+        if not correos:
+            return 0
+
+        conexion = get_connection()
+        try:
+            conexion.open()
+        except Exception as e:
+            for correo in correos:
+                self.registrar_error(correo, e, max_intentos)
+            self.registrar_resultados(correos)
+            return len(correos)
+
+        try:
+            for correo in correos:
+                mensaje = EmailMessage(correo.asunto, correo.mensaje, correo.remitente, correo.destinatarios, connection=conexion)
+                try:
+                    mensaje.send()
+                    correo.estado = 'enviado'
+                    correo.fecha_envio = timezone.now()
+                    correo.ultimo_error = ''
+                except Exception as e:
+                    self.registrar_error(correo, e, max_intentos)
+        finally:
+            conexion.close()
+
+        self.registrar_resultados(correos)
+        return len(correos)
+
+    def reservar_lote(self, batch_size, reserva):
+        """
+        Marca un lote como 'enviando' y usa 'proximo_intento' como vencimiento de la reserva. Varios workers
+        pueden reservar en paralelo sin tomar los mismos correos; si uno se cae, sus correos se retoman al vencer.
+        """
+        ahora = timezone.now()
+        with transaction.atomic():
+            correos = list(
+                CorreoPendiente.objects.select_for_update(skip_locked=True)
+                .filter(estado__in=['pendiente', 'enviando'], proximo_intento__lte=ahora)
+                .order_by('proximo_intento', 'id')[:batch_size]
+            )
+            for correo in correos:
+                correo.estado = 'enviando'
+                correo.proximo_intento = ahora + timedelta(seconds=reserva)
+            CorreoPendiente.objects.bulk_update(correos, ['estado', 'proximo_intento'])
+        return correos
+
+    def registrar_resultados(self, correos):
+        CorreoPendiente.objects.bulk_update(
+            correos, ['estado', 'intentos', 'ultimo_error', 'proximo_intento', 'fecha_envio']
+        )
+
+    def registrar_error(self, correo, error, max_intentos):
+        correo.intentos += 1
+        correo.ultimo_error = str(error)
+        if correo.intentos >= max_intentos:
+            correo.estado = 'fallido'
+        else:
+            correo.estado = 'pendiente'
+            # Espera exponencial: 1, 2, 4, 8... minutos.
+            correo.proximo_intento = timezone.now() + timedelta(minutes=2 ** (correo.intentos - 1))
+        self.stderr.write(f"Error al enviar el correo {correo.id}: {error}")
@@ -0,0 +1,231 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from proyecto_prevencion.models import (
+    OrganismoPublico, TiposMedidas, Medida, DocumentoRequerido, Usuario, Indicador, DocumentoSubido, ArchivoAlmacenado
+)
+from proyecto_prevencion.utils.catalogos import invalidar_catalogo
+
+DOCUMENTOS = ["Informe técnico", "Acta de aprobación", "Registro fotográfico", "Certificado", "Planilla de cálculo", "Oficio"]
+
+
+@contextmanager
+def fechas_explicitas(modelo, *campos):
+    """
+    Desactiva auto_now/auto_now_add en los campos indicados, para que bulk_create guarde las fechas asignadas.
+    """
+    originales = {}
+    for nombre in campos:
+        campo = modelo._meta.get_field(nombre)
+        originales[campo] = (campo.auto_now, campo.auto_now_add)
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, (auto_now, auto_now_add) in originales.items():
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos para pruebas de carga: organismos, medidas, documentos requeridos, usuarios "
+        "y un historial de varios años de indicadores con sus documentos subidos. Con la misma semilla "
+        "genera siempre los mismos datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organismos', type=int, default=20)
+        parser.add_argument('--medidas', type=int, default=30, help="Medidas por organismo.")
+        parser.add_argument('--documentos', type=int, default=3, help="Documentos requeridos por medida.")
+        parser.add_argument('--usuarios', type=int, default=5, help="Usuarios aprobados por organismo.")
+        parser.add_argument('--anios', type=int, default=5, help="Años de historial de indicadores.")
+        parser.add_argument('--reportes-por-anio', type=int, default=1, help="Indicadores por usuario, medida anual y año.")
+        parser.add_argument('--archivos', type=int, default=20, help="Archivos distintos que comparten los documentos subidos.")
+        parser.add_argument('--sin-archivos', action='store_true', help="No genera documentos subidos.")
+        parser.add_argument('--clave', default='clave-sintetica', help="Contraseña de los usuarios generados.")
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['semilla'])
+        self.batch_size = options['batch_size']
+        self.ahora = timezone.now()
+        inicio = time.perf_counter()
+
+        with transaction.atomic():
+            organismos, medidas, documentos, usuarios = self.generar_catalogos(options)
+        self.stdout.write(
+            f"{len(organismos)} organismos, {len(medidas)} medidas, {len(documentos)} documentos requeridos, "
+            f"{len(usuarios)} usuarios."
+        )
+
+        archivos = [] if options['sin_archivos'] else self.generar_archivos(options['archivos'])
+
+        total_indicadores = total_documentos = 0
+        indicadores = self.generar_indicadores(medidas, usuarios, options['anios'], options['reportes_por_anio'])
+        with fechas_explicitas(Indicador, 'fecha_reporte', 'fecha_modificacion'):
+            for lote in lotes(indicadores, self.batch_size):
+                with transaction.atomic():
+                    Indicador.objects.bulk_create(lote)
+                    if archivos:
+                        total_documentos += self.generar_documentos_subidos(lote[0].pk, lote[-1].pk, archivos)
+                total_indicadores += len(lote)
+                self.stdout.write(f"  {total_indicadores} indicadores...")
+
+        # bulk_create no pasa por el storage: se fija la cantidad real de referencias a cada archivo.
+        for ruta in archivos:
+            ArchivoAlmacenado.objects.filter(ruta=ruta).update(referencias=DocumentoSubido.objects.filter(archivo=ruta).count())
+
+        call_command('reconstruir_resumen', batch_size=self.batch_size, stdout=self.stdout)
+        for catalogo in ('organismo', 'tipomedida', 'medida'):
+            invalidar_catalogo(catalogo)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generados {total_indicadores} indicadores y {total_documentos} documentos subidos "
+            f"en {time.perf_counter() - inicio:.1f} s."
+        ))
+
+    def generar_catalogos(self, options):
+        tipos = list(TiposMedidas.objects.filter(activo=True))
+        if not tipos:
+            tipos = TiposMedidas.objects.bulk_create(TiposMedidas(nombre_tipo_medida=f"Tipo sintético {i}") for i in range(5))
+
+        organismos = OrganismoPublico.objects.bulk_create(
+            [OrganismoPublico(nombre_organismo=f"Organismo sintético {i + 1}") for i in range(options['organismos'])],
+            batch_size=self.batch_size
+        )
+        medidas = Medida.objects.bulk_create(
+            [
+                Medida(
+                    nombre_corto=f"Medida {i + 1}",
+                    nombre_largo=f"Medida sintética {i + 1} de {organismo.nombre_organismo}",
+                    organismo=organismo,
+                    tipo_medida=self.rng.choice(tipos),
+                    regulatorio=self.rng.random() < 0.7,
+                    descripcion_formula="Fórmula sintética",
+                    tipo_formula=self.rng.choice(['Formula', 'Dicotomica', 'Numero']),
+                    frecuencia='anual' if self.rng.random() < 0.8 else 'unica',
+                    proxima_fecha_carga=(self.ahora + timedelta(days=self.rng.randint(1, 365))).date(),
+                )
+                for organismo in organismos for i in range(options['medidas'])
+            ],
+            batch_size=self.batch_size
+        )
+        documentos = DocumentoRequerido.objects.bulk_create(
+            [
+                DocumentoRequerido(medida=medida, descripcion=descripcion)
+                for medida in medidas
+                for descripcion in self.rng.sample(DOCUMENTOS, min(options['documentos'], len(DOCUMENTOS)))
+            ],
+            batch_size=self.batch_size
+        )
+        # Los nombres de usuario incluyen el id del organismo, por lo que no chocan con datos generados antes.
+        # Se calcula un solo hash para todos: hacerlo por usuario tomaría más que generar los datos.
+        clave = make_password(options['clave'])
+        usuarios = Usuario.objects.bulk_create(
+            [
+                Usuario(
+                    username=f"usuario{i + 1}@organismo{organismo.id}.cl",
+                    email=f"usuario{i + 1}@organismo{organismo.id}.cl",
+                    password=clave,
+                    organismo=organismo,
+                    aprobado=True,
+                )
+                for organismo in organismos for i in range(options['usuarios'])
+            ],
+            batch_size=self.batch_size
+        )
+        return organismos, medidas, documentos, usuarios
+
+    def generar_archivos(self, cantidad):
+        """
+        Guarda 'cantidad' archivos pequeños con contenido pseudoaleatorio; los documentos subidos los comparten.
+        """
+        rutas = []
+        for i in range(cantidad):
+            contenido = b"%PDF-1.4\n" + self.rng.randbytes(self.rng.randint(512, 4096))
+            rutas.append(default_storage.save(f"sintetico_{i}.pdf", ContentFile(contenido)))
+        return rutas
+
+    def generar_documentos_subidos(self, desde_id, hasta_id, archivos):
+        """
+        Crea, con un solo INSERT ... SELECT, un documento subido por cada documento requerido de los indicadores
+        con id entre 'desde_id' y 'hasta_id'. Son tres veces más filas que los indicadores; construirlas como
+        instancias del modelo tomaría la mayor parte del tiempo de generación.
+        Retorna la cantidad de filas creadas.
+        """
+        qn = connection.ops.quote_name
+        indicador, documento, subido = Indicador._meta, DocumentoRequerido._meta, DocumentoSubido._meta
+        columna = lambda modelo, campo: qn(modelo.get_field(campo).column)
+        # El archivo se elige de forma determinista entre los del pool, según los ids.
+        casos = " ".join(f"WHEN {i} THEN %s" for i in range(len(archivos)))
+        sql = (
+            f"INSERT INTO {qn(subido.db_table)} "
+            f"({columna(subido, 'indicador')}, {columna(subido, 'documento_requerido')}, {columna(subido, 'archivo')}) "
+            f"SELECT i.{columna(indicador, 'id')}, d.{columna(documento, 'id')}, "
+            f"CASE (i.{columna(indicador, 'id')} + d.{columna(documento, 'id')}) %% {len(archivos)} {casos} END "
+            f"FROM {qn(indicador.db_table)} i "
+            f"JOIN {qn(documento.db_table)} d ON d.{columna(documento, 'medida')} = i.{columna(indicador, 'medida')} "
+            f"WHERE i.{columna(indicador, 'id')} BETWEEN %s AND %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*archivos, desde_id, hasta_id])
+            return cursor.rowcount
+
+    def generar_indicadores(self, medidas, usuarios, anios, reportes_por_anio):
+        """
+        Genera, sin guardarlos, los indicadores de cada usuario para las medidas de su organismo: uno o más por año
+        en las medidas anuales y solo en el primer año en las únicas. El último de cada par puede quedar
+        pendiente o rechazado; los anteriores quedan casi todos aprobados, salvo los que tienen otro reporte
+        posterior en el mismo período, que quedan rechazados.
+        """
+        medidas_por_organismo = {}
+        for medida in medidas:
+            medidas_por_organismo.setdefault(medida.organismo_id, []).append(medida)
+
+        for usuario in usuarios:
+            for medida in medidas_por_organismo[usuario.organismo_id]:
+                anios_atras = range(anios - 1, -1, -1) if medida.frecuencia == 'anual' else [anios - 1]
+                fechas = sorted(
+                    self.ahora - timedelta(days=365 * anio + self.rng.randint(0, 364), seconds=self.rng.randint(0, 86399))
+                    for anio in anios_atras for _ in range(reportes_por_anio)
+                )
+                periodos = [timezone.localtime(fecha).year for fecha in fechas]
+                for n, (fecha, periodo) in enumerate(zip(fechas, periodos), start=1):
+                    if n == len(fechas):
+                        pesos = [55, 15, 30]
+                    elif periodos[n] == periodo:
+                        # Solo el último reporte de cada período puede quedar aprobado.
+                        pesos = [0, 100, 0]
+                    else:
+                        pesos = [85, 15, 0]
+                    estado = self.rng.choices(['aprobado', 'rechazado', 'pendiente'], weights=pesos)[0]
+                    revision = min(fecha + timedelta(days=self.rng.randint(1, 30)), self.ahora)
+                    yield Indicador(
+                        medida=medida,
+                        usuario=usuario,
+                        calculo_indicador=round(self.rng.uniform(0, 100), 2),
+                        cumple_requisitos=estado == 'aprobado',
+                        estado=estado,
+                        periodo=periodo,
+                        fecha_reporte=fecha,
+                        fecha_aprobacion=revision if estado == 'aprobado' else None,
+                        fecha_rechazo=revision if estado == 'rechazado' else None,
+                        motivo_rechazo="Documentación incompleta" if estado == 'rechazado' else None,
+                        fecha_modificacion=revision if estado != 'pendiente' else fecha,
+                    )
@@ -0,0 +1,53 @@
+import gzip
+import hashlib
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from proyecto_prevencion.utils.esquema import FORMATOS_ESQUEMA, MANIFIESTO_ESQUEMA, directorio_esquema
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera el esquema OpenAPI en STATIC_ROOT/esquema con un nombre que incluye su hash, "
+        "para servirlo como archivo estático cacheable. Ejecutar después de collectstatic."
+    )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'STATIC_ROOT', None):
+            raise CommandError("STATIC_ROOT no está configurado; el esquema solo se pregenera en producción.")
+
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        schema = generator.get_schema(request=None, public=True)
+        contenidos = {
+            'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+            'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        }
+
+        # WhiteNoiseMiddleware (proyecto_prevencion.middleware) sirve estos nombres como inmutables (cache de un año).
+        hash_esquema = hashlib.sha256(contenidos['json']).hexdigest()[:12]
+        archivos = {formato: f"openapi.{hash_esquema}.{formato}" for formato in FORMATOS_ESQUEMA}
+        directorio = directorio_esquema()
+        directorio.mkdir(parents=True, exist_ok=True)
+        manifiesto = directorio / MANIFIESTO_ESQUEMA
+        try:
+            anteriores = set(json.loads(manifiesto.read_text()).values())
+        except (OSError, ValueError, AttributeError):
+            anteriores = set()
+        for formato, archivo in archivos.items():
+            (directorio / archivo).write_bytes(contenidos[formato])
+            (directorio / f"{archivo}.gz").write_bytes(gzip.compress(contenidos[formato]))
+        temporal = directorio / f"{MANIFIESTO_ESQUEMA}.tmp"
+        temporal.write_text(json.dumps(archivos))
+        temporal.replace(manifiesto)
+
+        # Los workers en ejecución guardan los nombres anteriores hasta reiniciarse, por lo que esos archivos se
+        # conservan; solo se eliminan los más antiguos, y siempre después de publicar el nuevo manifiesto.
+        vigentes = set(archivos.values()) | anteriores
+        vigentes |= {f"{archivo}.gz" for archivo in vigentes}
+        for viejo in directorio.glob('openapi.*'):
+            if viejo.name not in vigentes:
+                viejo.unlink()
+
+        self.stdout.write(self.style.SUCCESS(f"Esquema generado: {directorio / archivos['json']}"))
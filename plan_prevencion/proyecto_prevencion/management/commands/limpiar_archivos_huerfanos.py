@@ -0,0 +1,85 @@
+import posixpath
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from proyecto_prevencion.models import ArchivoAlmacenado, CargaDocumento, DocumentoSubido
+
+
+def listar_archivos(storage, directorio=''):
+    """
+    Recorre el storage directorio por directorio, entregando los nombres de archivo a medida que se listan.
+    """
+    directorios, archivos = storage.listdir(directorio)
+    for archivo in archivos:
+        yield posixpath.join(directorio, archivo) if directorio else archivo
+    for subdirectorio in directorios:
+        yield from listar_archivos(storage, posixpath.join(directorio, subdirectorio) if directorio else subdirectorio)
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina del storage los archivos que ningún DocumentoSubido referencia "
+        "y las cargas reanudables abandonadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--minutos', type=int, default=60,
+            help="Antigüedad mínima de un archivo para considerarlo huérfano (protege cargas en curso)."
+        )
+        parser.add_argument('--dias-cargas', type=int, default=7, help="Antigüedad para descartar cargas reanudables sin finalizar.")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informa, no elimina.")
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.limite = timezone.now() - timedelta(minutes=options['minutos'])
+        batch_size = options['batch_size']
+
+        eliminados = 0
+        lote = []
+        for nombre in listar_archivos(default_storage):
+            lote.append(nombre)
+            if len(lote) >= batch_size:
+                eliminados += self.procesar_lote(lote)
+                lote = []
+        if lote:
+            eliminados += self.procesar_lote(lote)
+
+        cargas = 0
+        abandonadas = CargaDocumento.objects.filter(
+            fecha_actualizacion__lt=timezone.now() - timedelta(days=options['dias_cargas'])
+        )
+        for carga in abandonadas.iterator():
+            if not self.dry_run:
+                carga.descartar()
+            cargas += 1
+
+        accion = "Se eliminarían" if self.dry_run else "Se eliminaron"
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {eliminados} archivos huérfanos y {cargas} cargas abandonadas."
+        ))
+
+    def procesar_lote(self, nombres):
+        # Un archivo con referencias registradas en ArchivoAlmacenado no es huérfano aunque aún
+        # no exista el DocumentoSubido que lo usa (p. ej. un save() cuya transacción sigue abierta).
+        referenciados = set(
+            DocumentoSubido.objects.filter(archivo__in=nombres).values_list('archivo', flat=True)
+        )
+        referenciados.update(ArchivoAlmacenado.objects.filter(ruta__in=nombres).values_list('ruta', flat=True))
+        eliminados = 0
+        for nombre in nombres:
+            if nombre in referenciados:
+                continue
+            if default_storage.get_modified_time(nombre) >= self.limite:
+                continue
+            if self.dry_run:
+                self.stdout.write(nombre)
+            elif hasattr(default_storage, 'purgar'):
+                if not default_storage.purgar(nombre):
+                    continue
+            else:
+                default_storage.delete(nombre)
+            eliminados += 1
+        return eliminados
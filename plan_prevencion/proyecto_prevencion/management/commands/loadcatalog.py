@@ -0,0 +1,186 @@
+import csv
+import json
+import tempfile
+from itertools import islice
+from pathlib import Path
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from proyecto_prevencion.models import OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido, ResumenCumplimiento
+from proyecto_prevencion.signals import CATALOGOS_POR_MODELO
+from proyecto_prevencion.utils.catalogos import invalidar_catalogo
+from proyecto_prevencion.utils.formularios import invalidar_documentos
+
+# Catálogos en orden de carga (cada uno solo referencia a los anteriores). El nombre es el del archivo
+# sin extensión; las columnas son nombres de campo del modelo y 'id' es obligatoria.
+CATALOGOS = {
+    'organismos': OrganismoPublico,
+    'comunas': ComunaPlan,
+    'tiposmedidas': TiposMedidas,
+    'medidas': Medida,
+    'documentos': DocumentoRequerido,
+}
+FORMATOS = ('.csv', '.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga catálogos (organismos, comunas, tipos de medida, medidas y documentos requeridos) desde archivos CSV o JSON. "
+        "Los registros existentes se actualizan por id, por lo que se puede ejecutar varias veces. "
+        "En PostgreSQL usa COPY; en otras bases de datos, bulk_create por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('rutas', nargs='+', help="Archivos o directorios con <catalogo>.csv o <catalogo>.json.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        archivos = self.archivos_por_catalogo(options['rutas'])
+
+        with transaction.atomic():
+            cargados = {}
+            for nombre, modelo in CATALOGOS.items():
+                if nombre not in archivos:
+                    continue
+                campos, filas = self.leer(archivos[nombre], modelo)
+                cargados[nombre] = ids = []
+                filas = self.registrar_ids(filas, campos, ids)
+                if connection.vendor == 'postgresql':
+                    self.cargar_copy(modelo, campos, filas)
+                else:
+                    self.cargar_bulk(modelo, campos, filas)
+                self.stdout.write(f"{nombre}: {len(ids)} registros desde {archivos[nombre].name}")
+
+            # Las secuencias quedan detrás de los ids cargados explícitamente; se ajustan al máximo de cada tabla.
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [CATALOGOS[nombre] for nombre in cargados]):
+                    cursor.execute(sql)
+
+            self.invalidar(cargados)
+        self.stdout.write(self.style.SUCCESS("Catálogos cargados."))
+
+    def archivos_por_catalogo(self, rutas):
+        archivos = {}
+        for ruta in map(Path, rutas):
+            candidatos = sorted(ruta.iterdir()) if ruta.is_dir() else [ruta]
+            for archivo in candidatos:
+                if archivo.suffix not in FORMATOS or archivo.stem not in CATALOGOS:
+                    if not ruta.is_dir():
+                        raise CommandError(
+                            f"{archivo}: el nombre debe ser uno de {', '.join(CATALOGOS)} con extensión {' o '.join(FORMATOS)}."
+                        )
+                    continue
+                if archivo.stem in archivos:
+                    raise CommandError(f"El catálogo '{archivo.stem}' aparece en {archivos[archivo.stem]} y en {archivo}.")
+                archivos[archivo.stem] = archivo
+        if not archivos:
+            raise CommandError("No se encontraron archivos de catálogo.")
+        return archivos
+
+    def leer(self, archivo, modelo):
+        """
+        Retorna (campos, filas): los campos del modelo en el orden de las columnas del archivo y un iterador
+        de tuplas con los valores ya convertidos y validados con 'to_python' de cada campo.
+        """
+        if archivo.suffix == '.json':
+            with open(archivo, encoding='utf-8') as f:
+                registros = json.load(f)
+            columnas = list(registros[0]) if registros else ['id']
+            valores = ([registro.get(columna) for columna in columnas] for registro in registros)
+        else:
+            f = open(archivo, encoding='utf-8', newline='')
+            lector = csv.reader(f)
+            columnas = next(lector, ['id'])
+            valores = self.cerrar_al_terminar(f, lector)
+
+        try:
+            campos = [modelo._meta.get_field(columna) for columna in columnas]
+        except Exception as e:
+            raise CommandError(f"{archivo.name}: {e}")
+        if 'id' not in columnas or len(columnas) < 2:
+            raise CommandError(f"{archivo.name}: se requiere la columna 'id' y al menos otra columna.")
+
+        def convertir():
+            for numero, fila in enumerate(valores, start=2):
+                try:
+                    yield tuple(
+                        None if valor in ('', None) and campo.null else campo.to_python(valor)
+                        for campo, valor in zip(campos, fila, strict=True)
+                    )
+                except (ValidationError, ValueError) as e:
+                    raise CommandError(f"{archivo.name}, registro {numero}: {e}")
+        return campos, convertir()
+
+    def cerrar_al_terminar(self, archivo, filas):
+        with archivo:
+            yield from filas
+
+    def registrar_ids(self, filas, campos, ids):
+        indice = [campo.name for campo in campos].index('id')
+        for fila in filas:
+            ids.append(fila[indice])
+            yield fila
+
+    def cargar_bulk(self, modelo, campos, filas):
+        actualizar = [campo.name for campo in campos if not campo.primary_key]
+        while lote := list(islice(filas, self.batch_size)):
+            modelo.objects.bulk_create(
+                [modelo(**{campo.attname: valor for campo, valor in zip(campos, fila)}) for fila in lote],
+                update_conflicts=True, unique_fields=['id'], update_fields=actualizar,
+            )
+
+    def cargar_copy(self, modelo, campos, filas):
+        """
+        Carga con COPY a una tabla temporal y desde ahí hace el upsert con INSERT ... ON CONFLICT,
+        ya que COPY por sí solo no puede actualizar filas existentes.
+        Como con bulk_create, los campos ausentes del archivo toman su default solo en los registros nuevos.
+        """
+        extras = [campo for campo in modelo._meta.concrete_fields if campo not in campos and campo.has_default()]
+        filas = (fila + tuple(campo.get_default() for campo in extras) for fila in filas)
+
+        qn = connection.ops.quote_name
+        tabla = qn(modelo._meta.db_table)
+        temporal = qn(f"carga_{modelo._meta.db_table}")
+        columnas = ", ".join(qn(campo.column) for campo in campos + extras)
+        actualizar = ", ".join(f"{qn(campo.column)} = EXCLUDED.{qn(campo.column)}" for campo in campos if not campo.primary_key)
+        copy_sql = f"COPY {temporal} ({columnas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+        with connection.cursor() as cursor:
+            # Solo las columnas que se cargan, con sus tipos y sin restricciones.
+            cursor.execute(f"CREATE TEMPORARY TABLE {temporal} ON COMMIT DROP AS SELECT {columnas} FROM {tabla} WITH NO DATA")
+            if hasattr(cursor.cursor, 'copy_expert'):
+                # psycopg2: COPY lee de un archivo; se escribe en uno temporal que pasa a disco si es grande.
+                with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024, mode='w+', newline='') as buffer:
+                    escritor = csv.writer(buffer)
+                    for fila in filas:
+                        escritor.writerow(self.valores_copy(fila))
+                    buffer.seek(0)
+                    cursor.cursor.copy_expert(copy_sql, buffer)
+            else:
+                # psycopg 3: las filas se envían a medida que se leen del archivo.
+                with cursor.cursor.copy(copy_sql) as copy:
+                    for fila in filas:
+                        copy.write_row(fila)
+            cursor.execute(f"INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {temporal} ON CONFLICT (id) DO UPDATE SET {actualizar}")
+
+    def valores_copy(self, fila):
+        # NULL se escribe como \N para distinguirlo de un texto vacío.
+        return ['\\N' if valor is None else valor for valor in fila]
+
+    def invalidar(self, cargados):
+        """
+        bulk_create y COPY no ejecutan señales: se invalidan aquí las caches de catálogos y los formularios
+        de subida de las medidas cuyos documentos requeridos se cargaron, y se corrige el organismo de los
+        resúmenes de cumplimiento de las medidas cargadas.
+        """
+        catalogos = {catalogo for nombre in cargados for catalogo in CATALOGOS_POR_MODELO[CATALOGOS[nombre]]}
+        for catalogo in sorted(catalogos):
+            invalidar_catalogo(catalogo)
+        if cargados.get('medidas'):
+            ResumenCumplimiento.objects.reasignar_organismo(cargados['medidas'])
+        if cargados.get('documentos'):
+            medidas = DocumentoRequerido.objects.filter(pk__in=cargados['documentos']).values_list('medida_id', flat=True)
+            for medida_id in set(medidas):
+                invalidar_documentos(medida_id)
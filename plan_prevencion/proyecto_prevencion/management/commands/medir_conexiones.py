@@ -0,0 +1,73 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from proyecto_prevencion.apis.serializers import TokenUsuarioSerializer
+from proyecto_prevencion.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia (p50/p99) de api_usuario_dashboard sin conexiones persistentes y con el perfil "
+        "de base de datos configurado (CONN_MAX_AGE o pool). Ejecutar contra una base de datos local con datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', help="Username del usuario con el que se consulta el dashboard.")
+        parser.add_argument('--peticiones', type=int, default=500)
+        parser.add_argument('--calentamiento', type=int, default=20)
+
+    def handle(self, *args, **options):
+        usuarios = Usuario.objects.filter(is_superuser=False, aprobado=True, organismo__isnull=False)
+        if options['usuario']:
+            usuarios = usuarios.filter(username=options['usuario'])
+        usuario = usuarios.first()
+        if usuario is None:
+            raise CommandError("No hay un usuario aprobado con organismo para consultar el dashboard.")
+
+        # Un token como el de /api/token/, con los claims que lee JWTAuthenticationClaims.
+        token = str(TokenUsuarioSerializer.get_token(usuario).access_token)
+        client = Client(HTTP_HOST='127.0.0.1', HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('api_usuario_dashboard')
+
+        conexion = connections['default']
+        configurado = dict(conexion.settings_dict)
+        perfiles = [
+            ('sin persistencia', {'CONN_MAX_AGE': 0, 'OPTIONS': {k: v for k, v in configurado['OPTIONS'].items() if k != 'pool'}}),
+            (self.describir(configurado), {'CONN_MAX_AGE': configurado['CONN_MAX_AGE'], 'OPTIONS': configurado['OPTIONS']}),
+        ]
+
+        try:
+            for nombre, ajustes in perfiles:
+                conexion.close()
+                conexion.settings_dict.update(ajustes)
+                tiempos = self.medir(client, url, options['peticiones'], options['calentamiento'])
+                percentiles = statistics.quantiles(tiempos, n=100)
+                self.stdout.write(
+                    f"{nombre:<30} p50 {percentiles[49]:8.2f} ms   p99 {percentiles[98]:8.2f} ms   ({len(tiempos)} peticiones)"
+                )
+        finally:
+            conexion.close()
+            conexion.settings_dict.update(configurado)
+
+    def medir(self, client, url, peticiones, calentamiento):
+        # El Client emite request_started/request_finished, por lo que Django cierra o reutiliza
+        # la conexión entre peticiones igual que al servir tráfico real.
+        for _ in range(calentamiento):
+            client.get(url)
+        tiempos = []
+        for _ in range(peticiones):
+            inicio = time.perf_counter()
+            response = client.get(url)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"El dashboard respondió {response.status_code}.")
+        return tiempos
+
+    def describir(self, ajustes):
+        pool = ajustes['OPTIONS'].get('pool')
+        if pool:
+            return "pool psycopg"
+        return f"CONN_MAX_AGE={ajustes['CONN_MAX_AGE']}"
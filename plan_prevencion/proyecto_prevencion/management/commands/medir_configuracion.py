@@ -0,0 +1,77 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el tiempo de arranque y el costo por petición de dos módulos de settings "
+        "(por defecto producción y desarrollo). Cada configuración se mide en un proceso aparte."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modulos', nargs='+', default=['plan_prevencion.settings', 'plan_prevencion.settings_dev'])
+        parser.add_argument('--arranques', type=int, default=5, help="Procesos lanzados por configuración para medir el arranque.")
+        parser.add_argument('--peticiones', type=int, default=300)
+        parser.add_argument('--interno', action='store_true', help="Uso interno: mide la configuración actual e imprime JSON.")
+
+    def handle(self, *args, **options):
+        if options['interno']:
+            self.stdout.write(json.dumps(self.medir_proceso(options['peticiones'])))
+            return
+
+        for modulo in options['modulos']:
+            arranques = []
+            resultado = None
+            for _ in range(options['arranques']):
+                inicio = time.perf_counter()
+                proceso = subprocess.run(
+                    [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'medir_configuracion', '--interno',
+                     '--peticiones', str(options['peticiones']), '--settings', modulo],
+                    capture_output=True, text=True,
+                )
+                if proceso.returncode != 0:
+                    raise CommandError(f"Falló la medición con {modulo}:\n{proceso.stderr}")
+                resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+                # Arranque: interpretación, django.setup() y carga del stack de middleware, sin las peticiones.
+                arranques.append((time.perf_counter() - inicio) * 1000 - resultado['peticiones_ms'])
+
+            self.stdout.write(
+                f"{modulo:<32} arranque {statistics.median(arranques):8.1f} ms   "
+                f"middleware {resultado['middleware']:>2}   carga stack {resultado['carga_stack_ms']:6.2f} ms   "
+                f"petición p50 {resultado['p50_ms']:6.2f} ms   p99 {resultado['p99_ms']:6.2f} ms"
+            )
+
+    def medir_proceso(self, peticiones):
+        inicio = time.perf_counter()
+        WSGIHandler()
+        carga_stack_ms = (time.perf_counter() - inicio) * 1000
+
+        # Página de inicio: no consulta la base de datos, por lo que el tiempo es casi todo middleware y plantilla.
+        client = Client(HTTP_HOST='127.0.0.1')
+        url = reverse('home')
+        client.get(url)
+        tiempos = []
+        inicio_peticiones = time.perf_counter()
+        for _ in range(peticiones):
+            inicio = time.perf_counter()
+            client.get(url)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        peticiones_ms = (time.perf_counter() - inicio_peticiones) * 1000
+
+        percentiles = statistics.quantiles(tiempos, n=100)
+        return {
+            'middleware': len(settings.MIDDLEWARE),
+            'carga_stack_ms': carga_stack_ms,
+            'p50_ms': percentiles[49],
+            'p99_ms': percentiles[98],
+            'peticiones_ms': peticiones_ms,
+        }
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from proyecto_prevencion.models import Indicador, ResumenCumplimiento
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla de resumen de cumplimiento a partir de los indicadores más recientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organismo', type=int, help="Reconstruir solo el resumen de este organismo.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        resumenes = ResumenCumplimiento.objects.all()
+        indicadores = Indicador.objects.ultimos().select_related('medida').order_by('id')
+        if options['organismo']:
+            resumenes = resumenes.filter(organismo_id=options['organismo'])
+            indicadores = indicadores.filter(medida__organismo_id=options['organismo'])
+
+        total = 0
+        with transaction.atomic():
+            resumenes.delete()
+            lote = []
+            for indicador in indicadores.iterator(chunk_size=batch_size):
+                lote.append(ResumenCumplimiento(
+                    organismo_id=indicador.medida.organismo_id,
+                    medida_id=indicador.medida_id,
+                    usuario_id=indicador.usuario_id,
+                    indicador=indicador,
+                    estado=indicador.estado,
+                ))
+                if len(lote) >= batch_size:
+                    ResumenCumplimiento.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            if lote:
+                ResumenCumplimiento.objects.bulk_create(lote)
+                total += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(f"Resumen reconstruido: {total} registros."))
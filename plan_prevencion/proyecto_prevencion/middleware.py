@@ -0,0 +1,158 @@
+import re
+from contextlib import ExitStack
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from social_django.middleware import SocialAuthExceptionMiddleware as BaseSocialAuthExceptionMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+from proyecto_prevencion.utils.metricas import metricas_vistas
+
+# Esquema OpenAPI generado por 'generar_esquema'; el nombre incluye el hash de su contenido.
+ESQUEMA_INMUTABLE_RE = re.compile(r'^esquema/openapi\.[0-9a-f]{12}\.(json|yaml)$')
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise compatible con ASGI. El original solo es síncrono, lo que obliga a Django a ejecutar
+    en un hilo toda petición que pase por él, incluidas las de las vistas asíncronas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    def immutable_file_test(self, path, url):
+        nombre = url[len(self.static_prefix):] if url.startswith(self.static_prefix) else None
+        if nombre and ESQUEMA_INMUTABLE_RE.match(nombre):
+            return True
+        return super().immutable_file_test(path, url)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class SocialAuthExceptionMiddleware(BaseSocialAuthExceptionMiddleware):
+    """
+    SocialAuthExceptionMiddleware compatible con ASGI; solo actúa en process_exception,
+    que Django adapta por sí mismo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+
+class ServerTimingMiddleware:
+    """
+    Mide cada petición: tiempo total, de la vista, de base de datos (y cantidad de consultas) y de
+    render de la respuesta (serialización de DRF o plantilla). Los registra en histogramas por vista
+    y, con SERVER_TIMING activo, los envía en el encabezado Server-Timing.
+    Debe ir primero en MIDDLEWARE para que el total incluya todo el stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Evita que Django ejecute estos hooks en un hilo aparte en modo asíncrono.
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        medicion = self._iniciar(request)
+        with self._medir_consultas(medicion):
+            response = self.get_response(request)
+        return self._finalizar(request, response, medicion)
+
+    async def __acall__(self, request):
+        medicion = self._iniciar(request)
+        # Las conexiones son locales a cada hilo y el ORM asíncrono consulta desde el hilo de la petición,
+        # por lo que el wrapper se instala (y se retira) en ese hilo.
+        consultas = await sync_to_async(self._medir_consultas)(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(consultas.close)()
+        return self._finalizar(request, response, medicion)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self._marcar(request, 'inicio_vista')
+
+    def process_template_response(self, request, response):
+        # Se llama al terminar la vista y antes de renderizar la respuesta.
+        self._marcar(request, 'fin_vista')
+        return response
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self._marcar(request, 'inicio_vista')
+
+    async def _aprocess_template_response(self, request, response):
+        self._marcar(request, 'fin_vista')
+        return response
+
+    def _marcar(self, request, momento):
+        request._medicion[momento] = perf_counter()
+
+    def _iniciar(self, request):
+        request._medicion = {'inicio': perf_counter(), 'db': 0.0, 'consultas': 0}
+        return request._medicion
+
+    def _medir_consultas(self, medicion):
+        def medir(execute, sql, params, many, context):
+            inicio = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                medicion['db'] += perf_counter() - inicio
+                medicion['consultas'] += 1
+
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(medir))
+        return stack.pop_all()
+
+    def _finalizar(self, request, response, medicion):
+        fin = perf_counter()
+        valores = {
+            'total': (fin - medicion['inicio']) * 1000,
+            'db': medicion['db'] * 1000,
+            'consultas': medicion['consultas'],
+        }
+        if 'inicio_vista' in medicion:
+            fin_vista = medicion.get('fin_vista', fin)
+            valores['vista'] = (fin_vista - medicion['inicio_vista']) * 1000
+            valores['render'] = (fin - fin_vista) * 1000
+            metricas_vistas.registrar(request.resolver_match.view_name, valores)
+
+        if settings.SERVER_TIMING:
+            entradas = [f'db;dur={valores["db"]:.1f};desc="{valores["consultas"]} consultas"']
+            if 'vista' in valores:
+                entradas.append(f'vista;dur={valores["vista"]:.1f}')
+                entradas.append(f'render;dur={valores["render"]:.1f}')
+            entradas.append(f'total;dur={valores["total"]:.1f}')
+            response['Server-Timing'] = ', '.join(entradas)
+        return response
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def poblar_resumen(apps, schema_editor):
+    Indicador = apps.get_model('proyecto_prevencion', 'Indicador')
+    ResumenCumplimiento = apps.get_model('proyecto_prevencion', 'ResumenCumplimiento')
+    ultimo = Indicador.objects.filter(
+        medida=OuterRef('medida'), usuario=OuterRef('usuario')
+    ).order_by('-fecha_reporte', '-id').values('id')[:1]
+
+    lote = []
+    for indicador in Indicador.objects.filter(id=Subquery(ultimo)).select_related('medida').iterator():
+        if indicador.cumple_requisitos:
+            estado = 'aprobado'
+        elif indicador.fecha_rechazo:
+            estado = 'rechazado'
+        else:
+            estado = 'pendiente'
+        lote.append(ResumenCumplimiento(
+            organismo_id=indicador.medida.organismo_id,
+            medida_id=indicador.medida_id,
+            usuario_id=indicador.usuario_id,
+            indicador_id=indicador.id,
+            estado=estado,
+        ))
+    ResumenCumplimiento.objects.bulk_create(lote, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0012_indicador_fecha_aprobacion_indicador_fecha_rechazo_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCumplimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente de revisión'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')], max_length=10)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('indicador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='proyecto_prevencion.indicador')),
+                ('medida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='proyecto_prevencion.medida')),
+                ('organismo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='proyecto_prevencion.organismopublico')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organismo', 'usuario'], name='resumen_organismo_usuario_idx')],
+                'constraints': [models.UniqueConstraint(fields=('medida', 'usuario'), name='resumen_medida_usuario_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0013_resumencumplimiento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(fields=['-fecha_reporte', '-id'], name='indicador_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(fields=['medida', '-fecha_reporte', '-id'], name='indicador_medida_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(fields=['usuario', '-fecha_reporte', '-id'], name='indicador_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(condition=models.Q(('cumple_requisitos', False), ('fecha_rechazo__isnull', True)), fields=['-fecha_reporte', '-id'], name='indicador_pendiente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0014_indices_listado_indicadores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargaDocumento',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tamano_total', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('documento_requerido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='proyecto_prevencion.documentorequerido')),
+                ('medida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='proyecto_prevencion.medida')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
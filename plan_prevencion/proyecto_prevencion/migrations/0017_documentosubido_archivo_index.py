@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0016_archivoalmacenado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentosubido',
+            name='archivo',
+            field=models.FileField(db_index=True, upload_to='uploads/'),
+        ),
+    ]
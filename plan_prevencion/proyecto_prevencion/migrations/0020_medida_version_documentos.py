@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0019_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medida',
+            name='version_documentos',
+            field=models.CharField(default='0', editable=False, max_length=32),
+        ),
+    ]
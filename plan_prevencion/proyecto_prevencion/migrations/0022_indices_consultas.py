@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('proyecto_prevencion', '0021_correopendiente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comunaplan',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['id'], name='comuna_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(fields=['medida', 'usuario', '-fecha_reporte', '-id'], name='indicador_medida_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medida',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['id'], name='medida_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medida',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['organismo'], name='medida_organismo_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organismopublico',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['id'], name='organismo_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiposmedidas',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['id'], name='tipomedida_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_superuser', 'aprobado'], name='usuario_superuser_aprobado_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+def poblar_estado(apps, schema_editor):
+    # Mismo orden de evaluación que usaban las vistas: la aprobación prevalece sobre la fecha de rechazo.
+    Indicador = apps.get_model('proyecto_prevencion', 'Indicador')
+    Indicador.objects.filter(cumple_requisitos=True).update(estado='aprobado')
+    Indicador.objects.filter(cumple_requisitos=False, fecha_rechazo__isnull=False).update(estado='rechazado')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0022_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicador',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente de revisión'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')], default='pendiente', max_length=10),
+        ),
+        migrations.RunPython(poblar_estado, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='indicador',
+            constraint=models.CheckConstraint(condition=models.Q(('estado__in', ['pendiente', 'aprobado', 'rechazado'])), name='indicador_estado_valido'),
+        ),
+        migrations.RemoveIndex(
+            model_name='indicador',
+            name='indicador_pendiente_fecha_idx',
+        ),
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(fields=['estado', '-fecha_reporte', '-id'], name='indicador_estado_fecha_idx'),
+        ),
+    ]
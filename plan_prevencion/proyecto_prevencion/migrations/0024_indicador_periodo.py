@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:20
+
+import django.db.models.deletion
+import proyecto_prevencion.models
+from django.db import migrations, models
+from django.db.models.functions import ExtractYear
+
+
+def poblar_periodo(apps, schema_editor):
+    Indicador = apps.get_model('proyecto_prevencion', 'Indicador')
+    Indicador.objects.update(periodo=ExtractYear('fecha_reporte'))
+
+    # Antes podía haber más de un aprobado por período: queda vigente el más reciente y los demás siguen
+    # aprobados, con su fecha de aprobación, pero marcados como reemplazados por él.
+    reemplazados = []
+    vigentes = {}
+    aprobados = Indicador.objects.filter(estado='aprobado').order_by('-fecha_reporte', '-id')\
+        .values_list('id', 'medida_id', 'usuario_id', 'periodo')
+    for id, *clave in aprobados.iterator():
+        vigente = vigentes.setdefault(tuple(clave), id)
+        if vigente != id:
+            reemplazados.append(Indicador(id=id, reemplazado_por_id=vigente))
+    Indicador.objects.bulk_update(reemplazados, ['reemplazado_por'], batch_size=1000)
+
+
+def quitar_reemplazos(apps, schema_editor):
+    # Los aprobados reemplazados nunca dejaron de estar aprobados; basta con quitar la marca.
+    Indicador = apps.get_model('proyecto_prevencion', 'Indicador')
+    Indicador.objects.filter(reemplazado_por__isnull=False).update(reemplazado_por=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0023_indicador_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicador',
+            name='periodo',
+            field=models.PositiveSmallIntegerField(default=proyecto_prevencion.models.periodo_actual),
+        ),
+        migrations.AddField(
+            model_name='indicador',
+            name='reemplazado_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='reemplazos', to='proyecto_prevencion.indicador'),
+        ),
+        migrations.RunPython(poblar_periodo, quitar_reemplazos),
+        migrations.AddIndex(
+            model_name='indicador',
+            index=models.Index(fields=['medida', 'usuario', 'periodo'], name='indicador_medida_periodo_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='indicador',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'aprobado'), ('reemplazado_por__isnull', True)), fields=('medida', 'usuario', 'periodo'), name='indicador_aprobado_periodo_unico'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proyecto_prevencion', '0026_correopendiente_enviando'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='indicador',
+            name='medida',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='proyecto_prevencion.medida'),
+        ),
+        migrations.AlterField(
+            model_name='indicador',
+            name='usuario',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -1,10 +1,30 @@
+import os
+import uuid
+from datetime import datetime, time, timedelta
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+
+def periodo_actual():
+    """
+    Período de reporte vigente: el año calendario en curso según la zona horaria del proyecto. No depende de la
+    frecuencia de la medida ni de 'proxima_fecha_carga', que corre un año desde cada aprobación.
+    """
+    return timezone.localdate().year
 
 class OrganismoPublico(models.Model):
     nombre_organismo = models.CharField(max_length=100)
     activo = models.BooleanField(default=True)
 
+    class Meta:
+        # Los listados y catálogos solo muestran los registros activos.
+        indexes = [
+            models.Index(fields=['id'], condition=Q(activo=True), name='organismo_activo_idx'),
+        ]
+
     def __str__(self):
         return self.nombre_organismo
     
@@ -12,6 +32,11 @@ class ComunaPlan(models.Model):
     nombre_comuna = models.CharField(max_length=100)
     activo = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(activo=True), name='comuna_activa_idx'),
+        ]
+
     def __str__(self):
         return self.nombre_comuna
 
@@ -19,6 +44,11 @@ class TiposMedidas(models.Model):
     nombre_tipo_medida = models.CharField(max_length=100)
     activo = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(activo=True), name='tipomedida_activo_idx'),
+        ]
+
     def __str__(self):
         return self.nombre_tipo_medida
 
@@ -44,6 +74,27 @@ class Medida(models.Model):
     frecuencia = models.CharField(max_length=10, choices=FRECUENCIA_CHOICES)
     proxima_fecha_carga = models.DateField(null=True, blank=True)
     activo = models.BooleanField(default=True)
+    # Cambia cada vez que se modifican sus documentos requeridos; identifica los formularios generados.
+    version_documentos = models.CharField(max_length=32, default='0', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(activo=True), name='medida_activa_idx'),
+            # Medidas activas de un organismo (dashboard de usuarios).
+            models.Index(fields=['organismo'], condition=Q(activo=True), name='medida_organismo_activa_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        'version_documentos' solo la escribe invalidar_documentos: al guardar una medida ya existente se excluye,
+        para que una instancia cargada antes de cambiar sus documentos no restaure la versión anterior.
+        """
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [campo.name for campo in self._meta.concrete_fields if not campo.primary_key]
+            kwargs['update_fields'] = [campo for campo in update_fields if campo != 'version_documentos']
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.nombre_corto
@@ -59,27 +110,365 @@ class Usuario(AbstractUser):
     rut_usuario = models.CharField(unique=True, blank=True, null=True, max_length=10)
     organismo = models.ForeignKey(OrganismoPublico, blank=True, null=True, on_delete=models.CASCADE)
     aprobado = models.BooleanField(default=False)
+    # Se incrementa para revocar los tokens JWT emitidos al usuario (ver utils/tokens.py).
+    version_token = models.PositiveIntegerField(default=0)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        # Listados de usuarios aprobados y pendientes del panel de administración.
+        indexes = [
+            models.Index(fields=['is_superuser', 'aprobado'], name='usuario_superuser_aprobado_idx'),
+        ]
 
     def __str__(self):
         return self.username
     
+class IndicadorQuerySet(models.QuerySet):
+    def ultimos(self):
+        """
+        Filtra, en una sola consulta, el indicador más reciente de cada par medida/usuario.
+        """
+        ultimo = Indicador.objects.filter(
+            medida=OuterRef('medida'), usuario=OuterRef('usuario')
+        ).order_by('-fecha_reporte', '-id').values('id')[:1]
+        return self.filter(id=Subquery(ultimo))
+
+    def ultimos_por_medida(self, medidas, usuario):
+        """
+        Devuelve el indicador más reciente del usuario para cada una de las medidas.
+        """
+        return self.filter(usuario=usuario, medida__in=medidas).ultimos()
+
+    def filtrar(self, estado=None, medida=None, organismo=None, usuario=None, periodo=None, desde=None, hasta=None):
+        """
+        Aplica los filtros del listado de indicadores. Los valores None se ignoran.
+        """
+        filtros = Q()
+        if estado is not None:
+            filtros &= Q(estado=estado)
+        if periodo is not None:
+            filtros &= Q(periodo=periodo)
+        if medida is not None:
+            filtros &= Q(medida_id=medida)
+        if organismo is not None:
+            filtros &= Q(medida__organismo_id=organismo)
+        if usuario is not None:
+            filtros &= Q(usuario_id=usuario)
+        # Los rangos se comparan contra datetimes para que el índice por fecha_reporte sea utilizable.
+        if desde is not None:
+            filtros &= Q(fecha_reporte__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+        if hasta is not None:
+            filtros &= Q(fecha_reporte__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min)))
+        return self.filter(filtros)
+
+    def pagina(self, cursor=None, limite=50):
+        """
+        Paginación por clave (fecha_reporte, id) en orden descendente.
+        'cursor' es la tupla (fecha_reporte, id) del último indicador de la página anterior.
+        Retorna la lista de indicadores y el cursor de la página siguiente, o None si no hay más.
+        """
+        queryset = self.order_by('-fecha_reporte', '-id')
+        if cursor is not None:
+            fecha, id = cursor
+            queryset = queryset.filter(Q(fecha_reporte__lt=fecha) | Q(fecha_reporte=fecha, id__lt=id))
+        indicadores = list(queryset[:limite + 1])
+        if len(indicadores) <= limite:
+            return indicadores, None
+        indicadores = indicadores[:limite]
+        ultimo = indicadores[-1]
+        return indicadores, (ultimo.fecha_reporte, ultimo.id)
+
 class Indicador(models.Model):
-    medida = models.ForeignKey(Medida, on_delete=models.CASCADE)
-    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente de revisión'),
+        ('aprobado', 'Aprobado'),
+        ('rechazado', 'Rechazado'),
+    ]
+
+    # Sin índice propio: los cubren los índices compuestos que comienzan por cada FK, con la misma columna inicial.
+    medida = models.ForeignKey(Medida, on_delete=models.CASCADE, db_index=False)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, db_index=False)
     calculo_indicador = models.FloatField()
     cumple_requisitos = models.BooleanField(default=True)
     fecha_reporte = models.DateTimeField(auto_now_add=True)
     fecha_aprobacion = models.DateTimeField(null=True, blank=True)
     fecha_rechazo = models.DateTimeField(null=True, blank=True)
     motivo_rechazo = models.TextField(null=True, blank=True)
+    # Estado de la revisión. Se mantiene junto a cumple_requisitos y las fechas al subir, aprobar o rechazar.
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    # Año calendario en que se reportó. Cada medida y usuario tiene a lo más un indicador aprobado vigente por período.
+    periodo = models.PositiveSmallIntegerField(default=periodo_actual)
+    # Indicador aprobado que reemplazó a este en su período. El reemplazado conserva su aprobación como historial,
+    # pero queda fuera de la restricción de un aprobado por período.
+    reemplazado_por = models.ForeignKey('self', null=True, blank=True, on_delete=models.RESTRICT, related_name='reemplazos')
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    objects = IndicadorQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(estado__in=['pendiente', 'aprobado', 'rechazado']), name='indicador_estado_valido'
+            ),
+            models.UniqueConstraint(
+                fields=['medida', 'usuario', 'periodo'], condition=Q(estado='aprobado', reemplazado_por__isnull=True),
+                name='indicador_aprobado_periodo_unico'
+            ),
+        ]
+        indexes = [
+            # Listado paginado y exportación, completos o filtrados por medida o usuario.
+            models.Index(fields=['-fecha_reporte', '-id'], name='indicador_fecha_id_idx'),
+            models.Index(fields=['medida', '-fecha_reporte', '-id'], name='indicador_medida_fecha_idx'),
+            models.Index(fields=['usuario', '-fecha_reporte', '-id'], name='indicador_usuario_fecha_idx'),
+            # Último indicador de cada par medida/usuario (dashboard y resumen de cumplimiento).
+            models.Index(fields=['medida', 'usuario', '-fecha_reporte', '-id'], name='indicador_medida_usuario_idx'),
+            # Colas de revisión y listados filtrados por estado.
+            models.Index(fields=['estado', '-fecha_reporte', '-id'], name='indicador_estado_fecha_idx'),
+            # Indicadores de un ciclo y comparaciones entre años de una medida.
+            models.Index(fields=['medida', 'usuario', 'periodo'], name='indicador_medida_periodo_idx'),
+        ]
 
     def __str__(self):
         return f"Indicador para {self.medida.nombre_corto}"
     
+class ArchivoAlmacenado(models.Model):
+    """
+    Contenido único guardado por ContenidoDireccionableStorage, con la cantidad de documentos que lo referencian.
+    """
+    ruta = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    tamano = models.PositiveBigIntegerField()
+    referencias = models.PositiveIntegerField(default=1)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.ruta} ({self.referencias})"
+
 class DocumentoSubido(models.Model):
     indicador = models.ForeignKey(Indicador, on_delete=models.CASCADE, related_name="documentos_subidos")
     documento_requerido = models.ForeignKey(DocumentoRequerido, on_delete=models.CASCADE)
-    archivo = models.FileField(upload_to='uploads/')
+    archivo = models.FileField(upload_to='uploads/', db_index=True)
 
     def __str__(self):
         return f"{self.documento_requerido.descripcion} para {self.indicador.medida.nombre_corto}"
+
+def _eliminar_archivo(ruta):
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+class CargaDocumento(models.Model):
+    """
+    Carga reanudable de un documento requerido. El archivo se recibe por partes
+    direccionadas por offset y se acumula en disco hasta que se finaliza.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
+    medida = models.ForeignKey(Medida, on_delete=models.CASCADE)
+    documento_requerido = models.ForeignKey(DocumentoRequerido, on_delete=models.CASCADE)
+    nombre_archivo = models.CharField(max_length=255)
+    tamano_total = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    @property
+    def ruta_temporal(self):
+        return os.path.join(settings.CARGAS_PARCIALES_DIR, self.id.hex)
+
+    @property
+    def completa(self):
+        return self.offset == self.tamano_total
+
+    def escribir(self, stream, offset, chunk_size=64 * 1024):
+        """
+        Agrega al archivo temporal los bytes de 'stream' a partir de 'offset', sin cargarlos completos en memoria.
+        La fila queda bloqueada mientras se escribe, de modo que dos PATCH concurrentes con el mismo offset
+        se serializan y el segundo recibe el offset ya actualizado.
+        Lanza ValueError si el offset no coincide con lo ya recibido o si se excede el tamaño declarado.
+        """
+        error = None
+        with transaction.atomic():
+            self.offset = CargaDocumento.objects.select_for_update().values_list('offset', flat=True).get(pk=self.pk)
+            if offset != self.offset:
+                raise ValueError("El offset no coincide con los bytes recibidos.")
+            os.makedirs(settings.CARGAS_PARCIALES_DIR, exist_ok=True)
+            try:
+                with open(self.ruta_temporal, 'ab') as destino:
+                    # Descarta bytes de un intento anterior que no alcanzaron a registrarse.
+                    destino.truncate(self.offset)
+                    while True:
+                        chunk = stream.read(chunk_size)
+                        if not chunk:
+                            break
+                        if self.offset + len(chunk) > self.tamano_total:
+                            raise ValueError("Se recibieron más bytes que el tamaño declarado.")
+                        destino.write(chunk)
+                        self.offset += len(chunk)
+            except (OSError, ValueError) as e:
+                # Si la conexión se corta, lo ya escrito queda registrado y el cliente reanuda desde ahí;
+                # el error se relanza después de confirmar el offset.
+                error = e
+            CargaDocumento.objects.filter(pk=self.pk).update(offset=self.offset, fecha_actualizacion=timezone.now())
+        if error is not None:
+            raise error
+
+    def descartar(self):
+        """
+        Elimina la carga. El archivo temporal se borra al confirmar la transacción, por si esta se revierte.
+        """
+        ruta = self.ruta_temporal
+        self.delete()
+        transaction.on_commit(lambda: _eliminar_archivo(ruta))
+
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.offset}/{self.tamano_total})"
+
+class ResumenCumplimientoQuerySet(models.QuerySet):
+    def actualizar(self, medida_id, usuario_id):
+        """
+        Recalcula el resumen de una medida para un usuario a partir de su indicador más reciente.
+        Debe llamarse dentro de la misma transacción que modifica el indicador.
+        """
+        indicador = Indicador.objects.select_related('medida')\
+            .filter(medida_id=medida_id, usuario_id=usuario_id)\
+            .order_by('-fecha_reporte', '-id').first()
+        if indicador is None:
+            self.filter(medida_id=medida_id, usuario_id=usuario_id).delete()
+            return None
+        resumen, _ = self.update_or_create(
+            medida_id=medida_id,
+            usuario_id=usuario_id,
+            defaults={
+                'organismo_id': indicador.medida.organismo_id,
+                'indicador': indicador,
+                'estado': indicador.estado,
+            }
+        )
+        return resumen
+
+    def estado_por_medida(self, medidas, usuario):
+        """
+        Clasifica las medidas según el estado de su indicador más reciente.
+        Retorna un diccionario con las listas 'approved', 'pending_review' y 'rejected'
+        (tuplas medida, indicador) y 'pending_completion' (medidas sin indicador).
+        """
+        medidas = list(medidas)
+        resumenes = self._resumenes_de(medidas, usuario)
+        return self._clasificar(medidas, resumenes)
+
+    async def aestado_por_medida(self, medidas, usuario):
+        """
+        Versión asíncrona de estado_por_medida.
+        """
+        medidas = [medida async for medida in medidas]
+        resumenes = [resumen async for resumen in self._resumenes_de(medidas, usuario)]
+        return self._clasificar(medidas, resumenes)
+
+    def _resumenes_de(self, medidas, usuario):
+        # Por medida y usuario (índice único), no por organismo: las medidas pueden cambiar de organismo.
+        return self.select_related('indicador').filter(
+            usuario=usuario,
+            medida__in=[medida.id for medida in medidas]
+        )
+
+    def reasignar_organismo(self, medidas):
+        """
+        Copia a los resúmenes de las medidas indicadas el organismo vigente de cada medida.
+        Retorna la cantidad de resúmenes corregidos.
+        """
+        organismo = Medida.objects.filter(pk=OuterRef('medida_id')).values('organismo_id')[:1]
+        return self.filter(medida__in=medidas).exclude(organismo_id=F('medida__organismo_id'))\
+            .update(organismo_id=Subquery(organismo))
+
+    def _clasificar(self, medidas, resumenes):
+        resumenes = {resumen.medida_id: resumen for resumen in resumenes}
+        estados = {
+            'approved': [],
+            'pending_review': [],
+            'rejected': [],
+            'pending_completion': [],
+        }
+        for medida in medidas:
+            resumen = resumenes.get(medida.id)
+            if resumen is None:
+                estados['pending_completion'].append(medida)
+                continue
+            indicador = resumen.indicador
+            indicador.medida = medida
+            estados[ResumenCumplimiento.GRUPOS_DASHBOARD[resumen.estado]].append((medida, indicador))
+        return estados
+
+class ResumenCumplimiento(models.Model):
+    """
+    Estado vigente de cada medida para un usuario, mantenido al subir, aprobar o rechazar indicadores.
+    """
+    ESTADO_CHOICES = Indicador.ESTADO_CHOICES
+
+    GRUPOS_DASHBOARD = {
+        'pendiente': 'pending_review',
+        'aprobado': 'approved',
+        'rechazado': 'rejected',
+    }
+
+    organismo = models.ForeignKey(OrganismoPublico, on_delete=models.CASCADE)
+    medida = models.ForeignKey(Medida, on_delete=models.CASCADE)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
+    indicador = models.ForeignKey(Indicador, on_delete=models.CASCADE)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    objects = ResumenCumplimientoQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['medida', 'usuario'], name='resumen_medida_usuario_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['organismo', 'usuario'], name='resumen_organismo_usuario_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.medida.nombre_corto} ({self.estado})"
+
+class VersionCatalogo(models.Model):
+    """
+    Versión vigente de cada catálogo cacheado. Cambia cada vez que se modifica el catálogo,
+    de modo que todos los workers dejan de usar la copia anterior.
+    """
+    nombre = models.CharField(max_length=50, primary_key=True)
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.nombre}: {self.version}"
+
+class CorreoPendiente(models.Model):
+    """
+    Bandeja de salida de correos. Las vistas encolan los mensajes y el comando 'enviar_correos'
+    los despacha en lotes reutilizando una sola conexión al servidor de correo.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    mensaje = models.TextField()
+    remitente = models.CharField(max_length=255)
+    destinatarios = models.JSONField()
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True, default='')
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_intento_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} ({self.estado})"
@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from proyecto_prevencion.models import OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido, DocumentoSubido, ResumenCumplimiento, Usuario
+from proyecto_prevencion.utils.catalogos import invalidar_catalogo
+from proyecto_prevencion.utils.formularios import invalidar_documentos
+from proyecto_prevencion.utils.tokens import revocar_tokens
+
+
+@receiver(post_delete, sender=DocumentoSubido)
+def liberar_archivo(sender, instance, **kwargs):
+    """
+    Libera la referencia al archivo cuando se elimina un documento subido (también al eliminar su indicador).
+    """
+    if instance.archivo.name:
+        instance.archivo.storage.delete(instance.archivo.name)
+
+
+# Datos del usuario que viajan en los tokens (CLAIMS_USUARIO, sin contar la versión del token), más 'is_active',
+# que usuario_desde_claims da por verdadero mientras el token siga vigente.
+CAMPOS_CLAIMS = ('organismo', 'aprobado', 'is_superuser', 'is_active')
+
+
+@receiver(pre_save, sender=Usuario)
+def revocar_tokens_obsoletos(sender, instance, update_fields=None, **kwargs):
+    """
+    Revoca los tokens emitidos cuando cambia alguno de los datos que llevan, para que no sigan autorizando
+    con los valores anteriores.
+    """
+    if instance._state.adding or (update_fields is not None and not set(CAMPOS_CLAIMS) & set(update_fields)):
+        return
+    campos = [Usuario._meta.get_field(campo).attname for campo in CAMPOS_CLAIMS]
+    anterior = Usuario.objects.filter(pk=instance.pk).values(*campos, 'version_token').first()
+    if anterior is not None and any(anterior[campo] != getattr(instance, campo) for campo in campos):
+        revocar_tokens(instance)
+        # save() escribe también este campo; se mantiene la versión recién revocada.
+        instance.version_token = anterior['version_token'] + 1
+
+
+@receiver(post_save, sender=DocumentoRequerido)
+@receiver(post_delete, sender=DocumentoRequerido)
+def invalidar_formularios(sender, instance, **kwargs):
+    """
+    Invalida los formularios de subida generados para la medida cuando cambian sus documentos requeridos.
+    """
+    invalidar_documentos(instance.medida_id)
+
+
+@receiver(post_save, sender=Medida)
+def reasignar_resumenes(sender, instance, created, **kwargs):
+    """
+    El organismo está desnormalizado en el resumen de cumplimiento; se corrige si la medida cambió de organismo.
+    """
+    if not created:
+        ResumenCumplimiento.objects.filter(medida=instance).exclude(organismo_id=instance.organismo_id)\
+            .update(organismo_id=instance.organismo_id)
+
+
+# Catálogos cacheados que dependen de cada modelo. Las medidas incluyen el nombre del
+# organismo y sus documentos requeridos, por lo que también se invalidan con ellos.
+CATALOGOS_POR_MODELO = {
+    OrganismoPublico: ['organismo', 'medida'],
+    ComunaPlan: ['comuna'],
+    TiposMedidas: ['tipomedida'],
+    Medida: ['medida'],
+    DocumentoRequerido: ['medida'],
+}
+
+
+def invalidar_catalogos(sender, **kwargs):
+    for nombre in CATALOGOS_POR_MODELO[sender]:
+        invalidar_catalogo(nombre)
+
+
+for modelo in CATALOGOS_POR_MODELO:
+    post_save.connect(invalidar_catalogos, sender=modelo, dispatch_uid=f'invalidar_catalogos_{modelo.__name__}_save')
+    post_delete.connect(invalidar_catalogos, sender=modelo, dispatch_uid=f'invalidar_catalogos_{modelo.__name__}_delete')
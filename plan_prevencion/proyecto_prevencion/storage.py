@@ -0,0 +1,86 @@
+import hashlib
+import os
+import tempfile
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from proyecto_prevencion.models import ArchivoAlmacenado
+
+
+class ContenidoDireccionableStorage(FileSystemStorage):
+    """
+    Storage que guarda cada contenido una sola vez, en una ruta derivada de su sha256
+    (ab/cd/abcd...<extension>), y lleva la cuenta de cuántas veces fue guardado.
+    save() suma una referencia y delete() la resta; el archivo se borra al quedar sin referencias.
+    """
+    directorio_temporal = '.tmp'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        # Se calcula el hash en la misma pasada que copia el contenido a un temporal.
+        temporal_dir = self.path(self.directorio_temporal)
+        os.makedirs(temporal_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        tamano = 0
+        with tempfile.NamedTemporaryFile(dir=temporal_dir, delete=False) as temporal:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                temporal.write(chunk)
+                tamano += len(chunk)
+
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        ruta = f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+        try:
+            with transaction.atomic():
+                archivo, creado = ArchivoAlmacenado.objects.select_for_update().get_or_create(
+                    ruta=ruta, defaults={'sha256': sha256, 'tamano': tamano}
+                )
+                if not creado:
+                    ArchivoAlmacenado.objects.filter(pk=archivo.pk).update(referencias=F('referencias') + 1)
+                destino = self.path(ruta)
+                if os.path.exists(destino):
+                    # Al reutilizar el contenido se renueva su fecha de modificación, que la limpieza de
+                    # huérfanos usa para no tocar archivos recientes.
+                    os.utime(destino)
+                else:
+                    os.makedirs(os.path.dirname(destino), exist_ok=True)
+                    os.replace(temporal.name, destino)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(destino, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temporal.name):
+                os.remove(temporal.name)
+        return ruta
+
+    def delete(self, name):
+        # Se aplica al confirmar la transacción del llamador: si esta se revierte, el documento que
+        # apuntaba al archivo vuelve a existir y tanto el archivo como su referencia deben seguir ahí.
+        transaction.on_commit(lambda: self._liberar(name))
+
+    def _liberar(self, name):
+        with transaction.atomic():
+            archivo = ArchivoAlmacenado.objects.select_for_update().filter(ruta=name).first()
+            if archivo is not None and archivo.referencias > 1:
+                ArchivoAlmacenado.objects.filter(pk=archivo.pk).update(referencias=F('referencias') - 1)
+                return
+            if archivo is not None:
+                archivo.delete()
+            super().delete(name)
+
+    def purgar(self, name):
+        """
+        Elimina un archivo que no tiene referencias registradas. Lo usa la limpieza de huérfanos cuando
+        ningún DocumentoSubido apunta al archivo; si entretanto save() lo volvió a registrar, se conserva.
+        Retorna True si el archivo fue eliminado.
+        """
+        with transaction.atomic():
+            if ArchivoAlmacenado.objects.select_for_update().filter(ruta=name).exists():
+                return False
+            super().delete(name)
+        return True
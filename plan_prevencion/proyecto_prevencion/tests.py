@@ -1,49 +1,1538 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+from unittest import mock, skipUnless
+from datetime import timedelta
+from io import BytesIO, StringIO
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.module_loading import import_string
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Usuario, OrganismoPublico
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import periodo_actual, Usuario, OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido, Indicador, ResumenCumplimiento, DocumentoSubido, CargaDocumento, ArchivoAlmacenado, CorreoPendiente
+from .apis.serializers import TokenUsuarioSerializer
+from .management.commands.limpiar_archivos_huerfanos import listar_archivos
+from .utils.cargas import registrar_indicador
+from .utils.formularios import formularios_documentos
+from .utils.esquema import esquema_pregenerado
+from .utils.metricas import metricas_vistas
+from .frontend.admins.forms import MedidaForm
 
 # Create your tests here.
-class TestUsuario(APITestCase):
+class TestDashboardConsultas(APITestCase):
     def setUp(self):
-        # Crea un objeto Usuario en la base de datos con los detalles especificados
-        self.organimos = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
-        self.usuario = Usuario.objects.create(
-            rut_usuario="15637908-1",
-            nombre_usuario="Giselle Fernandez",
-            direccion="Av. Troncal San Francisco",
-            correo="gisellefernandez@gmail.com",
-            id_organismo=self.organimos
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.usuario = Usuario.objects.create_user(
+            username="usuario@talentofuturo.cl",
+            password="clave-segura-123",
+            organismo=self.organismo,
+            aprobado=True
         )
-        self.usuario.save()
 
-    def test_create_usuario(self):
-        #obtiene la URl para la vista
-        url = reverse("usuario-list")
-        data = {
-            "rut_usuario": "15637908-2",
-            "nombre_usuario": "Giselle Fernandez",
-            "direccion": "Av. Troncal San Francisco",
-            "correo": "gisellefernandez@gmail.com",
-            "id_organismo": self.organimos.id_organismo
+    def crear_medidas(self, cantidad):
+        for i in range(cantidad):
+            medida = Medida.objects.create(
+                nombre_corto=f"Medida {i}",
+                nombre_largo=f"Medida de prueba {i}",
+                organismo=self.organismo,
+                descripcion_formula="Sin fórmula",
+                tipo_formula="Numero",
+                frecuencia="anual"
+            )
+            DocumentoRequerido.objects.create(medida=medida, descripcion="Informe")
+            # Un indicador antiguo y otro reciente por medida; solo el último cuenta.
+            Indicador.objects.create(medida=medida, usuario=self.usuario, calculo_indicador=0, cumple_requisitos=True, estado='aprobado')
+            if i % 3 == 0:
+                Indicador.objects.create(medida=medida, usuario=self.usuario, calculo_indicador=0, cumple_requisitos=False)
+            elif i % 3 == 1:
+                Indicador.objects.create(
+                    medida=medida, usuario=self.usuario, calculo_indicador=0,
+                    cumple_requisitos=False, fecha_rechazo=timezone.now(), estado='rechazado'
+                )
+            ResumenCumplimiento.objects.actualizar(medida.id, self.usuario.id)
+        Medida.objects.create(
+            nombre_corto="Sin reporte",
+            nombre_largo="Medida sin indicadores",
+            organismo=self.organismo,
+            descripcion_formula="Sin fórmula",
+            tipo_formula="Numero",
+            frecuencia="unica"
+        )
+
+    def test_estado_por_medida(self):
+        self.crear_medidas(3)
+        medidas = Medida.objects.filter(organismo=self.organismo)
+        with self.assertNumQueries(2):
+            estados = ResumenCumplimiento.objects.estado_por_medida(medidas, self.usuario)
+        self.assertEqual([m.nombre_corto for m, _ in estados['pending_review']], ["Medida 0"])
+        self.assertEqual([m.nombre_corto for m, _ in estados['rejected']], ["Medida 1"])
+        self.assertEqual([m.nombre_corto for m, _ in estados['approved']], ["Medida 2"])
+        self.assertEqual([m.nombre_corto for m in estados['pending_completion']], ["Sin reporte"])
+
+    def test_api_dashboard_consultas_constantes(self):
+        self.crear_medidas(6)
+        self.client.force_authenticate(user=self.usuario)
+        url = reverse("api_usuario_dashboard")
+        # Estado para el ETag (resumen y versión de medidas), medidas, documentos requeridos y resumen.
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        self.assertEqual(len(data["pending_review"]), 2)
+        self.assertEqual(len(data["rejected"]), 2)
+        self.assertEqual(len(data["approved"]), 2)
+        self.assertEqual(len(data["pending_completion"]), 1)
+
+    def test_dashboard_consultas_constantes(self):
+        self.client.force_login(self.usuario)
+        url = reverse("usuario_dashboard")
+        self.crear_medidas(1)
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(url)
+        self.crear_medidas(6)
+        with CaptureQueriesContext(connection) as muchas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(pocas), len(muchas))
+
+    def test_api_dashboard_condicional(self):
+        self.crear_medidas(2)
+        self.client.force_authenticate(user=self.usuario)
+        url = reverse("api_usuario_dashboard")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        indicador = Indicador.objects.ultimos_por_medida(Medida.objects.all(), self.usuario).first()
+        indicador.fecha_rechazo = timezone.now()
+        indicador.save()
+        ResumenCumplimiento.objects.actualizar(indicador.medida_id, self.usuario.id)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_medida_reasignada_conserva_su_estado(self):
+        self.crear_medidas(3)
+        otro = OrganismoPublico.objects.create(nombre_organismo="Otro Organismo")
+        for medida in Medida.objects.all():
+            medida.organismo = otro
+            medida.save()
+        self.assertEqual(set(ResumenCumplimiento.objects.values_list('organismo_id', flat=True)), {otro.id})
+
+        self.usuario.organismo = otro
+        estados = ResumenCumplimiento.objects.estado_por_medida(Medida.objects.filter(organismo=otro), self.usuario)
+        self.assertEqual([m.nombre_corto for m, _ in estados['approved']], ["Medida 2"])
+        self.assertEqual([m.nombre_corto for m in estados['pending_completion']], ["Sin reporte"])
+
+    def test_reconstruir_resumen(self):
+        self.crear_medidas(3)
+        esperado = set(ResumenCumplimiento.objects.values_list('medida_id', 'indicador_id', 'estado'))
+        ResumenCumplimiento.objects.all().delete()
+        call_command('reconstruir_resumen', stdout=StringIO())
+        self.assertEqual(set(ResumenCumplimiento.objects.values_list('medida_id', 'indicador_id', 'estado')), esperado)
+
+    def test_aprobar_actualiza_resumen(self):
+        self.crear_medidas(1)
+        admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        indicador = Indicador.objects.ultimos_por_medida(Medida.objects.all(), self.usuario).get()
+        self.client.force_authenticate(user=admin)
+        response = self.client.post(reverse("api_aprobar_indicador", kwargs={"pk": indicador.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resumen = ResumenCumplimiento.objects.get(medida=indicador.medida, usuario=self.usuario)
+        self.assertEqual((resumen.indicador_id, resumen.estado), (indicador.id, 'aprobado'))
+
+    def test_rechazar_actualiza_resumen(self):
+        self.crear_medidas(1)
+        admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        indicador = Indicador.objects.ultimos_por_medida(Medida.objects.all(), self.usuario).get()
+        self.client.force_authenticate(user=admin)
+        response = self.client.post(reverse("api_rechazar_indicador", kwargs={"pk": 999999}), {"motivo": "Falta firma"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(reverse("api_rechazar_indicador", kwargs={"pk": indicador.id}), {"motivo": "Falta firma"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        indicador.refresh_from_db()
+        self.assertEqual((indicador.estado, indicador.motivo_rechazo, indicador.fecha_aprobacion), ('rechazado', "Falta firma", None))
+        resumen = ResumenCumplimiento.objects.get(medida=indicador.medida, usuario=self.usuario)
+        self.assertEqual((resumen.indicador_id, resumen.estado), (indicador.id, 'rechazado'))
+
+    def test_revision_en_bloque(self):
+        self.crear_medidas(6)
+        admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        ultimos = list(Indicador.objects.ultimos_por_medida(Medida.objects.all(), self.usuario).values_list('id', flat=True))
+        self.client.force_authenticate(user=admin)
+        url = reverse("api_revisar_indicadores")
+
+        response = self.client.post(url, {"ids": ultimos, "accion": "rechazar"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {"ids": ultimos[:3] + [999999], "accion": "rechazar", "motivo": "Falta firma"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"actualizados": 3, "no_encontrados": [999999], "reemplazados": []})
+
+        response = self.client.post(url, {"ids": ultimos[3:], "accion": "aprobar"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        esperado = {i: 'rechazado' for i in ultimos[:3]} | {i: 'aprobado' for i in ultimos[3:]}
+        self.assertEqual(dict(ResumenCumplimiento.objects.values_list('indicador_id', 'estado')), esperado)
+        self.assertEqual(set(Indicador.objects.filter(id__in=ultimos[:3]).values_list('motivo_rechazo', flat=True)), {"Falta firma"})
+        proxima = timezone.now().date() + relativedelta(years=+1)
+        for indicador in Indicador.objects.filter(id__in=ultimos[3:]).select_related('medida'):
+            self.assertEqual(indicador.estado, 'aprobado')
+            self.assertEqual(indicador.medida.proxima_fecha_carga, proxima)
+
+    def test_revision_en_bloque_desde_listado(self):
+        self.crear_medidas(2)
+        admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        self.client.force_login(admin)
+        # Solo el indicador pendiente se puede seleccionar; los aprobados sin fecha_aprobacion ya no cuentan como pendientes.
+        self.assertContains(self.client.get(reverse("indicadores_list")), 'form="revisionForm"', count=1)
+        ids = list(Indicador.objects.ultimos_por_medida(Medida.objects.all(), self.usuario).values_list('id', flat=True))
+        response = self.client.post(reverse("revisar_indicadores_seleccionados"), {"ids": ids, "accion": "aprobar"})
+        self.assertRedirects(response, reverse("indicadores_list"), fetch_redirect_response=False)
+        self.assertEqual(set(ResumenCumplimiento.objects.values_list('estado', flat=True)), {'aprobado'})
+
+
+class TestListadoIndicadores(APITestCase):
+    def setUp(self):
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.otro_organismo = OrganismoPublico.objects.create(nombre_organismo="Otro Organismo")
+        self.usuario = Usuario.objects.create_user(username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=self.organismo, aprobado=True)
+        self.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        self.medida = Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=self.organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        self.otra_medida = Medida.objects.create(
+            nombre_corto="Otra", nombre_largo="Otra medida", organismo=self.otro_organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        for i in range(7):
+            Indicador.objects.create(
+                medida=self.medida if i % 2 else self.otra_medida, usuario=self.usuario,
+                calculo_indicador=i, cumple_requisitos=(i == 0), estado='aprobado' if i == 0 else 'pendiente'
+            )
+        # Todos comparten la misma fecha para forzar el desempate por id.
+        Indicador.objects.update(fecha_reporte=timezone.now())
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("api_indicadores_list")
+
+    def recorrer(self, params):
+        ids = []
+        cursor = None
+        while True:
+            query = dict(params, limite=3)
+            if cursor:
+                query["cursor"] = cursor
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["data"])
+            cursor = response.data["next"]
+            if cursor is None:
+                return ids
+
+    def test_paginacion_recorre_todo_sin_repetir(self):
+        ids = self.recorrer({})
+        esperado = list(Indicador.objects.order_by('-fecha_reporte', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperado)
+
+    def test_filtros(self):
+        self.assertEqual(len(self.recorrer({"organismo": self.organismo.id})), 3)
+        self.assertEqual(len(self.recorrer({"medida": self.otra_medida.id})), 4)
+        self.assertEqual(len(self.recorrer({"estado": "aprobado"})), 1)
+        self.assertEqual(len(self.recorrer({"estado": "pendiente"})), 6)
+        hoy = timezone.now().date()
+        self.assertEqual(len(self.recorrer({"desde": hoy, "hasta": hoy})), 7)
+        self.assertEqual(len(self.recorrer({"desde": hoy + timedelta(days=1)})), 0)
+
+    def test_exportar_csv(self):
+        response = self.client.get(reverse("api_indicadores_exportar"), {"organismo": self.organismo.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        filas = list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(len(filas), 3)
+        self.assertEqual({fila["medida"] for fila in filas}, {"Medida"})
+
+    def test_exportar_ndjson(self):
+        response = self.client.get(reverse("api_indicadores_exportar"), {"formato": "ndjson", "estado": "aprobado"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        filas = [json.loads(linea) for linea in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([fila["calculo_indicador"] for fila in filas], [0])
+        self.assertEqual(filas[0]["documentos"], [])
+
+    def test_etag_depende_de_la_pagina(self):
+        etag = self.client.get(self.url, {"limite": 3})["ETag"]
+        fuera, dentro = Indicador.objects.order_by('-id')[6], Indicador.objects.order_by('-id')[0]
+        Indicador.objects.filter(pk=fuera.pk).update(fecha_modificacion=timezone.now() + timedelta(minutes=1))
+        response = self.client.get(self.url, {"limite": 3}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Indicador.objects.filter(pk=dentro.pk).update(fecha_modificacion=timezone.now() + timedelta(minutes=1))
+        response = self.client.get(self.url, {"limite": 3}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cursor_invalido(self):
+        response = self.client.get(self.url, {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_listado_vuelve_a_la_primera_pagina(self):
+        self.client.force_login(self.admin)
+        url = reverse("indicadores_list")
+        response = self.client.get(url, {"estado": "pendiente", "limite": 3})
+        self.assertIsNone(response.context["primera_url"])
+        response = self.client.get(url + response.context["siguiente_url"])
+        self.assertEqual(response.context["primera_url"], "?estado=pendiente&limite=3")
+        self.assertContains(response, "Primera página")
+
+
+    def test_estado_invalido_rechazado_por_la_base(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Indicador.objects.update(estado='revisado')
+
+
+class TestPeriodosReporte(APITestCase):
+    def setUp(self):
+        organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.usuario = Usuario.objects.create_user(username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=organismo, aprobado=True)
+        self.medida = Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        self.anterior, self.primero, self.segundo = (
+            Indicador.objects.create(medida=self.medida, usuario=self.usuario, calculo_indicador=i, cumple_requisitos=False, periodo=periodo)
+            for i, periodo in enumerate([periodo_actual() - 1, periodo_actual(), periodo_actual()])
+        )
+        ResumenCumplimiento.objects.actualizar(self.medida.id, self.usuario.id)
+        self.client.force_authenticate(user=Usuario.objects.create_superuser(username="admin", password="clave-segura-123"))
+
+    def aprobar(self, indicador):
+        response = self.client.post(reverse("api_aprobar_indicador", args=[indicador.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def estados(self):
+        return dict(Indicador.objects.values_list('id', 'estado'))
+
+    def reemplazos(self):
+        return dict(Indicador.objects.values_list('id', 'reemplazado_por'))
+
+    def test_aprobar_reemplaza_al_aprobado_del_mismo_periodo(self):
+        for indicador in (self.anterior, self.primero, self.segundo):
+            self.aprobar(indicador)
+        # El reemplazado sigue aprobado, con su fecha de aprobación, como parte del historial.
+        self.assertEqual(set(self.estados().values()), {'aprobado'})
+        self.assertEqual(self.reemplazos(), {self.anterior.id: None, self.primero.id: self.segundo.id, self.segundo.id: None})
+        self.assertIsNotNone(Indicador.objects.get(pk=self.primero.pk).fecha_aprobacion)
+
+        # Volver a aprobar el primero lo deja vigente y el segundo pasa a reemplazado.
+        self.aprobar(self.primero)
+        self.assertEqual(self.reemplazos(), {self.anterior.id: None, self.primero.id: None, self.segundo.id: self.primero.id})
+        self.assertEqual(ResumenCumplimiento.objects.get(medida=self.medida, usuario=self.usuario).estado, 'aprobado')
+
+    def test_revision_en_bloque_aprueba_el_mas_reciente_del_periodo(self):
+        ids = [self.anterior.id, self.primero.id, self.segundo.id]
+        response = self.client.post(reverse("api_revisar_indicadores"), {"ids": ids, "accion": "aprobar"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["reemplazados"], [self.primero.id])
+        self.assertEqual(set(self.estados().values()), {'aprobado'})
+        self.assertEqual(self.reemplazos(), {self.anterior.id: None, self.primero.id: self.segundo.id, self.segundo.id: None})
+
+    def rechazar(self, *indicadores):
+        ids = [indicador.id for indicador in indicadores]
+        response = self.client.post(reverse("api_revisar_indicadores"), {"ids": ids, "accion": "rechazar", "motivo": "Falta firma"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_rechazar_el_vigente_restituye_el_ultimo_reemplazado(self):
+        tercero = Indicador.objects.create(medida=self.medida, usuario=self.usuario, calculo_indicador=3, periodo=periodo_actual())
+        for indicador in (self.primero, self.segundo, tercero):
+            self.aprobar(indicador)
+        self.assertEqual(self.reemplazos()[self.primero.id], self.segundo.id)
+
+        self.rechazar(tercero)
+        self.assertEqual(self.estados()[tercero.id], 'rechazado')
+        self.assertEqual(self.reemplazos(), {self.anterior.id: None, self.primero.id: self.segundo.id, self.segundo.id: None, tercero.id: None})
+
+        self.rechazar(self.segundo)
+        self.assertEqual(self.reemplazos(), {self.anterior.id: None, self.primero.id: None, self.segundo.id: None, tercero.id: None})
+        self.assertEqual(self.estados()[self.primero.id], 'aprobado')
+
+    def test_rechazar_en_bloque_la_cadena_de_reemplazos(self):
+        tercero = Indicador.objects.create(medida=self.medida, usuario=self.usuario, calculo_indicador=3, periodo=periodo_actual())
+        for indicador in (self.primero, self.segundo, tercero):
+            self.aprobar(indicador)
+        self.rechazar(self.segundo, tercero)
+        self.assertEqual(self.reemplazos(), {self.anterior.id: None, self.primero.id: None, self.segundo.id: None, tercero.id: None})
+        self.assertEqual(self.estados(), {
+            self.anterior.id: 'pendiente', self.primero.id: 'aprobado', self.segundo.id: 'rechazado', tercero.id: 'rechazado'
+        })
+
+    def test_un_solo_aprobado_por_periodo_en_la_base(self):
+        Indicador.objects.filter(pk=self.primero.pk).update(estado='aprobado')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Indicador.objects.filter(pk=self.segundo.pk).update(estado='aprobado')
+        Indicador.objects.filter(pk=self.primero.pk).update(reemplazado_por=self.segundo)
+        Indicador.objects.filter(pk=self.segundo.pk).update(estado='aprobado')
+
+class TestMigracionEstadoIndicador(TransactionTestCase):
+    anterior = [('proyecto_prevencion', '0022_indices_consultas')]
+    siguiente = [('proyecto_prevencion', '0023_indicador_estado')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_estado_desde_campos_anteriores(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.anterior)
+        apps = executor.loader.project_state(self.anterior).apps
+        organismo = apps.get_model('proyecto_prevencion', 'OrganismoPublico').objects.create(nombre_organismo="Organismo")
+        medida = apps.get_model('proyecto_prevencion', 'Medida').objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        usuario = apps.get_model('proyecto_prevencion', 'Usuario').objects.create(username="usuario@organismo.cl")
+        modelo = apps.get_model('proyecto_prevencion', 'Indicador')
+        ahora = timezone.now()
+        campos = {
+            'aprobado': {'cumple_requisitos': True, 'fecha_aprobacion': ahora},
+            'rechazado': {'cumple_requisitos': False, 'fecha_rechazo': ahora},
+            'pendiente': {'cumple_requisitos': False},
+        }
+        ids = {
+            modelo.objects.create(medida=medida, usuario=usuario, calculo_indicador=0, **valores).id: estado
+            for estado, valores in campos.items()
         }
-        response = self.client.post(url, data, format="json")
-        print(response.data)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.siguiente)
+        modelo = executor.loader.project_state(self.siguiente).apps.get_model('proyecto_prevencion', 'Indicador')
+        self.assertEqual(dict(modelo.objects.values_list('id', 'estado')), ids)
+
+
+class TestMigracionPeriodoIndicador(TransactionTestCase):
+    anterior = [('proyecto_prevencion', '0023_indicador_estado')]
+    siguiente = [('proyecto_prevencion', '0024_indicador_periodo')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_aprobados_repetidos_conservan_su_historial(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.anterior)
+        apps = executor.loader.project_state(self.anterior).apps
+        organismo = apps.get_model('proyecto_prevencion', 'OrganismoPublico').objects.create(nombre_organismo="Organismo")
+        medida = apps.get_model('proyecto_prevencion', 'Medida').objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        usuario = apps.get_model('proyecto_prevencion', 'Usuario').objects.create(username="usuario@organismo.cl")
+        modelo = apps.get_model('proyecto_prevencion', 'Indicador')
+        aprobacion = timezone.now() - timedelta(days=1)
+        antiguo, reciente = (
+            modelo.objects.create(
+                medida=medida, usuario=usuario, calculo_indicador=0, cumple_requisitos=True,
+                estado='aprobado', fecha_aprobacion=aprobacion
+            )
+            for _ in range(2)
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.siguiente)
+        modelo = executor.loader.project_state(self.siguiente).apps.get_model('proyecto_prevencion', 'Indicador')
+        self.assertEqual(
+            list(modelo.objects.order_by('id').values_list('estado', 'fecha_aprobacion', 'reemplazado_por_id')),
+            [('aprobado', aprobacion, reciente.id), ('aprobado', aprobacion, None)]
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.anterior)
+        modelo = executor.loader.project_state(self.anterior).apps.get_model('proyecto_prevencion', 'Indicador')
+        self.assertEqual(list(modelo.objects.values_list('estado', flat=True)), ['aprobado', 'aprobado'])
+
+
+class TestDocumentosSubidos(APITestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        configuracion = override_settings(
+            MEDIA_ROOT=os.path.join(self.directorio, 'media'),
+            CARGAS_PARCIALES_DIR=os.path.join(self.directorio, 'tmp'),
+        )
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.usuario = Usuario.objects.create_user(username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=self.organismo, aprobado=True)
+        self.medida = Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=self.organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        self.documento = DocumentoRequerido.objects.create(medida=self.medida, descripcion="Informe")
+        self.client.force_authenticate(user=self.usuario)
+
+    def enviar(self, carga_id, offset, contenido):
+        return self.client.patch(
+            reverse("api_carga", kwargs={"carga_id": carga_id}),
+            data=contenido,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_carga_por_partes_y_finalizacion(self):
+        contenido = b"%PDF-" + b"x" * 1000
+        response = self.client.post(reverse("api_crear_carga", kwargs={"medida_id": self.medida.id}), {
+            "documento_requerido": self.documento.id,
+            "nombre_archivo": "informe.pdf",
+            "tamano_total": len(contenido),
+        })
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        carga_id = response.data["id"]
+
+        response = self.client.post(reverse("api_finalizar_cargas", kwargs={"medida_id": self.medida.id}))
+        self.assertEqual(response.data["pendientes"], [self.documento.id])
+
+        self.assertEqual(self.enviar(carga_id, 0, contenido[:400]).data["offset"], 400)
+        # Un reintento con un offset desfasado no duplica bytes.
+        response = self.enviar(carga_id, 0, contenido[:400])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response["Upload-Offset"], "400")
+        self.assertEqual(self.enviar(carga_id, 400, contenido[400:]).data["offset"], len(contenido))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("api_finalizar_cargas", kwargs={"medida_id": self.medida.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        documento = DocumentoSubido.objects.get(indicador__medida=self.medida)
+        with documento.archivo.open('rb') as archivo:
+            self.assertEqual(archivo.read(), contenido)
+        self.assertFalse(CargaDocumento.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.directorio, 'tmp')), [])
+
+    def test_no_acepta_mas_bytes_que_lo_declarado(self):
+        carga = CargaDocumento.objects.create(
+            usuario=self.usuario, medida=self.medida, documento_requerido=self.documento,
+            nombre_archivo="informe.pdf", tamano_total=10
+        )
+        response = self.enviar(carga.id, 0, b"x" * 20)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_escritura_concurrente_usa_el_offset_registrado(self):
+        carga = CargaDocumento.objects.create(
+            usuario=self.usuario, medida=self.medida, documento_requerido=self.documento,
+            nombre_archivo="informe.pdf", tamano_total=10
+        )
+        # Otra petición ya escribió los primeros bytes; esta instancia quedó con el offset anterior.
+        otra = CargaDocumento.objects.get(pk=carga.pk)
+        otra.escribir(BytesIO(b"01234"), 0)
+        with self.assertRaises(ValueError):
+            carga.escribir(BytesIO(b"01234"), 0)
+        self.assertEqual(carga.offset, 5)
+        with open(carga.ruta_temporal, 'rb') as archivo:
+            self.assertEqual(archivo.read(), b"01234")
+
+    def test_falla_al_registrar_no_deja_archivos(self):
+        archivos = [(self.documento, ContentFile(b"contenido", name="informe.pdf"))]
+        with mock.patch.object(ResumenCumplimiento.objects, 'actualizar', side_effect=RuntimeError("falla")):
+            with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+                registrar_indicador(self.medida, self.usuario, archivos)
+        self.assertFalse(Indicador.objects.exists())
+        self.assertEqual(list(listar_archivos(default_storage)), [])
+
+    def test_falla_al_finalizar_no_deja_archivos(self):
+        carga = CargaDocumento.objects.create(
+            usuario=self.usuario, medida=self.medida, documento_requerido=self.documento,
+            nombre_archivo="informe.pdf", tamano_total=9
+        )
+        carga.escribir(BytesIO(b"contenido"), 0)
+        with mock.patch.object(ResumenCumplimiento.objects, 'actualizar', side_effect=RuntimeError("falla")):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse("api_finalizar_cargas", kwargs={"medida_id": self.medida.id}))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(Indicador.objects.exists())
+        self.assertFalse(ArchivoAlmacenado.objects.exists())
+        self.assertEqual(list(listar_archivos(default_storage)), [])
+        # La carga se conserva para volver a finalizarla.
+        self.assertTrue(CargaDocumento.objects.get(pk=carga.pk).completa)
+
+    def test_limpiar_archivos_huerfanos(self):
+        registrar_indicador(self.medida, self.usuario, [(self.documento, ContentFile(b"valido", name="informe.pdf"))])
+        # Un archivo guardado cuya transacción aún no crea el DocumentoSubido tiene su referencia registrada.
+        en_uso = default_storage.save("en_uso.pdf", ContentFile(b"en uso"))
+        # Sin referencia registrada, p. ej. si el proceso se cayó después de escribirlo.
+        huerfano = "ab/cd/huerfano.pdf"
+        os.makedirs(os.path.dirname(default_storage.path(huerfano)))
+        with open(default_storage.path(huerfano), 'wb') as archivo:
+            archivo.write(b"huerfano")
+        call_command('limpiar_archivos_huerfanos', '--minutos=0', stdout=StringIO())
+        self.assertEqual(
+            sorted(listar_archivos(default_storage)),
+            sorted([DocumentoSubido.objects.get().archivo.name, en_uso])
+        )
+        self.assertFalse(default_storage.exists(huerfano))
+
+    def test_subir_documentos(self):
+        response = self.client.post(
+            reverse("api_subir_documentos", kwargs={"medida_id": self.medida.id}),
+            {f"doc_{self.documento.id}": SimpleUploadedFile("informe.pdf", b"contenido")},
+            format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(DocumentoSubido.objects.filter(indicador__medida=self.medida).count(), 1)
+
+    def test_documentos_repetidos_se_guardan_una_vez(self):
+        contenido = b"%PDF- mismo informe"
+        primero = registrar_indicador(self.medida, self.usuario, [(self.documento, ContentFile(contenido, name="informe.pdf"))])
+        segundo = registrar_indicador(self.medida, self.usuario, [(self.documento, ContentFile(contenido, name="copia.PDF"))])
+        nombre = primero.documentos_subidos.get().archivo.name
+        self.assertEqual(segundo.documentos_subidos.get().archivo.name, nombre)
+        sha256 = hashlib.sha256(contenido).hexdigest()
+        self.assertEqual(nombre, f"{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf")
+        self.assertEqual(list(listar_archivos(default_storage)), [nombre])
+        self.assertEqual(ArchivoAlmacenado.objects.get(ruta=nombre).referencias, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primero.delete()
+        self.assertTrue(default_storage.exists(nombre))
+        self.assertEqual(ArchivoAlmacenado.objects.get(ruta=nombre).referencias, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            segundo.delete()
+        self.assertFalse(default_storage.exists(nombre))
+        self.assertFalse(ArchivoAlmacenado.objects.exists())
+
+    def test_eliminacion_revertida_conserva_el_archivo(self):
+        indicador = registrar_indicador(self.medida, self.usuario, [(self.documento, ContentFile(b"contenido", name="informe.pdf"))])
+        nombre = indicador.documentos_subidos.get().archivo.name
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                indicador.delete()
+                raise RuntimeError("falla")
+        self.assertTrue(default_storage.exists(nombre))
+        self.assertEqual(ArchivoAlmacenado.objects.get(ruta=nombre).referencias, 1)
+        self.assertTrue(DocumentoSubido.objects.filter(archivo=nombre).exists())
+
+    def test_servir_documento_con_permisos(self):
+        contenido = b"0123456789" * 10
+        indicador = registrar_indicador(self.medida, self.usuario, [(self.documento, ContentFile(contenido, name="informe.pdf"))])
+        url = indicador.documentos_subidos.get().archivo.url
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(b"".join(response.streaming_content), contenido)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(contenido)}")
+        self.assertEqual(b"".join(response.streaming_content), contenido[10:20])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(contenido)}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        otro = Usuario.objects.create_user(
+            username="otro@organismo.cl", password="clave-segura-123",
+            organismo=OrganismoPublico.objects.create(nombre_organismo="Otro"), aprobado=True
+        )
+        self.client.force_authenticate(user=otro)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(MEDIA_SERVIDOR='nginx', MEDIA_ACCEL_PREFIX='/protegido/')
+    def test_servir_documento_delega_en_nginx(self):
+        indicador = registrar_indicador(self.medida, self.usuario, [(self.documento, ContentFile(b"contenido", name="informe.pdf"))])
+        archivo = indicador.documentos_subidos.get().archivo
+        self.client.force_authenticate(user=Usuario.objects.create_superuser(username="admin", password="clave-segura-123"))
+        response = self.client.get(archivo.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protegido/{archivo.name}")
+        self.assertEqual(response.content, b"")
+
+
+class TestCacheCatalogos(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        self.client.force_authenticate(user=self.admin)
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=self.organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+
+    def test_listado_se_sirve_desde_cache(self):
+        url = reverse("api_organismo_list")
+        self.client.get(url)
+        # Solo se consulta la versión del catálogo (para el ETag y para la cache).
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual([o["nombre_organismo"] for o in response.data["data"]], ["Talento Futuro"])
 
-    def test_get_usuario(self):
-        url = reverse("usuario-detail", kwargs={"pk": self.usuario.id_usuario})
+    def test_cambios_invalidan_el_catalogo(self):
+        url = reverse("api_organismo_list")
+        self.client.get(url)
+        self.organismo.nombre_organismo = "Nuevo Nombre"
+        self.organismo.save()
         response = self.client.get(url)
-        # Comprueba que el status code sea 200 OK
+        self.assertEqual([o["nombre_organismo"] for o in response.data["data"]], ["Nuevo Nombre"])
+
+    def test_get_condicional(self):
+        url = reverse("api_organismo_list")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        OrganismoPublico.objects.create(nombre_organismo="Otro Organismo")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
 
-class TestOrganismoPublico(APITestCase):
-    def test_create_organismo(self):
-        url = reverse("organismopublico-list")
+    def test_listado_de_usuarios_condicional(self):
+        usuario = Usuario.objects.create_user(username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=self.organismo)
+        url = reverse("api_admin_usuarios")
+        response = self.client.get(url)
+        [datos] = response.data["data"]["pending_users"]
+        self.assertFalse({'password', 'version_token', 'last_login', 'groups', 'user_permissions'} & set(datos))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        usuario.is_active = False
+        usuario.save()
+        nueva = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(nueva.status_code, status.HTTP_200_OK)
+        self.assertFalse(nueva.data["data"]["pending_users"][0]["is_active"])
+
+    def test_documentos_requeridos_invalidan_medidas(self):
+        url = reverse("api_medida_list")
+        self.client.get(url)
+        DocumentoRequerido.objects.create(medida=Medida.objects.get(), descripcion="Informe")
+        response = self.client.get(url)
+        self.assertEqual([d["descripcion"] for d in response.data["data"][0]["documentos_requeridos"]], ["Informe"])
+
+    def test_aprobar_solo_invalida_si_cambia_la_medida(self):
+        medida = Medida.objects.get()
+        usuario = Usuario.objects.create_user(username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=self.organismo, aprobado=True)
+        primero, segundo = [
+            Indicador.objects.create(medida=medida, usuario=usuario, calculo_indicador=0, cumple_requisitos=False, periodo=periodo)
+            for periodo in (periodo_actual() - 1, periodo_actual())
+        ]
+        url = reverse("api_medida_list")
+        self.client.post(reverse("api_aprobar_indicador", kwargs={"pk": primero.id}))
+        etag = self.client.get(url)["ETag"]
+        # La próxima fecha de carga ya quedó calculada para hoy; la segunda aprobación no cambia el catálogo.
+        self.client.post(reverse("api_aprobar_indicador", kwargs={"pk": segundo.id}))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class TestFormulariosDocumentos(APITestCase):
+    def setUp(self):
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.medida = Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=self.organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        DocumentoRequerido.objects.create(medida=self.medida, descripcion="Informe")
+        self.medida.refresh_from_db()
+
+    def test_formularios_se_reutilizan(self):
+        documentos, serializer, form = formularios_documentos(self.medida)
+        with self.assertNumQueries(0):
+            self.assertEqual(formularios_documentos(Medida(pk=self.medida.pk, version_documentos=self.medida.version_documentos)), (documentos, serializer, form))
+        self.assertEqual(list(serializer().fields), [f"doc_{documentos[0].id}"])
+        self.assertEqual(list(form().fields), [f"doc_{documentos[0].id}"])
+
+    def test_guardar_medida_invalida_formularios(self):
+        _, serializer_anterior, _ = formularios_documentos(self.medida)
         data = {
-            "nombre_organismo": "Talento Futuro"
+            "nombre_corto": "Medida", "nombre_largo": "Medida de prueba", "organismo": self.organismo.id,
+            "regulatorio": True, "descripcion_formula": "Sin fórmula", "tipo_formula": "Numero",
+            "frecuencia": "anual", "datos_requeridos": json.dumps(["Informe", "Certificado"]),
         }
-        response = self.client.post(url, data, format="json")
-        print(response.data)
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(OrganismoPublico.objects.get().nombre_organismo, "Talento Futuro")
\ No newline at end of file
+        form = MedidaForm(data, instance=self.medida)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        medida = Medida.objects.get(pk=self.medida.pk)
+        documentos, serializer, _ = formularios_documentos(medida)
+        self.assertIsNot(serializer, serializer_anterior)
+        self.assertEqual([d.descripcion for d in documentos], ["Informe", "Certificado"])
+        self.assertEqual(list(serializer().fields), [f"doc_{d.id}" for d in documentos])
+
+    def test_guardar_medida_desactualizada_conserva_la_version(self):
+        desactualizada = Medida.objects.get(pk=self.medida.pk)
+        DocumentoRequerido.objects.create(medida=self.medida, descripcion="Certificado")
+        desactualizada.nombre_corto = "Medida editada"
+        desactualizada.save()
+
+        medida = Medida.objects.get(pk=self.medida.pk)
+        self.assertEqual(medida.nombre_corto, "Medida editada")
+        self.assertNotEqual(medida.version_documentos, desactualizada.version_documentos)
+        documentos, _, _ = formularios_documentos(medida)
+        self.assertEqual([d.descripcion for d in documentos], ["Informe", "Certificado"])
+
+
+class TestBandejaCorreos(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.client.force_authenticate(user=self.admin)
+
+    def crear_usuarios(self, cantidad):
+        return [
+            Usuario.objects.create_user(
+                username=f"usuario{i}@talentofuturo.cl", email=f"usuario{i}@talentofuturo.cl",
+                password="clave-segura-123", organismo=self.organismo
+            )
+            for i in range(cantidad)
+        ]
+
+    def test_aprobaciones_se_envian_en_una_conexion(self):
+        for usuario in self.crear_usuarios(3):
+            response = self.client.post(reverse("api_aprobar_usuario", kwargs={"user_id": usuario.id}))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(CorreoPendiente.objects.filter(estado='pendiente').count(), 3)
+
+        with mock.patch('proyecto_prevencion.management.commands.enviar_correos.get_connection', wraps=mail.get_connection) as get_connection:
+            call_command('enviar_correos', stdout=StringIO())
+        get_connection.assert_called_once()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"usuario{i}@talentofuturo.cl" for i in range(3)])
+        self.assertEqual(CorreoPendiente.objects.filter(estado='enviado').count(), 3)
+
+    def test_errores_se_reintentan(self):
+        usuario = self.crear_usuarios(1)[0]
+        self.client.post(reverse("api_aprobar_usuario", kwargs={"user_id": usuario.id}))
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError("Servidor no disponible")):
+            call_command('enviar_correos', '--max-intentos=2', stdout=StringIO(), stderr=StringIO())
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual((correo.estado, correo.intentos, correo.ultimo_error), ('pendiente', 1, "Servidor no disponible"))
+        self.assertGreater(correo.proximo_intento, timezone.now())
+
+        # No se reintenta antes de tiempo; al cumplirse el plazo y volver a fallar, queda como fallido.
+        call_command('enviar_correos', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        CorreoPendiente.objects.update(proximo_intento=timezone.now())
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError("Servidor no disponible")):
+            call_command('enviar_correos', '--max-intentos=2', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(CorreoPendiente.objects.get().estado, 'fallido')
+
+    def test_correos_reservados_se_retoman_al_vencer(self):
+        usuario = self.crear_usuarios(1)[0]
+        self.client.post(reverse("api_aprobar_usuario", kwargs={"user_id": usuario.id}))
+        # Otro worker reservó el correo y aún lo está enviando.
+        CorreoPendiente.objects.update(estado='enviando', proximo_intento=timezone.now() + timedelta(minutes=5))
+        call_command('enviar_correos', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+        # El worker se cayó: al vencer la reserva, el correo se envía.
+        CorreoPendiente.objects.update(proximo_intento=timezone.now())
+        call_command('enviar_correos', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(CorreoPendiente.objects.get().estado, 'enviado')
+
+
+class TestVistasAsincronas(APITestCase):
+    def setUp(self):
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.usuario = Usuario.objects.create_user(
+            username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=self.organismo, aprobado=True
+        )
+        self.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        self.medida = Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=self.organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        DocumentoRequerido.objects.create(medida=self.medida, descripcion="Informe")
+        Indicador.objects.create(medida=self.medida, usuario=self.usuario, calculo_indicador=0, cumple_requisitos=False)
+        ResumenCumplimiento.objects.actualizar(self.medida.id, self.usuario.id)
+
+    def autorizacion(self, usuario):
+        return {"Authorization": f"Bearer {TokenUsuarioSerializer.get_token(usuario).access_token}"}
+
+    def test_middleware_compatible_con_asgi(self):
+        for ruta in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(ruta), 'async_capable', False), ruta)
+
+    async def test_dashboard_igual_al_sincrono(self):
+        headers = self.autorizacion(self.usuario)
+        sincrono = await self.async_client.get(reverse("api_usuario_dashboard"), headers=headers)
+        asincrono = await self.async_client.get(reverse("api_async_usuario_dashboard"), headers=headers)
+        self.assertEqual(asincrono.status_code, status.HTTP_200_OK)
+        self.assertEqual(asincrono.json(), sincrono.json())
+        self.assertEqual(asincrono["ETag"], sincrono["ETag"])
+
+        response = await self.async_client.get(reverse("api_async_usuario_dashboard"), headers={**headers, "If-None-Match": asincrono["ETag"]})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_documentos_requeridos(self):
+        url = reverse("api_async_documentos_requeridos", kwargs={"medida_id": self.medida.id})
+        response = await self.async_client.get(url, headers=self.autorizacion(self.usuario))
+        self.assertEqual([d["descripcion"] for d in response.json()], ["Informe"])
+
+    async def test_autenticacion_y_permisos(self):
+        url = reverse("api_async_organismo_list")
+        self.assertEqual((await self.async_client.get(url)).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(url, headers={"Authorization": "Bearer token-invalido"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(url, headers=self.autorizacion(self.usuario))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.async_client.get(url, headers=self.autorizacion(self.admin))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([o["nombre_organismo"] for o in response.json()["data"]], ["Talento Futuro"])
+
+
+class TestAutenticacionClaims(APITestCase):
+    def setUp(self):
+        organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.usuario = Usuario.objects.create_user(
+            username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=organismo, aprobado=True
+        )
+        self.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        medida = Medida.objects.create(
+            nombre_corto="Medida", nombre_largo="Medida de prueba", organismo=organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+        DocumentoRequerido.objects.create(medida=medida, descripcion="Informe")
+        self.url = reverse("api_documentos_requeridos", kwargs={"medida_id": medida.id})
+        self.url_async = reverse("api_async_documentos_requeridos", kwargs={"medida_id": medida.id})
+        cache.clear()
+
+    def obtener_tokens(self, username):
+        response = self.client.post(reverse("token_obtain_pair"), {"username": username, "password": "clave-segura-123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["access"], response.data["refresh"]
+
+    def get(self, url, token):
+        return self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_sin_consultar_el_usuario(self):
+        access, _ = self.obtener_tokens(self.usuario.username)
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.get(self.url, access).status_code, status.HTTP_200_OK)
+        tabla = Usuario._meta.db_table
+        self.assertFalse([q["sql"] for q in capturadas if tabla in q["sql"]])
+
+    def test_desactivar_revoca_los_tokens(self):
+        access, refresh = self.obtener_tokens(self.usuario.username)
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_200_OK)
+
+        admin, _ = self.obtener_tokens(self.admin.username)
+        response = self.client.post(reverse("api_desactivar_usuario", args=[self.usuario.id]), HTTP_AUTHORIZATION=f"Bearer {admin}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get(self.url_async, access).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse("token_refresh"), {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_renovar_actualiza_los_claims(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(aprobado=False)
+        access, refresh = self.obtener_tokens(self.usuario.username)
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_403_FORBIDDEN)
+
+        Usuario.objects.filter(pk=self.usuario.pk).update(aprobado=True)
+        response = self.client.post(reverse("token_refresh"), {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(self.url, response.data["access"]).status_code, status.HTTP_200_OK)
+
+    def test_cambiar_organismo_revoca_los_tokens(self):
+        access, _ = self.obtener_tokens(self.usuario.username)
+        self.usuario.first_name = "Nombre"
+        self.usuario.save()
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_200_OK)
+
+        self.usuario.organismo = OrganismoPublico.objects.create(nombre_organismo="Otro Organismo")
+        # La versión cacheada se elimina recién al confirmar la transacción.
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.usuario.save()
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_200_OK)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_401_UNAUTHORIZED)
+        # La instancia guardada conserva la versión revocada: volver a guardarla no rehabilita los tokens.
+        self.usuario.save()
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_desactivar_revoca_los_tokens(self):
+        access, refresh = self.obtener_tokens(self.usuario.username)
+        self.usuario.is_active = False
+        self.usuario.save(update_fields=['is_active'])
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse("token_refresh"), {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_renovar_con_rotacion(self):
+        _, refresh = self.obtener_tokens(self.usuario.username)
+        # simplejwt registra el token rotado en la app de blacklist, que este proyecto no instala.
+        with mock.patch('rest_framework_simplejwt.serializers.api_settings.ROTATE_REFRESH_TOKENS', True), \
+                mock.patch.object(RefreshToken, 'outstand'):
+            response = self.client.post(reverse("token_refresh"), {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotado = RefreshToken(response.data["refresh"])
+        self.assertNotEqual(str(rotado), refresh)
+        self.assertEqual(rotado["organismo_id"], self.usuario.organismo_id)
+        self.assertEqual(self.get(self.url, response.data["access"]).status_code, status.HTTP_200_OK)
+
+    def test_tokens_sin_claims_siguen_siendo_validos(self):
+        access = RefreshToken.for_user(self.usuario).access_token
+        self.assertEqual(self.get(self.url, access).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(self.url_async, access).status_code, status.HTTP_200_OK)
+
+class TestEsquemaApi(APITestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        esquema_pregenerado.cache_clear()
+        self.addCleanup(esquema_pregenerado.cache_clear)
+
+    def test_esquema_pregenerado(self):
+        with override_settings(STATIC_ROOT=self.static_root, ESQUEMA_API_PREGENERADO=True):
+            call_command('generar_esquema', stdout=StringIO(), stderr=StringIO())
+            archivo = esquema_pregenerado()
+            with open(os.path.join(self.static_root, archivo)) as esquema:
+                self.assertIn("/api/usuario/dashboard/", json.load(esquema)["paths"])
+
+            self.assertContains(self.client.get(reverse("swagger-ui")), f"/static/{archivo}")
+
+            # /api/schema/ entrega el cuerpo del esquema, en YAML por defecto como SpectacularAPIView.
+            response = self.client.get(reverse("schema"))
+            self.assertEqual(response["Content-Type"], "application/vnd.oai.openapi")
+            self.assertIn("/api/usuario/dashboard/:", b"".join(response.streaming_content).decode())
+            self.assertEqual(self.client.get(reverse("schema"), HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+            response = self.client.get(reverse("schema"), {"format": "json"})
+            self.assertEqual(response["Content-Type"], "application/vnd.oai.openapi+json")
+            self.assertIn("/api/usuario/dashboard/", json.loads(b"".join(response.streaming_content))["paths"])
+
+    def test_regenerar_conserva_el_esquema_anterior(self):
+        directorio = os.path.join(self.static_root, 'esquema')
+        with override_settings(STATIC_ROOT=self.static_root, ESQUEMA_API_PREGENERADO=True):
+            os.makedirs(directorio)
+            for nombre in ("openapi.antiguo.json", "openapi.antiguo.json.gz", "openapi.anterior.json", "openapi.anterior.json.gz"):
+                open(os.path.join(directorio, nombre), 'w').close()
+            with open(os.path.join(directorio, 'manifest.json'), 'w') as manifiesto:
+                json.dump({"archivo": "openapi.anterior.json"}, manifiesto)
+
+            call_command('generar_esquema', stdout=StringIO(), stderr=StringIO())
+            archivos = [os.path.basename(esquema_pregenerado(formato)) for formato in ('json', 'yaml')]
+        self.assertEqual(
+            sorted(os.listdir(directorio)),
+            sorted(["manifest.json", "openapi.anterior.json", "openapi.anterior.json.gz"] + archivos + [f"{a}.gz" for a in archivos])
+        )
+
+    def test_sin_esquema_pregenerado_se_genera(self):
+        with override_settings(STATIC_ROOT=self.static_root, ESQUEMA_API_PREGENERADO=True):
+            response = self.client.get(reverse("schema"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b"/api/usuario/dashboard/", response.content)
+
+
+class TestConfiguracionProduccion(APITestCase):
+    def test_sin_barra_de_depuracion(self):
+        self.assertNotIn('debug_toolbar', settings.INSTALLED_APPS)
+        self.assertFalse(any(ruta.startswith('debug_toolbar') for ruta in settings.MIDDLEWARE))
+        self.assertEqual(self.client.get("/__debug__/render_panel/").status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestServerTiming(APITestCase):
+    def setUp(self):
+        self.organismo = OrganismoPublico.objects.create(nombre_organismo="Talento Futuro")
+        self.usuario = Usuario.objects.create_user(
+            username="usuario@talentofuturo.cl", password="clave-segura-123", organismo=self.organismo, aprobado=True
+        )
+        self.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        metricas_vistas.reiniciar()
+        self.addCleanup(metricas_vistas.reiniciar)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_encabezado_server_timing(self):
+        self.client.force_authenticate(user=self.usuario)
+        response = self.client.get(reverse("api_usuario_dashboard"))
+        entradas = [entrada.split(";")[0] for entrada in response["Server-Timing"].split(", ")]
+        self.assertEqual(entradas, ["db", "vista", "render", "total"])
+
+    async def test_encabezado_en_vista_asincrona(self):
+        token = RefreshToken.for_user(self.usuario).access_token
+        with self.settings(SERVER_TIMING=True):
+            response = await self.async_client.get(reverse("api_async_usuario_dashboard"), headers={"Authorization": f"Bearer {token}"})
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="[1-9]\d* consultas"')
+
+    def test_histogramas_por_vista(self):
+        self.client.force_authenticate(user=self.usuario)
+        for _ in range(3):
+            self.client.get(reverse("api_usuario_dashboard"))
+        self.assertNotIn("Server-Timing", self.client.get(reverse("api_usuario_dashboard")))
+
+        self.client.force_authenticate(user=self.admin)
+        data = self.client.get(reverse("api_metricas")).data["data"]
+        self.assertEqual(data["api_usuario_dashboard"]["total"]["cantidad"], 4)
+        self.assertGreater(data["api_usuario_dashboard"]["consultas"]["promedio"], 0)
+
+
+# Ruta, rol que la consulta, presupuesto de consultas, método, status esperado y función que prepara
+# (dentro de la transacción de la medición) los kwargs de la URL y los argumentos de la petición.
+Caso = namedtuple('Caso', ['ruta', 'rol', 'presupuesto', 'metodo', 'esperado', 'preparar'], defaults=['get', 200, None])
+
+LINEA_BASE_RENDIMIENTO = os.path.join(os.path.dirname(__file__), 'linea_base_rendimiento.json')
+
+
+class TestPresupuestoConsultas(APITestCase):
+    """
+    Recorre todas las rutas de la API y del frontend con volúmenes de datos realistas y verifica que cada una
+    se mantenga dentro de su presupuesto de consultas: con estos volúmenes, un N+1 lo excede por decenas.
+    Los tiempos se registran en LINEA_BASE_RENDIMIENTO (con ACTUALIZAR_LINEA_BASE=1 se regenera) y solo se
+    comparan con ella si VERIFICAR_TIEMPOS=1: en runners compartidos el tiempo de reloj no es confiable.
+    """
+    ORGANISMOS = 3
+    MEDIDAS_POR_ORGANISMO = 20
+    DOCUMENTOS_POR_MEDIDA = 3
+    USUARIOS_POR_ORGANISMO = 3
+    REPETICIONES = 3
+    # Un tiempo falla si supera TOLERANCIA veces el de la línea base más MARGEN_MS.
+    TOLERANCIA = float(os.environ.get('TOLERANCIA_TIEMPOS', 3))
+    MARGEN_MS = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(username="admin", password="clave-segura-123")
+        ComunaPlan.objects.bulk_create(ComunaPlan(nombre_comuna=f"Comuna {i}") for i in range(30))
+        tipos = TiposMedidas.objects.bulk_create(TiposMedidas(nombre_tipo_medida=f"Tipo {i}") for i in range(5))
+        organismos = OrganismoPublico.objects.bulk_create(
+            OrganismoPublico(nombre_organismo=f"Organismo {i}") for i in range(cls.ORGANISMOS)
+        )
+        usuarios = Usuario.objects.bulk_create(
+            Usuario(username=f"usuario{i}@organismo{o.id}.cl", organismo=o, aprobado=True)
+            for o in organismos for i in range(cls.USUARIOS_POR_ORGANISMO)
+        )
+        cls.pendientes = Usuario.objects.bulk_create(
+            Usuario(username=f"pendiente{i}@organismo.cl", organismo=organismos[0]) for i in range(5)
+        )
+        medidas = Medida.objects.bulk_create(
+            Medida(
+                nombre_corto=f"Medida {o.id}-{i}", nombre_largo=f"Medida de prueba {i}", organismo=o,
+                tipo_medida=tipos[i % len(tipos)], descripcion_formula="Sin fórmula", tipo_formula="Numero",
+                frecuencia="anual" if i % 2 else "unica"
+            )
+            for o in organismos for i in range(cls.MEDIDAS_POR_ORGANISMO)
+        )
+        documentos = DocumentoRequerido.objects.bulk_create(
+            DocumentoRequerido(medida=m, descripcion=f"Documento {i}") for m in medidas for i in range(cls.DOCUMENTOS_POR_MEDIDA)
+        )
+        ahora = timezone.now()
+        # Por usuario y medida de su organismo: un indicador aprobado del período anterior y otro del actual
+        # pendiente, rechazado o aprobado.
+        indicadores = Indicador.objects.bulk_create(
+            Indicador(
+                medida=m, usuario=u, calculo_indicador=i, periodo=periodo_actual() - 1 + i,
+                cumple_requisitos=(i == 0 or m.id % 3 == 0),
+                fecha_rechazo=ahora if i == 1 and m.id % 3 == 1 else None,
+                estado='aprobado' if i == 0 or m.id % 3 == 0 else 'rechazado' if m.id % 3 == 1 else 'pendiente',
+            )
+            for u in usuarios for m in medidas if m.organismo_id == u.organismo_id for i in range(2)
+        )
+        por_medida = {}
+        for documento in documentos:
+            por_medida.setdefault(documento.medida_id, []).append(documento)
+        DocumentoSubido.objects.bulk_create(
+            DocumentoSubido(indicador=indicador, documento_requerido=d, archivo=f"uploads/{indicador.id}-{d.id}.pdf")
+            for indicador in indicadores for d in por_medida[indicador.medida_id]
+        )
+        call_command('reconstruir_resumen', stdout=StringIO())
+
+        cls.organismo = organismos[0]
+        cls.usuario, cls.otro_usuario = usuarios[:2]
+        cls.medida = medidas[0]
+        cls.comuna = ComunaPlan.objects.first()
+        cls.tipo = tipos[0]
+        cls.pendientes_revision = list(
+            Indicador.objects.filter(usuario=cls.usuario, estado='pendiente').values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        configuracion = override_settings(
+            MEDIA_ROOT=os.path.join(self.directorio, 'media'),
+            CARGAS_PARCIALES_DIR=os.path.join(self.directorio, 'tmp'),
+        )
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+
+    # ------ Preparación de las peticiones ------
+
+    def medida_nueva(self):
+        return Medida.objects.create(
+            nombre_corto="Nueva", nombre_largo="Medida nueva", organismo=self.organismo,
+            descripcion_formula="Sin fórmula", tipo_formula="Numero", frecuencia="anual"
+        )
+
+    def datos_medida(self):
+        return {
+            "nombre_corto": "Nueva", "nombre_largo": "Medida nueva", "organismo": self.organismo.id,
+            "tipo_medida": self.tipo.id, "regulatorio": True, "descripcion_formula": "Sin fórmula",
+            "tipo_formula": "Numero", "frecuencia": "anual",
+        }
+
+    def archivos(self):
+        # Contenido distinto en cada repetición, para que el almacenamiento por contenido no lo reutilice.
+        return {
+            f"doc_{documento.id}": SimpleUploadedFile("informe.pdf", os.urandom(64))
+            for documento in self.medida.documentos_requeridos.all()
+        }
+
+    def carga(self):
+        return CargaDocumento.objects.create(
+            usuario=self.usuario, medida=self.medida, documento_requerido=self.medida.documentos_requeridos.first(),
+            nombre_archivo="informe.pdf", tamano_total=64
+        )
+
+    def cargas_completas(self):
+        CargaDocumento.objects.filter(usuario=self.usuario).delete()
+        for documento in self.medida.documentos_requeridos.all():
+            carga = CargaDocumento.objects.create(
+                usuario=self.usuario, medida=self.medida, documento_requerido=documento,
+                nombre_archivo="informe.pdf", tamano_total=64
+            )
+            carga.escribir(BytesIO(os.urandom(64)), 0)
+        return {"medida_id": self.medida.id}, {}
+
+    def casos(self):
+        medida = {"medida_id": self.medida.id}
+        json_ = lambda data: {"data": data, "format": "json"}
+        return [
+            # API: administración de usuarios
+            Caso('api_admin_usuarios', 'admin', 4),
+            Caso('api_aprobar_usuario', 'admin', 8, 'post', 200, lambda: ({"user_id": self.pendientes[0].id}, {})),
+            Caso('api_desactivar_usuario', 'admin', 5, 'post', 200, lambda: ({"user_id": self.otro_usuario.id}, {})),
+            # API: catálogos
+            Caso('api_organismo_list', 'admin', 4),
+            Caso('api_organismo_create', 'admin', 14, 'post', 200, lambda: ({}, json_({"nombre_organismo": "Nuevo"}))),
+            Caso('api_organismo_update', 'admin', 15, 'put', 200, lambda: ({"pk": self.organismo.id}, json_({"nombre_organismo": "Otro"}))),
+            Caso('api_organismo_delete', 'admin', 14, 'delete', 200,
+                 lambda: ({"pk": OrganismoPublico.objects.create(nombre_organismo="Nuevo").id}, {})),
+            Caso('api_comuna_list', 'admin', 4),
+            Caso('api_comuna_create', 'admin', 8, 'post', 200, lambda: ({}, json_({"nombre_comuna": "Nueva"}))),
+            Caso('api_comuna_update', 'admin', 9, 'put', 200, lambda: ({"pk": self.comuna.id}, json_({"nombre_comuna": "Otra"}))),
+            Caso('api_comuna_delete', 'admin', 7, 'delete', 200,
+                 lambda: ({"pk": ComunaPlan.objects.create(nombre_comuna="Nueva").id}, {})),
+            Caso('api_tipomedida_list', 'admin', 4),
+            Caso('api_tipomedida_create', 'admin', 8, 'post', 200, lambda: ({}, json_({"nombre_tipo_medida": "Nuevo"}))),
+            Caso('api_tipomedida_update', 'admin', 9, 'put', 200, lambda: ({"pk": self.tipo.id}, json_({"nombre_tipo_medida": "Otro"}))),
+            Caso('api_tipomedida_delete', 'admin', 8, 'delete', 200,
+                 lambda: ({"pk": TiposMedidas.objects.create(nombre_tipo_medida="Nuevo").id}, {})),
+            Caso('api_medida_list', 'admin', 5),
+            Caso('api_medida_create', 'admin', 11, 'post', 200, lambda: ({}, json_(self.datos_medida()))),
+            Caso('api_medida_update', 'admin', 11, 'put', 200, lambda: ({"pk": self.medida.id}, json_({"nombre_corto": "Otra"}))),
+            Caso('api_medida_delete', 'admin', 11, 'delete', 200, lambda: ({"pk": self.medida_nueva().id}, {})),
+            # API: indicadores
+            Caso('api_indicadores_list', 'admin', 2),
+            Caso('api_indicadores_exportar', 'admin', 3),
+            Caso('api_revisar_indicadores', 'admin', 15, 'post', 200,
+                 lambda: ({}, json_({"ids": self.pendientes_revision, "accion": "aprobar"}))),
+            Caso('api_aprobar_indicador', 'admin', 18, 'post', 200, lambda: ({"pk": self.pendientes_revision[0]}, {})),
+            Caso('api_rechazar_indicador', 'admin', 8, 'post', 200,
+                 lambda: ({"pk": self.pendientes_revision[0]}, json_({"motivo": "Falta firma"}))),
+            # API: usuarios
+            Caso('api_register', None, 3, 'post', 200, lambda: ({}, json_({
+                "username": "nuevo@organismo.cl", "email": "nuevo@organismo.cl", "password": "clave-segura-123",
+                "organismo": self.organismo.id,
+            }))),
+            Caso('api_usuario_dashboard', 'usuario', 6),
+            Caso('api_subir_documentos', 'usuario', 30, 'post', 200,
+                 lambda: (medida, {"data": self.archivos(), "format": "multipart"})),
+            Caso('api_documentos_requeridos', 'usuario', 4, 'get', 200, lambda: (medida, {})),
+            Caso('api_crear_carga', 'usuario', 4, 'post', 201, lambda: (medida, json_({
+                "documento_requerido": self.medida.documentos_requeridos.first().id,
+                "nombre_archivo": "informe.pdf", "tamano_total": 64,
+            }))),
+            Caso('api_finalizar_cargas', 'usuario', 35, 'post', 200, self.cargas_completas),
+            Caso('api_carga', 'usuario', 2, 'get', 200, lambda: ({"carga_id": self.carga().id}, {})),
+            Caso('api_carga', 'usuario', 6, 'patch', 200, lambda: ({"carga_id": self.carga().id}, {
+                "data": os.urandom(64), "content_type": "application/offset+octet-stream", "HTTP_UPLOAD_OFFSET": "0",
+            })),
+            Caso('api_metricas', 'admin', 1),
+            # API asíncrona
+            Caso('api_async_usuario_dashboard', 'usuario', 6),
+            Caso('api_async_documentos_requeridos', 'usuario', 4, 'get', 200, lambda: (medida, {})),
+            Caso('api_async_organismo_list', 'admin', 4),
+            Caso('api_async_comuna_list', 'admin', 4),
+            Caso('api_async_tipomedida_list', 'admin', 4),
+            Caso('api_async_medida_list', 'admin', 5),
+            # Frontend de administración
+            Caso('admin_login', None, 0),
+            Caso('admin_usuarios', 'admin', 4),
+            Caso('aprobar_usuario', 'admin', 12, 'get', 302, lambda: ({"user_id": self.pendientes[0].id}, {})),
+            Caso('desactivar_usuario', 'admin', 9, 'post', 302, lambda: ({"user_id": self.otro_usuario.id}, {})),
+            Caso('organismo_list', 'admin', 4),
+            Caso('organismo_create', 'admin', 18, 'post', 302, lambda: ({}, {"data": {"nombre_organismo": "Nuevo"}})),
+            Caso('organismo_update', 'admin', 3, 'get', 200, lambda: ({"pk": self.organismo.id}, {})),
+            Caso('organismo_delete', 'admin', 18, 'post', 302,
+                 lambda: ({"pk": OrganismoPublico.objects.create(nombre_organismo="Nuevo").id}, {})),
+            Caso('comuna_list', 'admin', 4),
+            Caso('comuna_create', 'admin', 12, 'post', 302, lambda: ({}, {"data": {"nombre_comuna": "Nueva"}})),
+            Caso('comuna_update', 'admin', 3, 'get', 200, lambda: ({"pk": self.comuna.id}, {})),
+            Caso('comuna_delete', 'admin', 11, 'post', 302,
+                 lambda: ({"pk": ComunaPlan.objects.create(nombre_comuna="Nueva").id}, {})),
+            Caso('tipomedida_list', 'admin', 4),
+            Caso('tipomedida_create', 'admin', 12, 'post', 302, lambda: ({}, {"data": {"nombre_tipo_medida": "Nuevo"}})),
+            Caso('tipomedida_update', 'admin', 3, 'get', 200, lambda: ({"pk": self.tipo.id}, {})),
+            Caso('tipomedida_delete', 'admin', 12, 'post', 302,
+                 lambda: ({"pk": TiposMedidas.objects.create(nombre_tipo_medida="Nuevo").id}, {})),
+            Caso('medida_list', 'admin', 4),
+            Caso('medida_create', 'admin', 29, 'post', 302,
+                 lambda: ({}, {"data": dict(self.datos_medida(), datos_requeridos=json.dumps(["Informe", "Certificado"]))})),
+            Caso('medida_update', 'admin', 6, 'get', 200, lambda: ({"pk": self.medida.id}, {})),
+            Caso('medida_delete', 'admin', 15, 'post', 302, lambda: ({"pk": self.medida_nueva().id}, {})),
+            Caso('indicadores_list', 'admin', 4),
+            Caso('aprobar_indicador', 'admin', 22, 'post', 302, lambda: ({"pk": self.pendientes_revision[0]}, {})),
+            Caso('rechazar_indicador', 'admin', 12, 'post', 302,
+                 lambda: ({"pk": self.pendientes_revision[0]}, {"data": {"motivo": "Falta firma"}})),
+            Caso('revisar_indicadores_seleccionados', 'admin', 19, 'post', 302,
+                 lambda: ({}, {"data": {"ids": self.pendientes_revision, "accion": "aprobar"}})),
+            # Frontend de usuarios
+            Caso('register', None, 1),
+            Caso('user_login', None, 0),
+            Caso('usuario_dashboard', 'usuario', 4),
+            Caso('subir_documentos', 'usuario', 6, 'get', 200, lambda: (medida, {})),
+            Caso('subir_documentos', 'usuario', 36, 'post', 302, lambda: (medida, {"data": self.archivos()})),
+        ]
+
+    # ------ Medición ------
+
+    def autenticar(self, rol):
+        # Sesión para el frontend y JWT para la API, como un cliente real.
+        self.client.logout()
+        self.client.credentials()
+        usuario = {'admin': self.admin, 'usuario': self.usuario}.get(rol)
+        if usuario is not None:
+            self.client.force_login(usuario)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {TokenUsuarioSerializer.get_token(usuario).access_token}")
+
+    def medir(self, caso):
+        """
+        Ejecuta la petición REPETICIONES veces, cada una con las caches vacías y en una transacción que se revierte.
+        Retorna la cantidad de consultas y la mediana del tiempo en milisegundos.
+        """
+        self.autenticar(caso.rol)
+        consultas, tiempos = set(), []
+        for _ in range(self.REPETICIONES):
+            cache.clear()
+            with transaction.atomic(), mock.patch.dict('proyecto_prevencion.utils.formularios._registro', clear=True):
+                kwargs, peticion = caso.preparar() if caso.preparar else ({}, {})
+                url = reverse(caso.ruta, kwargs=kwargs)
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    response = getattr(self.client, caso.metodo)(url, **peticion)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                transaction.set_rollback(True)
+            self.assertEqual(response.status_code, caso.esperado, getattr(response, 'data', None))
+            consultas.add(len(capturadas))
+        self.assertEqual(len(consultas), 1, "La cantidad de consultas varía entre repeticiones.")
+        return consultas.pop(), statistics.median(tiempos)
+
+    def test_presupuesto_de_consultas(self):
+        resultados = {}
+        for caso in self.casos():
+            nombre = f"{caso.metodo.upper()} {caso.ruta}"
+            with self.subTest(nombre):
+                consultas, ms = self.medir(caso)
+                resultados[nombre] = {"consultas": consultas, "ms": round(ms, 2)}
+                self.assertLessEqual(consultas, caso.presupuesto, f"{nombre} excede su presupuesto de consultas.")
+
+        if os.environ.get('ACTUALIZAR_LINEA_BASE'):
+            with open(LINEA_BASE_RENDIMIENTO, 'w') as archivo:
+                json.dump(resultados, archivo, indent=2, sort_keys=True)
+                archivo.write("\n")
+            return
+
+        with open(LINEA_BASE_RENDIMIENTO) as archivo:
+            linea_base = json.load(archivo)
+        for nombre, resultado in resultados.items():
+            with self.subTest(nombre):
+                self.assertIn(nombre, linea_base, "Falta en la línea base; regenerarla con ACTUALIZAR_LINEA_BASE=1.")
+                if not os.environ.get('VERIFICAR_TIEMPOS'):
+                    continue
+                limite = linea_base[nombre]["ms"] * self.TOLERANCIA + self.MARGEN_MS
+                self.assertLessEqual(resultado["ms"], limite, f"{nombre} es más lento que la línea base.")
+
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        rutas = {
+            patron.name
+            for modulo in ('proyecto_prevencion.apis.urls', 'proyecto_prevencion.frontend.admins.urls', 'proyecto_prevencion.frontend.usuarios.urls')
+            for patron in import_string(f'{modulo}.urlpatterns')
+        }
+        self.assertEqual(rutas - {caso.ruta for caso in self.casos()}, set())
+
+
+class TestGenerarDatos(APITestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        configuracion = override_settings(MEDIA_ROOT=self.directorio)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+
+    def generar(self, **opciones):
+        opciones = dict(organismos=2, medidas=4, documentos=2, usuarios=2, anios=3, archivos=3, batch_size=7) | opciones
+        call_command('generar_datos', stdout=StringIO(), **opciones)
+
+    def test_volumenes_e_historial(self):
+        self.generar()
+        medidas = Medida.objects.all()
+        anuales = medidas.filter(frecuencia='anual').count()
+        # Por usuario: un indicador por año en cada medida anual de su organismo y uno en cada medida única.
+        self.assertEqual(Indicador.objects.count(), 2 * (anuales * 3 + (medidas.count() - anuales)))
+        self.assertEqual(DocumentoSubido.objects.count(), Indicador.objects.count() * 2)
+        self.assertEqual(sum(ArchivoAlmacenado.objects.values_list('referencias', flat=True)), DocumentoSubido.objects.count())
+        self.assertEqual(len(list(listar_archivos(default_storage))), 3)
+        self.assertEqual(ResumenCumplimiento.objects.count(), 2 * 2 * 4)
+
+        fechas = Indicador.objects.filter(medida__frecuencia='anual').values_list('fecha_reporte', flat=True)
+        self.assertGreater(max(fechas) - min(fechas), timedelta(days=365))
+        self.assertFalse(Indicador.objects.filter(fecha_modificacion__lt=F('fecha_reporte')).exists())
+
+    def test_semilla_determinista(self):
+        estados = []
+        for _ in range(2):
+            self.generar(sin_archivos=True)
+            indicadores = Indicador.objects.order_by('id')
+            estados.append([(i.calculo_indicador, i.estado) for i in indicadores])
+            indicadores.delete()
+        self.assertEqual(estados[0], estados[1])
+
+
+class TestLoadCatalog(APITestCase):
+    catalogos = os.path.join(settings.BASE_DIR, 'catalogos')
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def cargar(self, *rutas):
+        call_command('loadcatalog', *rutas, stdout=StringIO())
+
+    def test_carga_idempotente(self):
+        self.cargar(self.catalogos)
+        conteos = [modelo.objects.count() for modelo in (OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido)]
+        self.assertEqual(conteos, [13, 3, 3, 9, 13])
+        self.cargar(self.catalogos)
+        self.assertEqual([modelo.objects.count() for modelo in (OrganismoPublico, ComunaPlan, TiposMedidas, Medida, DocumentoRequerido)], conteos)
+        # Las secuencias quedan después de los ids cargados.
+        self.assertEqual(OrganismoPublico.objects.create(nombre_organismo="Nuevo").id, 14)
+
+    def test_actualiza_por_id_desde_json(self):
+        self.cargar(self.catalogos)
+        medida = Medida.objects.get(pk=1)
+        _, serializer, _ = formularios_documentos(medida)
+        archivo = os.path.join(self.directorio, 'documentos.json')
+        with open(archivo, 'w') as f:
+            json.dump([
+                {"id": 1, "medida": 1, "descripcion": "Registro actualizado"},
+                {"id": 100, "medida": 1, "descripcion": "Documento nuevo"},
+            ], f)
+        self.cargar(archivo)
+
+        medida.refresh_from_db()
+        documentos, serializer_nuevo, _ = formularios_documentos(medida)
+        self.assertEqual([d.descripcion for d in documentos], ["Registro actualizado", "Documento nuevo"])
+        self.assertIsNot(serializer_nuevo, serializer)
+        self.assertEqual(DocumentoRequerido.objects.count(), 14)
+
+    def test_error_no_carga_nada(self):
+        with open(os.path.join(self.directorio, 'organismos.csv'), 'w') as f:
+            f.write("id,nombre_organismo,activo\n1,Organismo,True\ndos,Otro,True\n")
+        with self.assertRaisesMessage(CommandError, "organismos.csv, registro 3"):
+            self.cargar(self.directorio)
+        self.assertFalse(OrganismoPublico.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Los planes de ejecución se verifican contra PostgreSQL.")
+class TestPlanesConsultas(APITestCase):
+    """
+    Verifica con EXPLAIN que las consultas frecuentes usan sus índices. Con tablas pequeñas el planner prefiere
+    recorrerlas completas, por lo que se desactiva el seq scan: si aún así aparece, no hay un índice aplicable.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generar_datos', organismos=5, medidas=20, usuarios=3, anios=3, sin_archivos=True, stdout=StringIO())
+        # La mayoría de los registros de catálogo inactivos, como tras años de uso.
+        OrganismoPublico.objects.bulk_create(OrganismoPublico(nombre_organismo=f"Antiguo {i}", activo=False) for i in range(500))
+        ComunaPlan.objects.bulk_create(ComunaPlan(nombre_comuna=f"Comuna {i}", activo=i < 5) for i in range(500))
+        TiposMedidas.objects.bulk_create(TiposMedidas(nombre_tipo_medida=f"Tipo {i}", activo=i < 5) for i in range(500))
+        Medida.objects.filter(id__in=Medida.objects.order_by('id').values('id')[::2]).update(activo=False)
+        Usuario.objects.bulk_create(Usuario(username=f"pendiente{i}@organismo.cl") for i in range(300))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsaIndice(self, queryset, indice):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        try:
+            plan = queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("RESET enable_seqscan")
+        self.assertNotIn("Seq Scan", plan)
+        self.assertIn(indice, plan)
+
+    def test_ultimo_indicador_por_medida_y_usuario(self):
+        indicador = Indicador.objects.first()
+        queryset = Indicador.objects.filter(medida_id=indicador.medida_id, usuario_id=indicador.usuario_id)\
+            .order_by('-fecha_reporte', '-id')[:1]
+        self.assertUsaIndice(queryset, 'indicador_medida_usuario_idx')
+
+    def test_listado_paginado(self):
+        self.assertUsaIndice(Indicador.objects.order_by('-fecha_reporte', '-id')[:50], 'indicador_fecha_id_idx')
+        usuario_id = Indicador.objects.values_list('usuario_id', flat=True).first()
+        queryset = Indicador.objects.filtrar(usuario=usuario_id).order_by('-fecha_reporte', '-id')[:50]
+        self.assertUsaIndice(queryset, 'indicador_usuario_fecha_idx')
+        medida_id = Indicador.objects.values_list('medida_id', flat=True).first()
+        queryset = Indicador.objects.filtrar(medida=medida_id).order_by('-fecha_reporte', '-id')[:50]
+        self.assertUsaIndice(queryset, 'indicador_medida_fecha_idx')
+
+    def test_indicadores_del_periodo(self):
+        indicador = Indicador.objects.first()
+        queryset = Indicador.objects.filter(
+            medida_id=indicador.medida_id, usuario_id=indicador.usuario_id, periodo=indicador.periodo
+        )
+        self.assertUsaIndice(queryset, 'indicador_medida_periodo_idx')
+
+    def test_claves_foraneas_sin_indice_propio(self):
+        # Las FK de Indicador no tienen índice propio: los borrados en cascada y los filtros por una sola FK
+        # deben usar un índice compuesto que comience por ella.
+        indicador = Indicador.objects.first()
+        self.assertUsaIndice(Indicador.objects.filter(medida_id=indicador.medida_id), 'indicador_medida_')
+        self.assertUsaIndice(Indicador.objects.filter(usuario_id=indicador.usuario_id), 'indicador_usuario_fecha_idx')
+
+    def test_cola_de_revision(self):
+        queryset = Indicador.objects.filtrar(estado='pendiente').order_by('-fecha_reporte', '-id')[:50]
+        self.assertUsaIndice(queryset, 'indicador_estado_fecha_idx')
+
+    def test_catalogos_activos(self):
+        self.assertUsaIndice(OrganismoPublico.objects.filter(activo=True), 'organismo_activo_idx')
+        self.assertUsaIndice(ComunaPlan.objects.filter(activo=True), 'comuna_activa_idx')
+        self.assertUsaIndice(TiposMedidas.objects.filter(activo=True), 'tipomedida_activo_idx')
+        self.assertUsaIndice(Medida.objects.filter(activo=True), 'medida_activa_idx')
+
+    def test_medidas_activas_del_organismo(self):
+        organismo_id = Medida.objects.values_list('organismo_id', flat=True).first()
+        self.assertUsaIndice(Medida.objects.filter(organismo_id=organismo_id, activo=True), 'medida_organismo_activa_idx')
+
+    def test_usuarios_por_aprobacion(self):
+        self.assertUsaIndice(Usuario.objects.filter(is_superuser=False, aprobado=False), 'usuario_superuser_aprobado_idx')
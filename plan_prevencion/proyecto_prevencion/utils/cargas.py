@@ -0,0 +1,72 @@
+import os
+import uuid
+from django.core.files.storage import default_storage
+from django.db import transaction
+from proyecto_prevencion.models import Indicador, DocumentoSubido, ResumenCumplimiento
+
+
+def nombre_archivo(documento, nombre_original):
+    """
+    Nombre único con el que se guarda en el storage el archivo de un documento requerido.
+    """
+    extension = os.path.splitext(nombre_original)[1]
+    return f"{uuid.uuid4().hex}_doc_{documento.id}{extension}"
+
+
+def guardar_archivos(archivos):
+    """
+    Guarda en el storage los archivos de 'archivos', lista de tuplas (documento_requerido, archivo), y retorna
+    las tuplas (documento_requerido, nombre guardado). Se llama fuera de la transacción que crea las filas,
+    para que si esta se revierte los archivos puedan liberarse; si falla, libera los que ya había guardado.
+    """
+    guardados = []
+    try:
+        for documento, archivo in archivos:
+            guardados.append((documento, default_storage.save(nombre_archivo(documento, archivo.name), archivo)))
+    except Exception:
+        liberar_archivos(guardados)
+        raise
+    return guardados
+
+
+def liberar_archivos(guardados):
+    """
+    Elimina del storage los archivos guardados con guardar_archivos cuyas filas no llegaron a crearse.
+    """
+    for _, filename in guardados:
+        default_storage.delete(filename)
+
+
+def crear_indicador(medida, usuario, guardados):
+    """
+    Crea el indicador pendiente con sus documentos ya guardados. Debe llamarse dentro de una transacción.
+    """
+    indicador = Indicador.objects.create(
+        medida=medida,
+        usuario=usuario,
+        calculo_indicador=0,
+        cumple_requisitos=False,
+        estado='pendiente',
+    )
+    DocumentoSubido.objects.bulk_create([
+        DocumentoSubido(indicador=indicador, documento_requerido=documento, archivo=filename)
+        for documento, filename in guardados
+    ])
+    ResumenCumplimiento.objects.actualizar(medida.id, usuario.id)
+    return indicador
+
+
+def registrar_indicador(medida, usuario, archivos):
+    """
+    Registra un nuevo indicador con sus documentos subidos.
+    'archivos' es una lista de tuplas (documento_requerido, archivo). Los archivos se guardan
+    primero en el storage y luego las filas se crean en una sola transacción; si algo falla,
+    los archivos ya guardados se eliminan para no dejar huérfanos.
+    """
+    guardados = guardar_archivos(archivos)
+    try:
+        with transaction.atomic():
+            return crear_indicador(medida, usuario, guardados)
+    except Exception:
+        liberar_archivos(guardados)
+        raise
@@ -0,0 +1,63 @@
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from proyecto_prevencion.models import VersionCatalogo
+from proyecto_prevencion.utils.decorators import generar_etag
+
+
+def version_catalogo(nombre):
+    version = VersionCatalogo.objects.filter(pk=nombre).values_list('version', flat=True).first()
+    return version or '0'
+
+
+async def aversion_catalogo(nombre):
+    version = await VersionCatalogo.objects.filter(pk=nombre).values_list('version', flat=True).afirst()
+    return version or '0'
+
+
+def invalidar_catalogo(nombre):
+    """
+    Asigna una nueva versión al catálogo; las copias cacheadas con la versión anterior dejan de usarse.
+    """
+    VersionCatalogo.objects.update_or_create(nombre=nombre, defaults={'version': uuid.uuid4().hex})
+
+
+def obtener_catalogo(nombre, variante, construir):
+    """
+    Devuelve el catálogo desde la cache, construyéndolo con 'construir()' si no existe para la versión vigente.
+    La versión se lee de la base de datos, por lo que funciona con caches locales a cada worker.
+    'variante' distingue representaciones del mismo catálogo (por ejemplo, serializado para la API o modelos para templates).
+    """
+    clave = f"catalogo:{nombre}:{variante}:{version_catalogo(nombre)}"
+    return cache.get_or_set(clave, construir, settings.CATALOGOS_CACHE_TIMEOUT)
+
+
+async def aobtener_catalogo(nombre, variante, construir):
+    """
+    Versión asíncrona de obtener_catalogo; 'construir' es una corrutina. Comparte las claves de cache
+    con la versión síncrona.
+    """
+    clave = f"catalogo:{nombre}:{variante}:{await aversion_catalogo(nombre)}"
+    datos = await cache.aget(clave)
+    if datos is None:
+        datos = await construir()
+        await cache.aset(clave, datos, settings.CATALOGOS_CACHE_TIMEOUT)
+    return datos
+
+
+def estado_catalogo(nombre):
+    """
+    Función de estado para @condicional: el ETag del catálogo es su versión vigente.
+    """
+    def estado(request, *args, **kwargs):
+        return generar_etag('catalogo', nombre, version_catalogo(nombre)), None
+    return estado
+
+
+def aestado_catalogo(nombre):
+    """
+    Función de estado para @condicional_async.
+    """
+    async def estado(request, *args, **kwargs):
+        return generar_etag('catalogo', nombre, await aversion_catalogo(nombre)), None
+    return estado
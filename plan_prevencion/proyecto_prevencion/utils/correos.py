@@ -0,0 +1,23 @@
+from django.conf import settings
+from proyecto_prevencion.models import CorreoPendiente
+
+
+def encolar_correo(asunto, mensaje, destinatarios, remitente=None):
+    """
+    Agrega un correo a la bandeja de salida; lo envía el comando 'enviar_correos'.
+    Si se llama dentro de una transacción, el correo solo queda encolado si esta se confirma.
+    """
+    return CorreoPendiente.objects.create(
+        asunto=asunto,
+        mensaje=mensaje,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+
+def encolar_aprobacion_usuario(destinatario):
+    return encolar_correo(
+        'Cuenta Aprobada',
+        'Su cuenta ha sido aprobada y ya puede ingresar a la plataforma.',
+        [destinatario],
+    )
@@ -0,0 +1,24 @@
+import base64
+import json
+from datetime import datetime
+
+
+def codificar_cursor(cursor):
+    """
+    Convierte la tupla (fecha_reporte, id) en un token opaco para la URL.
+    """
+    fecha, id = cursor
+    data = json.dumps([fecha.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """
+    Operación inversa de codificar_cursor. Lanza ValueError si el token no es válido.
+    """
+    try:
+        padding = '=' * (-len(token) % 4)
+        fecha, id = json.loads(base64.urlsafe_b64decode(token + padding))
+        return datetime.fromisoformat(fecha), int(id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Cursor inválido.") from e
@@ -1,4 +1,7 @@
+import hashlib
 from functools import wraps
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.shortcuts import redirect
 from django.contrib import messages
 
@@ -17,3 +20,70 @@ def require_permission(condition, redirect_url='home', error_message="No cuenta
             return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
+
+
+def generar_etag(*partes):
+    """
+    Construye un ETag fuerte a partir de los valores que determinan el contenido de la respuesta.
+    """
+    return quote_etag(hashlib.sha256("|".join(str(parte) for parte in partes).encode()).hexdigest()[:32])
+
+
+def _encabezados_condicionales(request, response, etag, timestamp):
+    if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        if timestamp:
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+        # Obliga a revalidar siempre; el contenido depende del usuario autenticado.
+        response.headers.setdefault('Cache-Control', 'private, no-cache')
+    return response
+
+
+def condicional(estado_func):
+    """
+    Decorador para vistas GET de DRF que responde 304 si el cliente ya tiene la versión vigente
+    (If-None-Match / If-Modified-Since), sin consultar ni serializar los datos.
+    Debe ir debajo de @api_view para que la autenticación y los permisos se evalúen antes.
+    'estado_func' recibe los mismos argumentos que la vista y retorna la tupla (etag, last_modified);
+    cualquiera de los dos puede ser None.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            etag, last_modified = estado_func(request, *args, **kwargs)
+            return respuesta_condicional(request, etag, last_modified, lambda: view_func(request, *args, **kwargs))
+        return _wrapped_view
+    return decorator
+
+
+def respuesta_condicional(request, etag, last_modified, generar):
+    """
+    Lo mismo que @condicional, para vistas que calculan el ETag con los mismos datos que responden (por ejemplo,
+    la página ya consultada) y así no los consultan dos veces. 'generar' construye la respuesta, y solo se llama
+    si el cliente no tiene la versión vigente.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = generar()
+    return _encabezados_condicionales(request, response, etag, timestamp)
+
+
+def condicional_async(estado_func):
+    """
+    Equivalente de @condicional para vistas asíncronas; 'estado_func' es una corrutina.
+    Debe ir debajo del decorador de autenticación.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            etag, last_modified = await estado_func(request, *args, **kwargs)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            return _encabezados_condicionales(request, response, etag, timestamp)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,33 @@
+import json
+from functools import cache
+from pathlib import Path
+from django.conf import settings
+
+DIRECTORIO_ESQUEMA = 'esquema'
+MANIFIESTO_ESQUEMA = 'manifest.json'
+
+
+def directorio_esquema():
+    return Path(settings.STATIC_ROOT) / DIRECTORIO_ESQUEMA
+
+
+# Formatos del esquema que se pregeneran, con el content type que usa SpectacularAPIView para cada uno.
+FORMATOS_ESQUEMA = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+
+
+@cache
+def esquema_pregenerado(formato='json'):
+    """
+    Ruta estática (relativa a STATIC_URL) del esquema OpenAPI generado con 'generar_esquema' en el formato
+    indicado, o None si está desactivado o aún no se genera. Se lee una sola vez por proceso.
+    """
+    if not settings.ESQUEMA_API_PREGENERADO or not getattr(settings, 'STATIC_ROOT', None):
+        return None
+    try:
+        with open(directorio_esquema() / MANIFIESTO_ESQUEMA) as manifiesto:
+            return f"{DIRECTORIO_ESQUEMA}/{json.load(manifiesto)[formato]}"
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,36 @@
+import uuid
+from proyecto_prevencion.models import Medida
+from proyecto_prevencion.apis.serializers import generar_documentos_serializer
+from proyecto_prevencion.frontend.usuarios.forms import generar_subir_documentos_form
+
+# Registro local al proceso de los formularios generados por medida:
+# medida_id -> (version_documentos, documentos, serializer, form).
+_registro = {}
+
+
+def invalidar_documentos(medida_id):
+    """
+    Asigna una nueva versión a los documentos requeridos de la medida; los formularios generados
+    con la versión anterior se reconstruyen en el siguiente uso.
+    """
+    Medida.objects.filter(pk=medida_id).update(version_documentos=uuid.uuid4().hex)
+    _registro.pop(medida_id, None)
+
+
+def formularios_documentos(medida):
+    """
+    Devuelve (documentos, SerializerClass, FormClass) para subir los documentos requeridos de la medida.
+    Se construyen una sola vez por versión de sus documentos, sin volver a consultar la base de datos
+    mientras 'medida.version_documentos' no cambie.
+    """
+    entrada = _registro.get(medida.id)
+    if entrada is None or entrada[0] != medida.version_documentos:
+        documentos = tuple(medida.documentos_requeridos.all())
+        entrada = (
+            medida.version_documentos,
+            documentos,
+            generar_documentos_serializer(medida, documentos),
+            generar_subir_documentos_form(documentos),
+        )
+        _registro[medida.id] = entrada
+    return entrada[1:]
@@ -0,0 +1,76 @@
+import threading
+from bisect import bisect_left
+
+# Límites superiores (en milisegundos) de los tramos de los histogramas; el último tramo no tiene límite.
+LIMITES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histograma:
+    def __init__(self, limites=LIMITES_MS):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.cantidad = 0
+        self.suma = 0.0
+
+    def registrar(self, valor):
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.cantidad += 1
+        self.suma += valor
+
+    def percentil(self, p):
+        """
+        Límite superior del tramo que contiene el percentil 'p' (0-100); None si está en el último tramo o vacío.
+        """
+        if not self.cantidad:
+            return None
+        objetivo = self.cantidad * p / 100
+        acumulado = 0
+        for limite, cuenta in zip(self.limites, self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return limite
+        return None
+
+    def como_dict(self):
+        return {
+            'cantidad': self.cantidad,
+            'promedio': self.suma / self.cantidad if self.cantidad else None,
+            'p50': self.percentil(50),
+            'p99': self.percentil(99),
+            'tramos': dict(zip([str(limite) for limite in self.limites] + ['+inf'], self.cuentas)),
+        }
+
+
+class MetricasVistas:
+    """
+    Histogramas por vista (tiempo total, de base de datos, de render y cantidad de consultas).
+    Son locales al proceso: cada worker lleva los suyos.
+    """
+    METRICAS = ('total', 'vista', 'db', 'render', 'consultas')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vistas = {}
+
+    def registrar(self, vista, valores):
+        with self._lock:
+            histogramas = self._vistas.setdefault(vista, {
+                metrica: Histograma(limites=(0, 1, 2, 5, 10, 20, 50, 100) if metrica == 'consultas' else LIMITES_MS)
+                for metrica in self.METRICAS
+            })
+            for metrica in self.METRICAS:
+                histogramas[metrica].registrar(valores[metrica])
+
+    def como_dict(self):
+        with self._lock:
+            return {
+                vista: {metrica: histograma.como_dict() for metrica, histograma in histogramas.items()}
+                for vista, histogramas in sorted(self._vistas.items())
+            }
+
+    def reiniciar(self):
+        with self._lock:
+            self._vistas.clear()
+
+
+metricas_vistas = MetricasVistas()
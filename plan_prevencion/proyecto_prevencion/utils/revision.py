@@ -0,0 +1,144 @@
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+from proyecto_prevencion.models import Indicador, Medida, ResumenCumplimiento
+from proyecto_prevencion.utils.catalogos import invalidar_catalogo
+
+
+def revisar_indicadores(ids, aprobar, motivo=""):
+    """
+    Aprueba o rechaza en bloque los indicadores indicados con consultas UPDATE por conjunto, en una sola transacción.
+    Al aprobar se recalcula 'proxima_fecha_carga' de las medidas involucradas según su frecuencia. Al rechazar el
+    aprobado vigente de un período, vuelve a quedar vigente el último aprobado que había reemplazado.
+    Como update() no ejecuta señales ni auto_now, se actualizan aquí 'fecha_modificacion', el resumen
+    de cumplimiento y, si alguna medida cambió, la versión del catálogo de medidas.
+    Retorna la tupla (ids que no existen, ids de los aprobados que quedaron reemplazados), para informar
+    también los reemplazos que no se pidieron explícitamente.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        indicadores = Indicador.objects.select_for_update().filter(pk__in=ids)
+        filas = list(indicadores.order_by('fecha_reporte', 'id').values_list('id', 'medida_id', 'usuario_id', 'periodo'))
+        encontrados = {id: medida_id for id, medida_id, _, _ in filas}
+        if not encontrados:
+            return sorted(set(ids)), []
+
+        reemplazos = {}
+        if aprobar:
+            vigentes, reemplazos = _aprobados_por_periodo(filas)
+            # Los reemplazados se marcan primero para que queden fuera de la unicidad del aprobado de cada período.
+            if reemplazos:
+                Indicador.objects.filter(pk__in=reemplazos).update(
+                    reemplazado_por=Case(*(When(pk=id, then=Value(vigente)) for id, vigente in reemplazos.items())),
+                    fecha_modificacion=ahora,
+                )
+            indicadores.update(
+                cumple_requisitos=True,
+                estado='aprobado',
+                fecha_aprobacion=ahora,
+                fecha_rechazo=None,
+                motivo_rechazo="",
+                reemplazado_por=Case(When(pk__in=vigentes, then=Value(None)), default=F('reemplazado_por')),
+                fecha_modificacion=ahora,
+            )
+            medidas = Medida.objects.filter(pk__in=set(encontrados.values()))
+            proxima = ahora.date() + relativedelta(years=+1)
+            # Solo se actualizan las medidas cuya fecha cambia: el catálogo cacheado incluye 'proxima_fecha_carga'
+            # y se invalida únicamente si alguna cambió, no en cada aprobación.
+            actualizadas = medidas.filter(frecuencia='anual').exclude(proxima_fecha_carga=proxima)\
+                .update(proxima_fecha_carga=proxima)
+            actualizadas += medidas.filter(frecuencia='unica', proxima_fecha_carga__isnull=False)\
+                .update(proxima_fecha_carga=None)
+            if actualizadas:
+                invalidar_catalogo('medida')
+        else:
+            # Se calcula antes de rechazar, mientras los rechazados siguen aprobados y con sus reemplazos.
+            reasignados = _reemplazos_tras_rechazo(filas)
+            indicadores.update(
+                cumple_requisitos=False,
+                estado='rechazado',
+                fecha_aprobacion=None,
+                fecha_rechazo=ahora,
+                motivo_rechazo=motivo,
+                reemplazado_por=None,
+                fecha_modificacion=ahora,
+            )
+            # Los rechazados ya quedaron fuera de la unicidad, así que el nuevo vigente de cada período puede liberarse.
+            if reasignados:
+                Indicador.objects.filter(pk__in=reasignados).update(
+                    reemplazado_por=Case(*(When(pk=id, then=Value(nuevo)) for id, nuevo in reasignados.items())),
+                    fecha_modificacion=ahora,
+                )
+
+        # Solo cambian los resúmenes que apuntan a alguno de los indicadores revisados (el más reciente de su par).
+        ResumenCumplimiento.objects.filter(indicador_id__in=encontrados)\
+            .update(estado='aprobado' if aprobar else 'rechazado', fecha_actualizacion=ahora)
+
+    return sorted(set(ids) - set(encontrados)), sorted(reemplazos)
+
+
+def _aprobados_por_periodo(filas):
+    """
+    Cada medida y usuario admite un solo indicador aprobado vigente por período. De los indicadores a aprobar
+    queda vigente el más reciente de cada período; los demás, y el que estuviera vigente antes, siguen
+    aprobados pero reemplazados por él.
+    'filas' son tuplas (id, medida_id, usuario_id, periodo) ordenadas por fecha de reporte.
+    Retorna (ids que quedan vigentes, {id reemplazado: id que lo reemplaza}).
+    """
+    ultimos = {}
+    for id, medida_id, usuario_id, periodo in filas:
+        ultimos[medida_id, usuario_id, periodo] = id
+    vigentes = list(ultimos.values())
+
+    reemplazos = {
+        id: ultimos[medida_id, usuario_id, periodo]
+        for id, medida_id, usuario_id, periodo in filas if id not in vigentes
+    }
+    mismos_periodos = reduce(or_, (
+        Q(medida_id=medida_id, usuario_id=usuario_id, periodo=periodo) for medida_id, usuario_id, periodo in ultimos
+    ))
+    anteriores = Indicador.objects.select_for_update()\
+        .filter(mismos_periodos, estado='aprobado', reemplazado_por__isnull=True)\
+        .exclude(pk__in=vigentes)\
+        .values_list('id', 'medida_id', 'usuario_id', 'periodo')
+    for id, medida_id, usuario_id, periodo in anteriores:
+        reemplazos[id] = ultimos[medida_id, usuario_id, periodo]
+    return vigentes, reemplazos
+
+
+def _reemplazos_tras_rechazo(filas):
+    """
+    Los aprobados que apuntan a un indicador que se va a rechazar pasan a apuntar al siguiente aprobado de su cadena.
+    Si se rechaza el vigente de un período, queda vigente el aprobado restante más reciente (el último en aprobarse),
+    que es el que había reemplazado más recientemente. Un aprobado siempre apunta a uno aprobado después que él.
+    'filas' son tuplas (id, medida_id, usuario_id, periodo) de los indicadores a rechazar.
+    Retorna {id: id que lo reemplaza, o None si queda vigente} solo para los aprobados que cambian.
+    """
+    rechazados = {id for id, _, _, _ in filas}
+    mismos_periodos = reduce(or_, (
+        Q(medida_id=medida_id, usuario_id=usuario_id, periodo=periodo) for _, medida_id, usuario_id, periodo in filas
+    ))
+    aprobados = Indicador.objects.select_for_update()\
+        .filter(mismos_periodos, estado='aprobado')\
+        .order_by('fecha_aprobacion', 'fecha_reporte', 'id')\
+        .values_list('id', 'medida_id', 'usuario_id', 'periodo', 'reemplazado_por_id')
+    reemplazos, periodos, vigentes = {}, {}, {}
+    for id, medida_id, usuario_id, periodo, reemplazado_por in aprobados:
+        reemplazos[id] = reemplazado_por
+        if id not in rechazados:
+            periodos[id] = (medida_id, usuario_id, periodo)
+            vigentes[medida_id, usuario_id, periodo] = id
+
+    reasignados = {}
+    for id, periodo in periodos.items():
+        nuevo = reemplazos[id]
+        while nuevo in rechazados:
+            nuevo = reemplazos.get(nuevo)
+        if nuevo is None and vigentes[periodo] != id:
+            nuevo = vigentes[periodo]
+        if nuevo != reemplazos[id]:
+            reasignados[id] = nuevo
+    return reasignados
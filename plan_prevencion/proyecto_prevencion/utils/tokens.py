@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from proyecto_prevencion.models import Usuario
+
+
+def _clave(usuario_id):
+    return f"version_token:{usuario_id}"
+
+
+def version_token(usuario_id):
+    """
+    Versión vigente de los tokens del usuario, o None si no existe. Se cachea por unos segundos: con una
+    cache compartida la revocación es inmediata; con caches locales a cada worker tarda a lo más ese tiempo.
+    """
+    return cache.get_or_set(
+        _clave(usuario_id),
+        lambda: Usuario.objects.filter(pk=usuario_id).values_list('version_token', flat=True).first(),
+        settings.VERSION_TOKEN_CACHE_TIMEOUT
+    )
+
+
+async def aversion_token(usuario_id):
+    version = await cache.aget(_clave(usuario_id))
+    if version is None:
+        version = await Usuario.objects.filter(pk=usuario_id).values_list('version_token', flat=True).afirst()
+        await cache.aset(_clave(usuario_id), version, settings.VERSION_TOKEN_CACHE_TIMEOUT)
+    return version
+
+
+def revocar_tokens(usuario):
+    """
+    Invalida todos los tokens emitidos al usuario; debe volver a iniciar sesión.
+    La versión cacheada se elimina al confirmar la transacción: antes, otra petición podría volver a cachear
+    la versión anterior y mantenerla vigente hasta que expire.
+    """
+    Usuario.objects.filter(pk=usuario.pk).update(version_token=F('version_token') + 1)
+    transaction.on_commit(lambda: cache.delete(_clave(usuario.pk)))
@@ -1,7 +1,23 @@
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets
 from django.shortcuts import render, redirect
+from django.views.decorators.http import etag
+from django.templatetags.static import static
+from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from django.contrib.auth import logout
-from rest_framework.decorators import api_view
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from proyecto_prevencion.apis.authentication import JWTAuthenticationClaims
+from proyecto_prevencion.models import DocumentoSubido
+from proyecto_prevencion.utils.esquema import FORMATOS_ESQUEMA, esquema_pregenerado
+
+RANGO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
 def logout_view(request):
     logout(request)
@@ -13,3 +29,124 @@ def home(request):
     Pagina de inicio del sitio
     """
     return render(request, 'home.html')
+
+
+_esquema_dinamico = SpectacularAPIView.as_view()
+
+
+def _formato_esquema(request):
+    """
+    Formato pedido como lo resuelve SpectacularAPIView: '?format=' o, si no viene, el Accept; YAML por defecto.
+    """
+    formato = request.GET.get('format')
+    if formato:
+        return formato
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+def _archivo_esquema(formato):
+    return esquema_pregenerado(formato) if formato in FORMATOS_ESQUEMA else None
+
+
+def _etag_esquema(request, *args, **kwargs):
+    # El nombre del archivo incluye el hash de su contenido.
+    return _archivo_esquema(_formato_esquema(request))
+
+
+@etag(_etag_esquema)
+def esquema_api(request, *args, **kwargs):
+    """
+    Entrega el esquema OpenAPI pregenerado, en YAML o en JSON igual que SpectacularAPIView, sin generarlo en cada
+    petición. Si no existe o está desactivado (desarrollo), o el formato no es conocido, lo genera en vivo.
+    La versión cacheable por un año es el archivo estático con hash que usa /api/docs/.
+    """
+    formato = _formato_esquema(request)
+    archivo = _archivo_esquema(formato)
+    if archivo is None:
+        return _esquema_dinamico(request, *args, **kwargs)
+    response = FileResponse(open(os.path.join(settings.STATIC_ROOT, archivo), 'rb'), content_type=FORMATOS_ESQUEMA[formato])
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+class DocumentacionApiView(SpectacularSwaggerView):
+    def _get_schema_url(self, request):
+        archivo = esquema_pregenerado()
+        if archivo is None:
+            return super()._get_schema_url(request)
+        return static(archivo)
+
+
+def _leer_rango(archivo, inicio, largo, chunk_size=64 * 1024):
+    with archivo:
+        archivo.seek(inicio)
+        while largo > 0:
+            chunk = archivo.read(min(chunk_size, largo))
+            if not chunk:
+                break
+            largo -= len(chunk)
+            yield chunk
+
+
+def _respuesta_django(ruta, tamano, content_type, rango):
+    """
+    Entrega el archivo desde Django. Solo se usa en desarrollo o si no hay un proxy configurado.
+    Soporta un único rango 'bytes=inicio-fin'.
+    """
+    match = RANGO_RE.match(rango) if rango else None
+    if match is None or match.group(1) == match.group(2) == '':
+        response = FileResponse(default_storage.open(ruta, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if match.group(1):
+        inicio = int(match.group(1))
+        fin = min(int(match.group(2)), tamano - 1) if match.group(2) else tamano - 1
+    else:
+        # 'bytes=-N' son los últimos N bytes.
+        inicio = max(tamano - int(match.group(2)), 0)
+        fin = tamano - 1
+    if inicio > fin or inicio >= tamano:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamano}'
+        return response
+
+    largo = fin - inicio + 1
+    response = StreamingHttpResponse(
+        _leer_rango(default_storage.open(ruta, 'rb'), inicio, largo), status=206, content_type=content_type
+    )
+    response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+    response['Content-Length'] = str(largo)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@api_view(['GET', 'HEAD'])
+@authentication_classes([SessionAuthentication, JWTAuthenticationClaims])
+@permission_classes([IsAuthenticated])
+def servir_documento(request, ruta):
+    """
+    Entrega un documento subido solo al organismo dueño de la medida o a un administrador.
+    La transferencia se delega al proxy (X-Accel-Redirect o X-Sendfile) según MEDIA_SERVIDOR.
+    """
+    user = request.user
+    documentos = DocumentoSubido.objects.filter(archivo=ruta)
+    if not user.is_superuser:
+        if not user.aprobado:
+            raise Http404
+        documentos = documentos.filter(indicador__medida__organismo_id=user.organismo_id)
+    if not documentos.exists() or not default_storage.exists(ruta):
+        raise Http404
+
+    content_type = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+    if settings.MEDIA_SERVIDOR == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + ruta
+    elif settings.MEDIA_SERVIDOR == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = default_storage.path(ruta)
+    else:
+        response = _respuesta_django(ruta, default_storage.size(ruta), content_type, request.headers.get('Range'))
+    response['Content-Disposition'] = f'inline; filename="{os.path.basename(ruta)}"'
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response